@@ -0,0 +1 @@
+"""Benchmarks for NoteUtil, Quiz and Leitner. Run a module with python -m benchmarks.<name>."""
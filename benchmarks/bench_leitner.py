@@ -0,0 +1,64 @@
+"""Benchmarks Leitner.load, Leitner.save, grading and Leitner.refresh on a large number of pairs."""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from noteutil import Leitner, Note, NoteUtil
+
+
+def make_noteutil(directory: str, pairs: int) -> NoteUtil:
+    """Builds a NoteUtil holding only pairs without going through the note file parser."""
+    noteutil = NoteUtil.__new__(NoteUtil)
+    noteutil.note_file = os.path.join(directory, "bench_notes.txt")
+    noteutil.notes = []
+    for nindex in range(pairs):
+        term = "Term {0}".format(nindex)
+        definition = "Definition of term {0}.".format(nindex)
+        noteutil.notes.append(Note(noteutil, "{0} ~ {1}".format(term, definition), nindex,
+                                   nid=nindex, term=term, definition=definition, separator="~"))
+    noteutil._nid_notes = {note.nid: note for note in noteutil.notes}
+    noteutil._nids = pairs
+    noteutil.read_only = False
+    return noteutil
+
+
+def timed(name: str, function) -> None:
+    start = time.perf_counter()
+    function()
+    print("{0:<12} {1:>10.3f} s".format(name, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        noteutil = make_noteutil(directory, args.pairs)
+        leitner = Leitner(noteutil)
+
+        # Spread the pairs over the boxes through a save file, as if they had been studied.
+        boxes = {box_number: [] for box_number in leitner.boxes}
+        for pair in noteutil.pairs:
+            boxes[rng.randint(1, len(boxes))].append(pair.rcontent)
+        with open(leitner.lt_file, mode="w", encoding="utf8") as f:
+            f.write(json.dumps({"boxes": boxes, "times": leitner.times, "session": 1}))
+
+        print("Leitner with {0} pairs".format(args.pairs))
+        timed("load", leitner.load)
+        timed("save", leitner.save)
+        timed("session", lambda: next(leitner.generate(randomize=False), None))
+        timed("preview", lambda: leitner.preview(sessions=365))
+        timed("correct", lambda: [leitner.correct(pair) for pair in noteutil.pairs])
+        timed("incorrect", lambda: [leitner.incorrect(pair) for pair in noteutil.pairs])
+        new_noteutil = make_noteutil(directory, args.pairs)
+        timed("refresh", lambda: leitner.refresh(new_noteutil))
+
+
+if __name__ == "__main__":
+    main()
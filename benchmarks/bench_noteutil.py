@@ -0,0 +1,147 @@
+"""Benchmarks NoteUtil, Quiz and Leitner on a synthetic notebook, timing each operation and its peak memory."""
+import argparse
+import gc
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+from noteutil import CompareOptions, Leitner, NoteUtil, Quiz
+from .generate import generate
+
+
+COMPARE_OPTIONS = ["EQUALS", "SIMILAR", "IN", "SIMIN", "LESS", "LESSE", "GREATER", "GREATERE"]
+
+
+class Timer:
+    """Times named operations and, if asked to, tracks the peak memory each one allocates.
+
+    Parameters
+    ----------
+    memory : bool
+        Whether to trace memory allocations. Tracing slows everything down, so times are only comparable
+        with other runs that traced memory as well.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.results = dict()
+
+    def __call__(self, name: str, function):
+        # Garbage left behind by earlier benchmarks shouldn't be collected on this one's time.
+        gc.collect()
+        if self.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = function()
+        seconds = time.perf_counter() - start
+        result = {"seconds": seconds}
+        if self.memory:
+            result["peak"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.results[name] = result
+
+        if self.memory:
+            print("{0:<24} {1:>10.3f} s {2:>10.1f} MB".format(name, seconds, result["peak"] / 2 ** 20))
+        else:
+            print("{0:<24} {1:>10.3f} s".format(name, seconds))
+        return value
+
+
+def run(directory: str, notes: int, seed: int = 0, queries: int = 20, edits: int = 20,
+        memory: bool = False) -> dict:
+    """Runs every benchmark on a synthetic notebook generated in the directory.
+
+    Parameters
+    ----------
+    directory : str
+    notes : int
+        The number of Notes in the synthetic notebook.
+    seed : int
+    queries : int
+        The number of get and get_list calls per compare option.
+    edits : int
+        The number of edit, insert and delete calls.
+    memory : bool
+        Whether to track the peak memory of each benchmark.
+
+    Returns
+    -------
+    dict
+        Mapped benchmark names to their results.
+    """
+
+    rng = random.Random(seed)
+    config_file = generate(directory, notes, seed)
+    timer = Timer(memory)
+
+    noteutil = timer("construct", lambda: NoteUtil(config_file))
+    pairs = noteutil.pairs
+    terms = [rng.choice(pairs).term for _ in range(queries)]
+
+    for option in COMPARE_OPTIONS:
+        compare = getattr(CompareOptions, option)
+        timer("get " + option, lambda: [noteutil.get(term=term, compare=compare) for term in terms])
+        timer("get_list " + option, lambda: [noteutil.get_list(term=term, compare=compare) for term in terms])
+
+    def edit():
+        for i in range(edits):
+            nindex = rng.randrange(len(noteutil.notes))
+            if not noteutil.notes[nindex].is_heading():
+                noteutil.edit(nindex, "Edited note {0}".format(i))
+
+    def insert():
+        for i in range(edits):
+            noteutil.make_note("Inserted note {0}".format(i), rng.randrange(len(noteutil.notes)))
+
+    def delete():
+        for _ in range(edits):
+            nindex = rng.randrange(len(noteutil.notes))
+            if not noteutil.notes[nindex].is_heading():
+                noteutil.delete(nindex)
+
+    timer("edit", edit)
+    timer("insert", insert)
+    timer("delete", delete)
+    timer("save", noteutil.save)
+    timer("load", noteutil.load)
+
+    quiz = timer("Quiz", lambda: Quiz(noteutil, random.Random(seed)))
+    for pair in quiz.noteutil.pairs[::3]:
+        quiz.append(pair, correct=rng.random() < 0.5)
+    timer("Quiz.generate", lambda: list(quiz.generate(randomize=True)))
+    timer("Quiz.save", quiz.save)
+    timer("Quiz.load", quiz.load)
+    timer("Quiz.refresh", lambda: quiz.refresh(noteutil))
+
+    leitner = timer("Leitner", lambda: Leitner(noteutil))
+    for pair in noteutil.pairs[::3]:
+        leitner.correct(pair)
+    timer("Leitner.generate", lambda: list(leitner.generate(randomize=True)))
+    timer("Leitner.save", leitner.save)
+    timer("Leitner.load", leitner.load)
+    timer("Leitner.refresh", lambda: leitner.refresh(noteutil))
+    return timer.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--memory", action="store_true", help="Also track the peak memory of each benchmark.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    print("NoteUtil with {0} notes".format(args.notes))
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(directory, args.notes, args.seed, args.queries, args.edits, args.memory)
+    if args.json:
+        with open(args.json, mode="w", encoding="utf8") as f:
+            f.write(json.dumps({"notes": args.notes, "seed": args.seed, "results": results}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
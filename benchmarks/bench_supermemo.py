@@ -0,0 +1,71 @@
+"""Simulates daily SuperMemo review sessions over a large number of pairs and measures review throughput."""
+import argparse
+import random
+import tempfile
+import time
+
+from noteutil import SuperMemo
+from .bench_leitner import make_noteutil
+
+
+class SimulatedClock:
+    """A clock that only moves when the simulation advances it."""
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--new", type=int, default=5000, help="The most new pairs studied per day.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        noteutil = make_noteutil(directory, args.pairs)
+        clock = SimulatedClock()
+        supermemo = SuperMemo(noteutil, clock)
+        seen = set()
+
+        print("SuperMemo with {0} pairs over {1} days".format(args.pairs, args.days))
+        reviews = 0
+        due_time = 0.0
+        review_time = 0.0
+        for day in range(args.days):
+            clock.time = day * SuperMemo.DAY + 1
+            start = time.perf_counter()
+            due = supermemo.due()
+            due_time += time.perf_counter() - start
+
+            new = 0
+            start = time.perf_counter()
+            for pair in due:
+                if pair.nid not in seen:
+                    if new == args.new:
+                        continue
+                    seen.add(pair.nid)
+                    new += 1
+                supermemo.review(pair, rng.choice((1, 3, 4, 4, 5, 5)))
+                reviews += 1
+            review_time += time.perf_counter() - start
+
+        print("{0:<12} {1:>10.3f} s".format("due", due_time))
+        print("{0:<12} {1:>10.3f} s".format("review", review_time))
+        print("{0:<12} {1:>10.0f} reviews/s".format("throughput", reviews / review_time))
+
+        start = time.perf_counter()
+        supermemo.save()
+        print("{0:<12} {1:>10.3f} s".format("save", time.perf_counter() - start))
+        start = time.perf_counter()
+        supermemo.load()
+        print("{0:<12} {1:>10.3f} s".format("load", time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Generates a seeded synthetic notebook (a config file and a note file) for benchmarking NoteUtil."""
+import argparse
+import os
+import random
+
+
+CONFIG = """#| Synthetic notebook generated by benchmarks.generate
+{note_file}
+//
+`
+~
+#
+3
+Chapter
+Section
+Topic
+2
+Important
+Dates
+!
+$
+2
+Example
+Aside
+{{ }}
+[ ]
+"""
+
+
+def generate(directory: str, notes: int, seed: int = 0, headings: float = 0.05, blocks: float = 0.02,
+             pairs: float = 0.5, categories: float = 0.1, extensions: float = 0.2, comments: float = 0.02,
+             irregular: float = 0.0) -> str:
+    """Writes a config file and a note file with the given number of Notes into the directory.
+
+    Unless irregular is given, the Notes never have errors: terms and heading names are unique and heading levels
+    never jump.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to write notes.txt and config.txt into.
+    notes : int
+        The number of Notes to generate.
+    seed : int
+        The seed that makes the notebook reproducible.
+    headings, blocks, pairs : float
+        The share of Notes that are headings, multi-line blocks and pairs. The rest are plain Notes.
+    categories, extensions : float
+        The chance that a Note has a category prefix, and the chance that it has an Extension.
+    comments : float
+        The chance of a comment line before a Note, which is left out of the Notes.
+    irregular : float
+        The chance that a Note is instead pieced together at random from headings, prefixes, bounds and separators,
+        with odd spacing, reused words, missing bounds and extra separators. These often have errors.
+
+    Returns
+    -------
+    str
+        The name of the config file.
+    """
+
+    rng = random.Random(seed)
+    note_file = os.path.join(directory, "notes.txt")
+    config_file = os.path.join(directory, "config.txt")
+
+    lines = []
+    level = 0
+    for i in range(notes):
+        if rng.random() < comments:
+            lines.append("// Comment {0}".format(i))
+        if rng.random() < irregular:
+            lines.append(irregular_line(rng))
+            continue
+
+        kind = rng.random()
+        if kind < headings:
+            level = rng.randint(1, min(3, level + 1))
+            lines.append("{0} Heading {1}".format("#" * level, i))
+            continue
+
+        prefix = ""
+        if rng.random() < categories:
+            prefix = rng.choice(("!", "$", "!$"))
+        extension = ""
+        if rng.random() < extensions:
+            extension = rng.choice((" {{Example {0}}}", " [Aside {0}]")).format(i)
+
+        if kind < headings + blocks:
+            lines.append("`{0}Block {1} begins{2}".format(prefix, i, extension))
+            lines.append("and continues on a second line.`")
+        elif kind < headings + blocks + pairs:
+            lines.append("{0}Term {1} ~ Definition of term {1}.{2}".format(prefix, i, extension))
+        else:
+            lines.append("{0}Note {1} is plain text.{2}".format(prefix, i, extension))
+
+    with open(note_file, mode="w", encoding="utf8") as f:
+        f.write("\n".join(lines))
+    with open(config_file, mode="w", encoding="utf8") as f:
+        f.write(CONFIG.format(note_file=note_file))
+    return config_file
+
+
+def irregular_line(rng: random.Random) -> str:
+    """Pieces together a note line at random, which often has errors or odd spacing."""
+    if rng.random() < 0.05:
+        return rng.choice(("`w{0} block\ncontinues ~ here`", "`w{0} one line block`", " `w{0} indented\nblock` "))\
+            .format(rng.randint(0, 300))
+    parts = []
+    if rng.random() < 0.2:
+        parts.append("#" * rng.choice((1, 1, 2, 2, 3, 3, 4)) + rng.choice(("", " ")))
+    if rng.random() < 0.2:
+        parts.append("!" + rng.choice(("", " ")))
+    if rng.random() < 0.15:
+        parts.append("$ ")
+    parts.append("w{0}".format(rng.randint(0, 300)))
+    if rng.random() < 0.3:
+        parts.append(" {{ex {0}}}".format(rng.randint(0, 9)))
+    if rng.random() < 0.05:
+        parts.append(rng.choice((" {broken", " [broken", " ex}", " { [nested] }")))
+    if rng.random() < 0.2:
+        parts.append(" [aside] more")
+    if rng.random() < 0.4:
+        parts.append(" ~ " + rng.choice(("def {0}".format(rng.randint(0, 99)), "", "a ~ b")))
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory")
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.directory, args.notes, args.seed))
+
+
+if __name__ == "__main__":
+    main()
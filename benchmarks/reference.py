@@ -0,0 +1,859 @@
+"""The reference engine: NoteUtil with the original, straightforward note parsing.
+
+ReferenceNoteUtil detects every Note one line at a time, checking for duplicates by scanning the Notes made so far.
+It is slow, but it is the definition of what the optimized parser in NoteUtil must produce.
+Only the nid bookkeeping, which the rest of NoteUtil relies on, was added to it. Its make_note, edit, insert and
+delete are the original ones, so they keep neither the heading tree, the columns nor any watchers up to date.
+
+ReferenceQuiz and ReferenceLeitner are the original Quiz and Leitner, which keep their marks and boxes in plain lists
+of Notes. They are never told about edits, so whoever drives them has to take edited away Notes out of their lists
+and put new pairs into box 1.
+"""
+import copy
+import json
+import os
+import random
+from itertools import filterfalse
+from typing import Generator, Union
+
+from noteutil import Extension, Note, NoteUtil
+from noteutil.errors import *
+
+
+class ReferenceNoteUtil(NoteUtil):
+    """A NoteUtil that parses its notes with the reference engine. It is otherwise the same as NoteUtil."""
+
+    def _parse_notes(self) -> None:
+        try:
+            open(self.note_file, mode="r", encoding="utf8").close()
+        except FileNotFoundError:
+            raise NoteFileNotFound(self.note_file)
+
+        with open(self.note_file, mode="r", encoding="utf8") as f:
+            raw_notes = ""
+            for line in f.readlines():
+                # Check for comments or empty line
+                if self.comments is not None:
+                    if line.strip().startswith(self.comments):
+                        continue
+                if line.strip() == "":
+                    continue
+
+                # Passed, add it to the raw notes
+                raw_notes += line
+
+        with open(self.nu_file, mode="w", encoding="utf8") as f:
+            f.write(raw_notes)
+
+    def _read_notes(self):
+        with open(self.nu_file, mode="r", encoding="utf8") as f:
+            lines = f.read().split("\n")
+
+            index = 0
+            while index < len(lines):
+                line = lines[index]
+                if self.blocks is not None:
+                    if line.strip().startswith(self.blocks):
+                        line = line[len(self.blocks):]
+                        index += 1
+                        while index < len(lines):
+                            line += "\n" + lines[index]
+                            if lines[index].strip().endswith(self.blocks):
+                                break
+                            index += 1
+                        line = line[:-1 * len(self.blocks)]
+                if line != "":
+                    yield line.strip()
+                index += 1
+
+    def _make_notes(self) -> None:
+        for nindex, content in enumerate(self._read_notes()):
+            try:
+                note = self._make_note(content, nindex)
+                self.notes.append(note)
+            except NoteError as e:
+                self.errors.append(e.args[0])
+
+        # Headings are still missing their end_nindex:
+        self._complete_headings()
+
+    def _make_note(self, content, nindex):
+        kwargs = {}
+        # The following 3 all modify content in some way:
+        content = self._detect_headings(content, nindex, kwargs)
+        content = self._detect_categories(content, kwargs)
+        content = self._detect_extensions(content, kwargs)
+        self._detect_pairs(content, kwargs)
+
+        # Since content may have been modified, fix up heading_name
+        if kwargs.get("heading_name", False):
+            kwargs["heading_name"] = content
+        note = Note(self, content, nindex, **kwargs)
+        self._register(note)
+        return note
+
+    def _detect_headings(self, content, nindex, kwargs):
+        if self.heading_char is not None:
+            if content.startswith(self.heading_char):
+                kwargs["heading_char"] = self.heading_char
+
+                try:
+                    previous_level = self.heading_order[-1].level
+                except IndexError:
+                    previous_level = 0
+                kwargs["level"] = current_level = content.count(self.heading_char, 0, self.levels)
+                kwargs["level_name"] = self.level_names[kwargs["level"] - 1]
+                if current_level - previous_level > 1:
+                    raise HeadingJump(content, previous_level, current_level)
+                kwargs["heading"] = kwargs["heading_char"] * kwargs["level"]
+                content = content[len(kwargs["heading"]):].lstrip()
+                kwargs["heading_name"] = content
+                if kwargs["heading_name"] in self.heading_names:
+                    raise DuplicateHeading(kwargs["heading_name"])
+
+                kwargs["begin_nindex"] = nindex + 1
+        return content
+
+    def _detect_categories(self, content, kwargs):
+        if self.category_names is not None and self.category_prefixes is not None:
+            kwargs["category_names"] = []
+            kwargs["category_prefixes"] = []
+            for name, prefix in zip(self.category_names, self.category_prefixes):
+                if content.startswith(prefix):
+                    kwargs["category_names"].append(name)
+                    kwargs["category_prefixes"].append(prefix)
+                    content = content[len(prefix):].lstrip()
+        return content
+
+    def _detect_extensions(self, content, kwargs):
+        if self.extension_names is not None and self.extension_bounds is not None:
+            kwargs["extensions"] = []
+            kwargs["extension_bounds"] = []
+            kwargs["extension_names"] = []
+            for name, bounds in zip(self.extension_names, self.extension_bounds):
+                lbound, rbound = bounds
+                kwargs["extension_bounds"].append(tuple([lbound, rbound]))
+                while lbound in content:
+                    lindex = content.index(lbound) + len(lbound)
+                    if rbound in content[lindex:]:
+                        rindex = content.index(rbound, lindex)
+                        kwargs["extensions"].append(
+                            Extension(content[lindex:rindex].strip(), name, lbound, rbound))
+                        if name not in kwargs["extension_names"]:
+                            kwargs["extension_names"].append(name)
+
+                        content = content[:lindex - len(lbound)].strip() + " " + content[rindex + len(rbound):].strip()
+                    else:
+                        raise MissingBound(content, lbound, rbound)
+        return content
+
+    def _detect_pairs(self, content, kwargs):
+        if self.separator is not None:
+            if self.separator in content:  # Line is a pair, add additional parameters
+                if len(content.split(self.separator)) > 2:
+                    raise ExtraSeparator(content)
+
+                kwargs["term"] = content.split(self.separator)[0].strip()
+                if kwargs["term"] in map(lambda n: n.term, self.pairs):
+                    raise DuplicateTerm(kwargs["term"])
+
+                kwargs["definition"] = content.split(self.separator)[1].strip()
+                if kwargs["definition"] == "":
+                    raise NoDefinition(content)
+
+                kwargs["separator"] = self.separator
+
+    def make_note(self, content, nindex):
+        note = self._make_note(content, nindex)
+        note.end_nindex = note.next_heading.nindex if note.next_heading else len(self.notes)
+        self.insert(note, nindex)
+        return note
+
+    def edit(self, nindex: int, content: str) -> Note:
+        """Given a Note, edit its content.
+        This can have many side effects:
+            1. Changes to heading.
+            2. Changes to heading_name.
+            3. Changes to categories.
+            4. Changes to extensions.
+            5. Changes to whether the Note is a pair.
+            6. Changes to term, definition, and separator.
+
+        Parameters
+        ----------
+        content : str
+            The new content that the Note should have.
+        nindex : int
+            The note index of the Note you want to modify.
+
+        Returns
+        -------
+        Note
+            The modified note.
+
+        Raises
+        ------
+        NoteError
+        HeadingJump
+        MissingBound
+        ExtraSeparator
+        DuplicateTerm
+        NoDefinition
+        """
+
+        content = content.strip()
+        old_note = self.notes.pop(nindex)
+        try:
+            self.make_note(content, nindex)
+        except NoteError:
+            self.notes.insert(nindex, old_note)
+            raise
+        return self.notes[nindex]
+
+    def insert(self, note, nindex):
+        """Creates and inserts a Note at the given nindex.
+
+        Parameters
+        ----------
+        note : Note
+            The Note to insert at position nindex.
+        nindex : int
+            The note index of the Note to be inserted.
+
+        Returns
+        -------
+        None
+        """
+
+        if not 0 <= nindex <= len(self.notes):
+            raise NindexError(nindex)
+
+        self.notes.insert(nindex, note)
+        if note.previous_heading is not None and note.previous_heading.end_nindex is not None:
+            note.previous_heading.end_nindex += 1
+
+        for i in range(nindex + 1, len(self.notes)):
+            n = self.notes[i]
+            n.nindex += 1
+            if n.is_heading():
+                n.begin_nindex = n.nindex + 1
+        self._complete_headings()
+
+    def delete(self, nindex) -> None:
+        """Deletes a Note at the given nindex.
+
+        Parameters
+        ----------
+        nindex : int
+            The note index of the Note to be deleted.
+
+        Returns
+        -------
+        None
+        """
+
+        if not 0 <= nindex < len(self.notes):
+            raise NindexError(nindex)
+
+        n = self.notes[nindex]
+        if n.previous_heading is not None and n.previous_heading.end_nindex is not None:
+            n.previous_heading.end_nindex -= 1
+        del self.notes[nindex]
+
+        for i in range(nindex, len(self.notes)):
+            note = self.notes[i]
+            note.nindex -= 1
+            if note.is_heading():
+                note.begin_nindex -= 1
+        self._complete_headings()
+
+    def _complete_headings(self):
+        if self.heading_char is not None:
+            headings_by_level = list(self.level_order.values())
+            heading_order = self.heading_order
+
+            for headings in headings_by_level:
+                for i in range(len(headings)):
+                    heading = headings[i]
+                    level_index = i + 1     # The next heading index at the same level
+                    order_index = heading_order.index(heading) + 1    # The next heading index in heading order
+
+                    while order_index != len(heading_order) and \
+                            heading_order[order_index].level > heading.level:
+                        order_index += 1
+
+                    if level_index == len(headings):
+                        level_nindex = len(self.notes)
+                    else:
+                        level_nindex = headings[level_index].nindex
+
+                    if order_index == len(heading_order):
+                        order_nindex = len(self.notes)
+                    else:
+                        order_nindex = heading_order[order_index].nindex
+
+                    if level_nindex < order_nindex:
+                        end_nindex = level_nindex
+                    else:
+                        end_nindex = order_nindex
+
+                    heading.end_nindex = end_nindex
+
+
+class ReferenceQuiz:
+    """Quiz takes terms and definitions of Notes and generates them in useful sequences.
+    It keeps track of which terms were marked correct and which terms were marked incorrect.
+
+    Parameters
+    ----------
+    noteutil : NoteUtil
+        The NoteUtil that has the terms and definitions to be used with this Quiz.
+
+    Attributes
+    ----------
+    noteutil : NoteUtil
+    last_nindex : int
+        The nindex of the last Note generated.
+    correct : List[Note]
+        All Notes marked as correct.
+    incorrect : List[Note]
+        All Notes marked as incorrect.
+    unmarked : List[Note]
+        All Notes neither marked correct nor incorrect.
+    pairs : List[Note]
+        List of all Notes that are pairs that the Quiz is generating from.
+        This can either be all pairs in NoteUtil, or only pairs inside a specific heading/category.
+    division : str or Note
+        The heading/category whose pairs are being used.
+    qz_file : str
+        File name for the .qz file to save the Quiz's correct and incorrect lists.
+    """
+
+    def __init__(self, noteutil: NoteUtil):
+        self.noteutil = noteutil
+        self.last_nindex = 0
+        self.correct = list()
+        self.incorrect = list()
+
+        # Options
+        self.pairs = self.noteutil.pairs
+        self.division = "none"
+
+        # Saving
+        self.qz_file = self.noteutil.note_file.split(".")[0] + ".qz"
+        if not os.path.exists(self.qz_file):
+            open(self.qz_file, mode="w", encoding="utf8").close()
+
+    @property
+    def unmarked(self):
+        return list(filterfalse(lambda p: p in self.incorrect or p in self.correct, self.noteutil.pairs))
+
+    def generate(self, *, randomize: bool) -> Generator[Note, None, None]:
+        """A generator that yields Notes, either chronologically or randomly.
+        Quiz keeps track of the last index used, which changes every time this generator is iterated.
+
+        Parameters
+        ----------
+        randomize : bool
+            Whether to generate a random term from the list of pairs.
+
+        Yields
+        ------
+        Note
+            A pair that is either in random or chronological order.
+        """
+
+        notes = [n for n in self.pairs]
+        if randomize:
+            random.shuffle(notes)
+            while notes:
+                index = random.randint(0, len(notes) - 1)
+                note = notes.pop(index)
+                self.last_nindex = note.nindex
+                yield note
+        else:
+            index = 0
+            while index < len(notes):
+                note = notes[index]
+                self.last_nindex = note.nindex
+                yield note
+                index += 1
+
+    def append(self, pair: Note, *, correct: bool) -> None:
+        """Adds a pair to one of the correct or incorrect lists.
+        It will also remove it from the other list if it's in that one.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair to add to either the correct list or the incorrect list.
+        correct : bool
+            Whether to add to the correct list (T) or the incorrect list (F).
+
+        Returns
+        -------
+        None
+        """
+
+        if correct:
+            if pair not in self.correct:
+                self.correct.append(pair)
+            self.remove(pair, correct=False)
+        else:
+            if pair not in self.incorrect:
+                self.incorrect.append(pair)
+            self.remove(pair, correct=True)
+
+    def remove(self, pair: Note, *, correct: bool) -> None:
+        """Removes a pair from one of the correct or incorrect lists.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair to remove from either the correct list or the incorrect list.
+        correct : bool
+            Whether to remove from the correct list (T) or the incorrect list (F).
+
+        Returns
+        -------
+        None
+        """
+
+        if correct:
+            try:
+                self.correct.remove(pair)
+            except ValueError:
+                pass
+        else:
+            try:
+                self.incorrect.remove(pair)
+            except ValueError:
+                pass
+
+    def clear(self) -> None:
+        """Empties the correct and incorrect lists.
+
+        Returns
+        -------
+        None
+        """
+
+        self.correct.clear()
+        self.incorrect.clear()
+
+    def select_pairs(self, division: Union[None, str, Note]) -> None:
+        """Changes the current division and pairs to match the pairs in the given Heading/Category.
+
+        Parameters
+        ----------
+        division : Note or str
+            The Note or heading name or category name whose pairs should be used.
+            If the division name is "correct" or "incorrect", the pairs in the corresponding list will be used.
+            If the division name is "unmarked", the pairs that are not in the correct or incorrect list will be used.
+            If left as None or "none", all pairs in NoteUtil will be used.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        HeadingExpected
+            If the Note provided is not None and isn't a heading.
+        DivisionNotFound
+            If the str provided is not None and it isn't a recognized heading or category name.
+        """
+
+        if division is None:
+            self.division = "None"
+            self.pairs = self.noteutil.pairs
+            return
+
+        if isinstance(division, str):
+            if division.lower() == "none":
+                self.division = "None"
+                self.pairs = self.noteutil.pairs
+                return
+            elif division.lower() == "correct":
+                self.division = "Correct"
+                self.pairs = self.correct
+                return
+            elif division.lower() == "incorrect":
+                self.division = "Incorrect"
+                self.pairs = self.incorrect
+                return
+            elif division.lower() == "unmarked":
+                self.division = "Unmarked"
+                self.pairs = self.unmarked
+                return
+            elif division in self.noteutil.category_names:
+                self.division = division
+                self.pairs = list(filter(lambda n: n.is_pair(), self.noteutil.categories[division]))
+                return
+            elif division in self.noteutil.heading_names:
+                division = self.noteutil.get(heading_name=division)
+        if isinstance(division, Note):
+            if not division.is_heading():
+                raise HeadingExpected(division)
+            self.division = division
+            self.pairs = list(filter(lambda n: n.is_pair(),
+                                     self.noteutil.notes[self.division.begin_nindex: self.division.end_nindex]))
+        else:
+            raise DivisionNotFound(division)
+
+    def save(self) -> None:
+        """Writes correct and incorrect terms to a .qz file.
+
+        Returns
+        -------
+        None
+        """
+
+        kwargs = dict()
+        kwargs["correct"] = list(map(lambda p: p.rcontent, self.correct))
+        kwargs["incorrect"] = list(map(lambda p: p.rcontent, self.incorrect))
+        with open(self.qz_file, mode="w", encoding="utf8") as f:
+            f.write(json.dumps(kwargs))
+
+    def load(self) -> None:
+        """Loads correct and incorrect terms to a .qz file.
+
+        Returns
+        -------
+        None
+        """
+
+        self.reset()
+        kwargs = dict()
+        with open(self.qz_file, mode="r", encoding="utf8") as f:
+            try:
+                kwargs = json.loads(f.read())
+            except json.JSONDecodeError:
+                pass
+
+        for rcontent in kwargs.get("correct", []):
+            for note in self.noteutil.notes:
+                if rcontent == note.rcontent:
+                    self.append(note, correct=True)
+
+        for rcontent in kwargs.get("incorrect", []):
+            for note in self.noteutil.notes:
+                if rcontent == note.rcontent:
+                    self.append(note, correct=False)
+                    
+    def reset(self) -> None:
+        """Resets the state of the Quiz to as if it had just been initialized.
+        
+        Returns
+        -------
+        None
+        """
+        
+        self.__init__(self.noteutil)
+
+    def refresh(self, noteutil: NoteUtil) -> None:
+        """Resets the state of the Quiz to match a new NoteUtil.
+        This is the same as saving the NoteUtil and then loading it with a different NoteUtil.
+        As such, only identical Notes from both NoteUtils are kept.
+
+        Returns
+        -------
+        None
+        """
+
+        self.noteutil = noteutil
+
+        for old_note in self.correct.copy():
+            self.remove(old_note, correct=True)
+            for new_note in self.noteutil.pairs:
+                if old_note.rcontent == new_note.rcontent:
+                    self.append(new_note, correct=True)
+                    break
+
+        for old_note in self.incorrect.copy():
+            self.remove(old_note, correct=False)
+            for new_note in self.noteutil.pairs:
+                if old_note.rcontent == new_note.rcontent:
+                    self.append(new_note, correct=False)
+                    break
+
+        self.last_nindex = 0
+        self.pairs = self.noteutil.pairs
+        self.division = None
+        self.qz_file = self.noteutil.note_file.split(".")[0] + ".qz"
+
+
+class ReferenceLeitner:
+    """The Leitner system is a method of spaced repetition where cards are reviewed at increasing intervals.
+
+    If we model a pair as a flashcard (term and definition), then we can also use the Leitner system.
+    We use seven "boxes" numbered 1-7, and every time our session is divisible by the box period, we review that box.
+    Any terms that we mark as correct will advance to the next box number (+1), and incorrect ones will reset to box 1.
+
+    Parameters
+    ----------
+    noteutil : NoteUtil
+        The NoteUtil that has terms an definitions to be used in this Leitner.
+
+    Attributes
+    ----------
+    noteutil : NoteUtil
+    last_nindex : int
+        The note index of the last Note generated.
+    boxes : Dict[int, List[Note]]
+        A dictionary where each box number (key) maps to the list of Notes inside of it (value).
+    times : Dict[int, int]
+        A dictionary where each box number (key) maps to the time period before review (# of sessions) (value).
+    session : int
+        The session number that determines which boxes will be reviewed.
+    lt_file : str
+        The name of the .lt file that will save Leitner's boxes.
+    """
+
+    def __init__(self, noteutil: NoteUtil):
+        self.noteutil = noteutil
+        self.last_nindex = 0
+        self.boxes = dict(zip([x + 1 for x in range(7)], [[] for _ in range(7)]))
+        for pair in self.noteutil.pairs:
+            pair.box = 1
+            self.boxes[1].append(pair)
+
+        self.times = {1: 1, 2: 2, 3: 3, 4: 5, 5: 11, 6: 19, 7: 29}
+        self.session = 1
+
+        # Saving
+        self.lt_file = self.noteutil.note_file.split(".")[0] + ".lt"
+        if not os.path.exists(self.lt_file):
+            open(self.lt_file, mode="w", encoding="utf8").close()
+
+    def generate(self, *, randomize: bool) -> Generator[Note, None, None]:
+        """A generator that yields Notes according to the session number.
+        If the session number is divisible by the time on a box, then we review that box.
+
+        Yields
+        ------
+        Note
+            A randomly selected pair from all of the pairs we are reviewing in this session.
+        """
+
+        pairs = []
+        for number, box in self.boxes.items():
+            if self.session % self.times[number] == 0:
+                pairs.extend(self.boxes[number])
+
+        if randomize:
+            random.shuffle(pairs)
+        for pair in pairs:
+            self.last_nindex = pair.nindex
+            yield pair
+        self.session += 1
+
+    def correct(self, pair: Note) -> None:
+        """Handles the pair if it was answered correctly.
+        Removes it from its current box and then moves it to the next box.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair that was answered correctly.
+
+        Returns
+        -------
+        None
+        """
+
+        if pair.box != len(self.boxes):
+            self.boxes[pair.box].remove(pair)
+            self.boxes[pair.box + 1].append(pair)
+            pair.box += 1
+
+    def incorrect(self, pair: Note) -> None:
+        """Handles the pair if it was answered correctly.
+        Removes it from its current box and then moves it to the next box.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair that was answered incorrectly.
+
+        Returns
+        -------
+        None
+        """
+
+        if pair.box != 0:
+            self.boxes[pair.box].remove(pair)
+            self.boxes[1].append(pair)
+            pair.box = 1
+
+    def append_box(self, time: int) -> None:
+        """Adds an additional box to store pairs in.
+
+        Parameters
+        ----------
+        time : int
+            The time period for the box to be added.
+            Must be greater than the time period of the last box before this one.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        TimeTooShort
+            If the time given is shorter than the current longest time period.
+        """
+
+        if time <= self.times[len(self.times)]:
+            raise TimeTooShort(self.times[len(self.boxes)])
+
+        self.boxes[len(self.boxes) + 1] = []
+        self.times[len(self.times) + 1] = time
+
+    def pop_box(self):
+        """Pops the last box and moves the lost pairs to the box before the one just popped.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        LastBox
+            If the number of boxes is equal to 1.
+        """
+
+        if len(self.boxes) == 1:
+            raise LastBox
+
+        pairs = self.boxes.pop(len(self.boxes))
+        for pair in pairs:
+            pair.box -= 1
+        self.times.pop(len(self.times))
+        self.boxes[len(self.boxes)].extend(pairs)
+
+    def edit_box(self, box: int, time: int) -> None:
+        """Modifies the box and changes its time.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        TimeTooShort
+        TimeTooLong
+        """
+
+        if box not in self.times:
+            raise BoxNumberError(box)
+
+        prev_time = 1
+        next_time = float("inf")
+        if box - 1 in self.times:
+            prev_time = self.times[box - 1]
+        if box + 1 in self.times:
+            next_time = self.times[box + 1]
+
+        if time < prev_time:
+            raise TimeTooShort(time)
+        elif time > next_time:
+            raise TimeTooLong(time)
+        else:
+            self.times[box] = time
+
+    def save(self) -> None:
+        """Writes Leitner state to a .lt file.
+
+        Returns
+        -------
+        None
+        """
+
+        kwargs = dict()
+        boxes = {}
+        for box_number, pairs in self.boxes.items():
+            boxes[box_number] = list(map(lambda p: p.rcontent, pairs))
+
+        kwargs["boxes"] = boxes
+        kwargs["times"] = self.times
+        kwargs["session"] = self.session
+
+        with open(self.lt_file, mode="w", encoding="utf8") as f:
+            f.write(json.dumps(kwargs))
+
+    def load(self) -> None:
+        """Loads a Leitner state from a .lt file.
+
+        Returns
+        -------
+        None
+        """
+
+        self.reset()
+        kwargs = dict()
+        with open(self.lt_file, mode="r", encoding="utf8") as f:
+            try:
+                kwargs = json.loads(f.read())
+            except json.JSONDecodeError:
+                pass
+
+        boxes = kwargs.get("boxes", {})
+        for box_number, rcontents in boxes.items():
+            box_number = int(box_number)
+            for rcontent in rcontents:
+                for pair in self.boxes[1].copy():
+                    if rcontent == pair.rcontent:
+                        self.boxes[1].remove(pair)
+                        pair.box = box_number
+                        self.boxes[box_number].append(pair)
+                        break
+
+        for box_number, time_period in kwargs.get("times", self.times).items():
+            self.times[int(box_number)] = int(time_period)
+        self.session = kwargs.get("session", self.session)
+
+    def reset(self) -> None:
+        """Resets the state of the Leitner to as if it had just been initialized.
+
+        Returns
+        -------
+        None
+        """
+
+        self.__init__(self.noteutil)
+
+    def refresh(self, noteutil: NoteUtil) -> None:
+        """Resets the state of the Leitner to match a new NoteUtil.
+        This is the same as saving the NoteUtil and then loading it with a different NoteUtil.
+        As such, only identical Notes from both NoteUtils are kept.
+
+        Returns
+        -------
+        None
+        """
+
+        self.noteutil = noteutil
+
+        new_pairs = copy.deepcopy(self.noteutil.pairs)
+        for box_number, pairs in zip(self.boxes.keys(), list(self.boxes.values()).copy()):
+            for _ in range(len(pairs)):
+                old_note = pairs.pop(0)
+                for new_note in new_pairs:
+                    if old_note.rcontent == new_note.rcontent:
+                        new_pairs.remove(new_note)
+                        self.boxes[box_number].append(new_note)
+                        new_note.box = box_number
+                        break
+
+        for pair in new_pairs:
+            pair.box = 1
+            self.boxes[1].append(pair)
+
+        for pairs in self.boxes.values():
+            pairs.sort(key=lambda n: n.nindex)
+
+        self.last_nindex = 0
+        self.session = 1
+        self.lt_file = self.noteutil.note_file.split(".")[0] + ".lt"
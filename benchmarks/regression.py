@@ -0,0 +1,265 @@
+"""Checks that NoteUtil still matches the reference engine and that it hasn't become slower than the stored baselines.
+
+The parity check runs randomized notebooks, and randomized edits of them, through both ReferenceNoteUtil and NoteUtil.
+After construction and after every edit, the Notes, their heading bounds and any errors must be identical.
+Random answers go through a Quiz and Leitner of each engine along the way, one of them the list-based reference
+of the other, and their correct, incorrect and unmarked pairs and their boxes must also be identical after every edit.
+The timing check runs the bench_noteutil suite and fails if any benchmark is slower than its baseline by more than
+the threshold. Baselines depend on the machine, so regenerate them with --update before comparing on a new one.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from typing import List, Tuple
+
+from noteutil import Leitner, NoteUtil, Quiz
+from noteutil.errors import NoteError
+from .bench_noteutil import run
+from .generate import generate, irregular_line
+from .reference import ReferenceLeitner, ReferenceNoteUtil, ReferenceQuiz
+
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def snapshot(noteutil: NoteUtil) -> list:
+    """Returns every public attribute of every Note, including its heading bounds and Extensions."""
+    notes = []
+    for note in noteutil.notes:
+        # The reference Leitner keeps the box of every pair on the pair itself.
+        attributes = {name: value for name, value in vars(note).items() if not name.startswith("_") and name != "box"}
+        attributes["extensions"] = [(e.content, e.name, e.lbound, e.rbound) for e in note.extensions]
+        attributes["rcontent"] = note.rcontent
+        notes.append(attributes)
+    return notes
+
+
+def study_snapshot(noteutil: NoteUtil, quiz: Quiz, leitner: Leitner) -> dict:
+    """Returns the correct, incorrect and unmarked pairs of the Quiz and the boxes of the Leitner as note indices.
+    The indices are positions in noteutil.notes, so Notes that aren't in it show up as None."""
+    positions = {id(note): i for i, note in enumerate(noteutil.notes)}
+
+    def indices(pairs):
+        return [positions.get(id(pair)) for pair in pairs]
+
+    return {
+        "correct": indices(quiz.correct),
+        "incorrect": indices(quiz.incorrect),
+        # A pair that goes back to unmarked may go anywhere in it, so only which pairs are unmarked counts.
+        "unmarked": sorted(indices(quiz.unmarked), key=lambda index: -1 if index is None else index),
+        "boxes": {number: indices(box) for number, box in leitner.boxes.items()},
+    }
+
+
+def follow(noteutil: NoteUtil, quiz: ReferenceQuiz, leitner: ReferenceLeitner) -> None:
+    """Does for the reference Quiz and Leitner what NoteUtil does for its watchers after an edit, insert or delete:
+    Notes that aren't in noteutil.notes anymore are taken out of their lists, and new pairs go at the end of box 1."""
+    present = {id(note) for note in noteutil.notes}
+    for notes in [quiz.correct, quiz.incorrect] + list(leitner.boxes.values()):
+        notes[:] = [note for note in notes if id(note) in present]
+    placed = {id(pair) for box in leitner.boxes.values() for pair in box}
+    for pair in noteutil.pairs:
+        if id(pair) not in placed:
+            pair.box = 1
+            leitner.boxes[1].append(pair)
+
+
+def answer(quiz: Quiz, leitner: Leitner, noteutil: NoteUtil, answers: tuple) -> None:
+    """Answers the pairs at the given positions in noteutil.pairs through the Quiz and Leitner."""
+    (quiz_answer, quiz_index), (leitner_answer, leitner_index) = answers
+    pairs = noteutil.pairs
+    if not pairs:
+        return
+    pair = pairs[quiz_index % len(pairs)]
+    if quiz_answer == "append correct":
+        quiz.append(pair, correct=True)
+    elif quiz_answer == "append incorrect":
+        quiz.append(pair, correct=False)
+    elif quiz_answer == "remove correct":
+        quiz.remove(pair, correct=True)
+    else:
+        quiz.remove(pair, correct=False)
+    pair = pairs[leitner_index % len(pairs)]
+    if leitner_answer == "correct":
+        leitner.correct(pair)
+    else:
+        leitner.incorrect(pair)
+
+
+def build(cls, config_file: str) -> Tuple[NoteUtil, str]:
+    """Creates a NoteUtil of the class, returning it with None, or None with the error message."""
+    try:
+        return cls(config_file), None
+    except NoteError as e:
+        return None, e.args[0]
+
+
+def apply(noteutil: NoteUtil, operation: tuple) -> str:
+    """Applies an edit, insert or delete to the NoteUtil and returns "ok" or the error that it raised."""
+    name, nindex, content = operation
+    try:
+        if name == "edit":
+            noteutil.edit(nindex, content)
+        elif name == "insert":
+            noteutil.make_note(content, nindex)
+        else:
+            noteutil.delete(nindex)
+    except NoteError as e:
+        return "{0}: {1}".format(type(e).__name__, e.args[0])
+    return "ok"
+
+
+def compare(directory: str, notes: int, seed: int, edits: int, irregular: float) -> List[str]:
+    """Runs one randomized notebook and edit sequence through the reference engine and NoteUtil.
+
+    Parameters
+    ----------
+    directory : str
+        An empty directory to generate the notebook in.
+    notes : int
+        The number of Notes in the notebook.
+    seed : int
+    edits : int
+        The number of edits, inserts and deletes to apply after construction.
+    irregular : float
+        The chance that a note line is pieced together at random. See benchmarks.generate.
+
+    Returns
+    -------
+    List[str]
+        A description of every mismatch. It is empty if the engines agree.
+    """
+
+    config_file = generate(directory, notes, seed, irregular=irregular)
+    reference, reference_error = build(ReferenceNoteUtil, config_file)
+    optimized, optimized_error = build(NoteUtil, config_file)
+    where = "seed {0}".format(seed)
+    if reference_error != optimized_error:
+        return ["{0}: construction errors differ\n{1}\n{2}".format(where, reference_error, optimized_error)]
+    if reference is None:
+        return []
+    if snapshot(reference) != snapshot(optimized):
+        return ["{0}: Notes differ after construction".format(where)]
+
+    studies = [(reference, ReferenceQuiz(reference), ReferenceLeitner(reference)),
+               (optimized, Quiz(optimized), Leitner(optimized))]
+    if study_snapshot(*studies[0]) != study_snapshot(*studies[1]):
+        return ["{0}: Quizzes or Leitners differ after construction".format(where)]
+
+    rng = random.Random(seed)
+    # Answers have their own generator, so the edits are the same as without them.
+    answer_rng = random.Random("answers {0}".format(seed))
+    for step in range(edits):
+        name = rng.choice(("edit", "insert", "delete"))
+        nindex = rng.randrange(len(reference.notes) + (name == "insert")) if reference.notes else 0
+        if name != "insert" and not reference.notes:
+            name = "insert"
+        operation = (name, nindex, irregular_line(rng))
+        reference_result = apply(reference, operation)
+        optimized_result = apply(optimized, operation)
+        if reference_result != optimized_result:
+            return ["{0}: {1} at step {2} gave\n{3}\n{4}".format(where, operation, step, reference_result,
+                                                                 optimized_result)]
+        if snapshot(reference) != snapshot(optimized):
+            return ["{0}: Notes differ after {1} at step {2}".format(where, operation, step)]
+        follow(*studies[0])
+
+        answers = ((answer_rng.choice(("append correct", "append incorrect", "remove correct", "remove incorrect")),
+                    answer_rng.randrange(1 << 16)),
+                   (answer_rng.choice(("correct", "incorrect")), answer_rng.randrange(1 << 16)))
+        for study in studies:
+            answer(study[1], study[2], study[0], answers)
+        if study_snapshot(*studies[0]) != study_snapshot(*studies[1]):
+            return ["{0}: Quizzes or Leitners differ after {1} and {2} at step {3}".format(where, operation, answers,
+                                                                                         step)]
+    return []
+
+
+def check_parity(seeds: int, notes: int, edits: int) -> List[str]:
+    """Compares the engines on the given number of seeds. Every other seed uses irregular note lines."""
+    mismatches = []
+    for seed in range(seeds):
+        with tempfile.TemporaryDirectory() as directory:
+            mismatches += compare(directory, notes, seed, edits, irregular=0.3 if seed % 2 else 0.0)
+    return mismatches
+
+
+def check_timings(notes: int, threshold: float, update: bool, repeats: int = 5, floor: float = 0.01) -> List[str]:
+    """Runs the benchmark suite and compares it against the stored baselines.
+    The fastest of several runs is kept for every benchmark, which filters out most of the noise.
+
+    Parameters
+    ----------
+    notes : int
+        The number of Notes to benchmark with. It must match the baselines.
+    threshold : float
+        How much slower than its baseline a benchmark may be, as a fraction of the baseline.
+    update : bool
+        Whether to store the results as the new baselines instead of comparing against them.
+    repeats : int
+        The number of times to run the suite.
+    floor : float
+        Benchmarks that are slower by fewer seconds than this are treated as noise.
+
+    Returns
+    -------
+    List[str]
+        A description of every regression.
+    """
+
+    results = dict()
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, result in run(directory, notes).items():
+                if name not in results or result["seconds"] < results[name]["seconds"]:
+                    results[name] = result
+    if update or not os.path.exists(BASELINES):
+        with open(BASELINES, mode="w", encoding="utf8") as f:
+            f.write(json.dumps({"notes": notes, "results": results}, indent=4))
+        return []
+
+    with open(BASELINES, mode="r", encoding="utf8") as f:
+        baselines = json.loads(f.read())
+    if baselines["notes"] != notes:
+        return ["The baselines were recorded with {0} notes, not {1}".format(baselines["notes"], notes)]
+
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines["results"].get(name)
+        if baseline is None:
+            continue
+        allowed = baseline["seconds"] * (1 + threshold)
+        if result["seconds"] > allowed and result["seconds"] - baseline["seconds"] > floor:
+            regressions.append("{0} took {1:.3f} s, more than {2:.3f} s".format(name, result["seconds"], allowed))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--notes", type=int, default=200, help="The number of notes in each parity notebook.")
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--timing-notes", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--update", action="store_true", help="Store the timings as the new baselines.")
+    parser.add_argument("--skip-timings", action="store_true")
+    args = parser.parse_args()
+
+    # Timings go first, so the parity check's garbage can't slow them down.
+    failures = []
+    if not args.skip_timings:
+        failures += check_timings(args.timing_notes, args.threshold, args.update, args.repeats)
+    mismatches = check_parity(args.seeds, args.notes, args.edits)
+    print("Parity: {0} of {1} notebooks differ".format(len(mismatches), args.seeds))
+    failures += mismatches
+    for failure in failures:
+        print("FAIL", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 from .comparisons import CompareOptions
+from .columns import NoteColumns
+from .instrumentation import Stats
 from .errors import *
+from .headings import HeadingNode
 from .notes import Note, Extension
 from .noteutil import NoteUtil
+from .notebook import Notebook
+from .structures import Division
 from .quiz import Quiz
 from .leitner import Leitner
+from .supermemo import SuperMemo
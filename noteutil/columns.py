@@ -0,0 +1,246 @@
+"""This module is for the columnar (struct-of-arrays) view of the Notes in NoteUtil."""
+from .structures import bitset, bitset_keys
+from array import array
+from typing import List, Union
+
+
+HEADING = 1
+PAIR = 2
+EXTENSION = 4
+
+
+class NoteColumns:
+    """NoteColumns stores the Notes of a NoteUtil as parallel arrays, one row per nindex.
+    Bulk filters work on whole columns: each filter is turned once into the bitset of the rows that pass it,
+    and the bitsets of several filters are ANDed together.
+    The Notes themselves stay the objects in NoteUtil.notes, which the rows map back to by nindex.
+
+    Parameters
+    ----------
+    noteutil : NoteUtil
+        The NoteUtil whose Notes are stored in the columns.
+
+    Attributes
+    ----------
+    category_names : List[str]
+        The category names in config order. Category i is bit (1 << i) of a category bitmask.
+    levels : array
+        The heading level of each row, or 0 if the row is not a heading.
+    flags : array
+        The HEADING, PAIR and EXTENSION bits of each row.
+    categories : array or List[int]
+        The category bitmask of each row.
+    nids : array
+        The nid of each row, or -1 if the Note has none.
+    offsets : array
+        The offset of each row's content in text. Row i spans text[offsets[i]:offsets[i + 1]].
+    text : str
+        The content of every row concatenated into one shared buffer.
+    """
+
+    def __init__(self, noteutil):
+        self.category_names = list(noteutil.category_names)
+        self.levels = array("B")
+        self.flags = array("B")
+        # Bitmasks only fit into a typed array when there are at most 64 categories.
+        self.categories = array("Q") if len(self.category_names) <= 64 else []
+        self.offsets = array("Q", [0])
+        self.nids = array("q")
+        # Bitsets made by nid_set, which stay valid for as long as the columns do
+        self._nid_sets = dict()
+        self._rows_by_nid = None
+        # Bitsets made by row_set for each filter, and the rows of each category that they are made from
+        self._row_sets = dict()
+        self._category_rows = {name: [] for name in self.category_names}
+
+        self._bits = {name: 1 << i for i, name in enumerate(self.category_names)}
+        contents = []
+        offset = 0
+        for row, note in enumerate(noteutil.notes):
+            flags = 0
+            if note.is_heading():
+                flags |= HEADING
+            if note.is_pair():
+                flags |= PAIR
+            if note.has_extensions():
+                flags |= EXTENSION
+            mask = 0
+            for name in note.category_names:
+                mask |= self._bits[name]
+                self._category_rows[name].append(row)
+
+            self.levels.append(note.level or 0)
+            self.flags.append(flags)
+            self.categories.append(mask)
+            self.nids.append(note.nid if note.nid is not None else -1)
+            contents.append(note.content)
+            offset += len(note.content)
+            self.offsets.append(offset)
+        self.text = "".join(contents)
+
+    def __len__(self):
+        return len(self.flags)
+
+    def content(self, row: int) -> str:
+        """Returns the content of the Note at the given row.
+
+        Parameters
+        ----------
+        row : int
+            The nindex of the Note.
+
+        Returns
+        -------
+        str
+        """
+
+        return self.text[self.offsets[row]:self.offsets[row + 1]]
+
+    def category_mask(self, *names: str) -> int:
+        """Returns the bitmask with the bits of all of the given category names set.
+
+        Parameters
+        ----------
+        names : str
+            The category names to include in the bitmask.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        KeyError
+            If a name is not a category name.
+        """
+
+        mask = 0
+        for name in names:
+            mask |= self._bits[name]
+        return mask
+
+    def _matching(self, column: array, test) -> int:
+        """Returns the bitset of the rows whose value in a column of bytes passes the test.
+        The test is run once for each of the 256 byte values, and the column is translated into the bitset's binary
+        digits all at once."""
+        if not column:
+            return 0
+        digits = bytes(ord("1") if test(value) else ord("0") for value in range(256))
+        return int(column.tobytes().translate(digits)[::-1], 2)
+
+    def row_set(self, flags: int = 0, level: Union[None, int] = None, category: Union[None, str] = None) -> int:
+        """Returns the bitset of the rows that match all of the given filters.
+        Bit i of the bitset is set if row i matches.
+
+        Parameters
+        ----------
+        flags : int
+            Bits from HEADING, PAIR and EXTENSION that must all be set.
+        level : int or None
+            The heading level that must match, if given.
+        category : str or None
+            The category name that the row must belong to, if given.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        KeyError
+            If category is not a category name.
+        """
+
+        rows = (1 << len(self)) - 1
+        if flags:
+            key = ("flags", flags)
+            if key not in self._row_sets:
+                self._row_sets[key] = self._matching(self.flags, lambda value: value & flags == flags)
+            rows &= self._row_sets[key]
+        if level is not None:
+            key = ("level", level)
+            if key not in self._row_sets:
+                self._row_sets[key] = self._matching(self.levels, lambda value: value == level)
+            rows &= self._row_sets[key]
+        if category is not None:
+            key = ("category", category)
+            if key not in self._row_sets:
+                self._row_sets[key] = bitset(self._category_rows[category])
+            rows &= self._row_sets[key]
+        return rows
+
+    def rows(self, flags: int = 0, level: Union[None, int] = None, category: Union[None, str] = None) -> List[int]:
+        """Returns the rows that match all of the given filters. See row_set.
+
+        Parameters
+        ----------
+        flags : int
+            Bits from HEADING, PAIR and EXTENSION that must all be set.
+        level : int or None
+            The heading level that must match, if given.
+        category : str or None
+            The category name that the row must belong to, if given.
+
+        Returns
+        -------
+        List[int]
+            The matching rows (nindexes) in chronological order.
+
+        Raises
+        ------
+        KeyError
+            If category is not a category name.
+        """
+
+        return list(bitset_keys(self.row_set(flags, level, category)))
+
+    def nid_set(self, flags: int = 0, category: Union[None, str] = None) -> int:
+        """Returns the bitset of the nids of the rows that match all of the given filters.
+        Bit k of the bitset is set if the Note with nid k matches. Rows without a nid are left out.
+
+        Parameters
+        ----------
+        flags : int
+            Bits from HEADING, PAIR and EXTENSION that must all be set.
+        category : str or None
+            The category name that the row must belong to, if given.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        KeyError
+            If category is not a category name.
+        """
+
+        key = (flags, category)
+        if key not in self._nid_sets:
+            nids = self.nids
+            self._nid_sets[key] = bitset(nids[row] for row in bitset_keys(self.row_set(flags, category=category))
+                                         if nids[row] >= 0)
+        return self._nid_sets[key]
+
+    def nid_rows(self, nids: int) -> List[int]:
+        """Returns the rows of the nids in a bitset. Nids without a row are left out.
+
+        Parameters
+        ----------
+        nids : int
+            A bitset of nids, like the ones returned by nid_set.
+
+        Returns
+        -------
+        List[int]
+            The rows (nindexes) in chronological order.
+        """
+
+        if self._rows_by_nid is None:
+            self._rows_by_nid = array("q", [-1]) * (max(self.nids, default=-1) + 1)
+            for row, nid in enumerate(self.nids):
+                if nid >= 0:
+                    self._rows_by_nid[nid] = row
+        rows_by_nid = self._rows_by_nid
+        rows = [rows_by_nid[nid] for nid in bitset_keys(nids) if nid < len(rows_by_nid)]
+        return sorted(row for row in rows if row >= 0)
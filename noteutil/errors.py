@@ -69,6 +69,11 @@ class MissingBound(NoteError):
             lbound, rbound, content))
 
 
+class ReadOnly(NoteUtilError):
+    def __init__(self, file_name):
+        super().__init__("The file: {0} can't be written to, because it was opened read-only".format(file_name))
+
+
 class NindexError(NoteUtilError, IndexError):
     def __init__(self, nindex):
         super().__init__("The nindex was out of bounds: {0}".format(nindex))
@@ -115,3 +120,13 @@ class LastBox(LeitnerError):
     def __init__(self):
         super().__init__("The number of boxes are not allowed to be less than 1.")
 
+
+class SuperMemoError(Exception):
+    """Superclass for all SuperMemo exceptions."""
+
+    pass
+
+
+class QualityError(SuperMemoError, ValueError):
+    def __init__(self, quality):
+        super().__init__("The quality of a review must be between 0 and 5: {0}".format(quality))
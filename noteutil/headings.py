@@ -0,0 +1,106 @@
+"""This module is for the heading tree of NoteUtil, which counts the Notes under every heading."""
+from typing import Iterator, List
+
+
+class HeadingNode:
+    """HeadingNode is a heading in the heading tree of a NoteUtil, with counts of the Notes under it.
+    The Notes under a heading are the ones from its begin_nindex to its end_nindex, subheadings included.
+    The root of the tree has no heading and is over every Note, so its counts are those of the whole NoteUtil.
+
+    The counts are kept up to date by NoteUtil as Notes are edited, inserted and deleted,
+    so reading them never goes over the Notes again.
+
+    Parameters
+    ----------
+    heading : Note or None
+        The heading, or None for the root.
+    parent : HeadingNode or None
+        The node of the closest heading above this one, or None for the root.
+
+    Attributes
+    ----------
+    heading : Note or None
+    parent : HeadingNode or None
+    children : List[HeadingNode]
+        The nodes of the headings directly under this one, in chronological order.
+    notes : int
+        The number of Notes under the heading.
+    pairs : int
+        The number of those Notes that are pairs.
+    extensions : int
+        The number of those Notes that have Extensions.
+    categories : Dict[str, int]
+        Mapped category names to the number of those Notes in the category. Categories without any are left out.
+    nids : int
+        The bitset of the nids of those Notes: bit k is set if the Note with nid k is under the heading.
+    """
+
+    __slots__ = ("heading", "parent", "children", "notes", "pairs", "extensions", "categories", "nids")
+
+    def __init__(self, heading, parent):
+        self.heading = heading
+        self.parent = parent
+        self.children = []
+        self.notes = 0
+        self.pairs = 0
+        self.extensions = 0
+        self.categories = dict()
+        self.nids = 0
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self):
+        name = self.heading.heading_name if self.heading is not None else None
+        return "HeadingNode({0!r}, notes={1}, pairs={2})".format(name, self.notes, self.pairs)
+
+    @property
+    def level(self) -> int:
+        """The level of the heading, which is 0 for the root."""
+        return self.heading.level if self.heading is not None else 0
+
+    def walk(self) -> Iterator["HeadingNode"]:
+        """Yields this node and every node under it, in chronological order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def ancestry(self) -> List["HeadingNode"]:
+        """Returns this node and the node of every heading above it, up to and including the root."""
+        nodes = []
+        node = self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        return nodes
+
+    def count(self, note, amount: int = 1) -> None:
+        """Adds the amount to every count that the Note belongs to. A negative amount takes it away.
+        The bit of the Note in nids is set for a positive amount and cleared for a negative one."""
+        if note.nid is not None:
+            self.nids = self.nids | 1 << note.nid if amount > 0 else self.nids & ~(1 << note.nid)
+        self._count(note, amount)
+
+    def _count(self, note, amount: int) -> None:
+        self.notes += amount
+        if note.is_pair():
+            self.pairs += amount
+        if note.has_extensions():
+            self.extensions += amount
+        for name in note.category_names:
+            count = self.categories.get(name, 0) + amount
+            if count:
+                self.categories[name] = count
+            else:
+                del self.categories[name]
+
+    def _absorb(self, child: "HeadingNode") -> None:
+        """Adds the counts of a child to this node's, once the child's are complete."""
+        self.notes += child.notes
+        self.pairs += child.pairs
+        self.extensions += child.extensions
+        self.nids |= child.nids
+        for name, count in child.categories.items():
+            self.categories[name] = self.categories.get(name, 0) + count
+
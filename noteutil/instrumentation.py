@@ -0,0 +1,159 @@
+"""This module is for timing and counting what NoteUtil spends its time on."""
+import functools
+import threading
+import time
+from typing import Dict, Iterable, Iterator
+
+
+class _Timer:
+    __slots__ = ("_stats", "_name", "_start")
+
+    def __init__(self, stats, name: str):
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stats.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Stats:
+    """A registry of timers and counters.
+
+    Timers are context managers that add up how long their block took and how often it ran.
+    Counters are added to with count. Both are created the first time they are used.
+
+    Attributes
+    ----------
+    enabled : bool
+        Always True, and False for NullStats.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = dict()
+        self._counters = dict()
+
+    def timer(self, name: str) -> _Timer:
+        """Returns a context manager that records how long its block takes under the name.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        ContextManager
+        """
+
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Records one run of the timer with the name that took the given number of seconds."""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Adds the amount to the counter with the name."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def seconds(self, name: str) -> float:
+        """Returns the total number of seconds recorded by the timer with the name."""
+        timer = self._timers.get(name)
+        return timer[1] if timer is not None else 0.0
+
+    def counter(self, name: str) -> int:
+        """Returns the value of the counter with the name."""
+        return self._counters.get(name, 0)
+
+    def clear(self) -> None:
+        """Forgets every timer and counter."""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    def as_dict(self) -> Dict[str, dict]:
+        """Returns every timer and counter.
+
+        Returns
+        -------
+        Dict[str, dict]
+            "timers" maps each timer name to its calls, total seconds, mean seconds and max seconds.
+            "counters" maps each counter name to its value.
+        """
+
+        with self._lock:
+            timers = {name: {"calls": calls, "seconds": seconds, "mean": seconds / calls, "max": longest}
+                      for name, (calls, seconds, longest) in self._timers.items()}
+            return {"timers": timers, "counters": dict(self._counters)}
+
+
+class NullStats(Stats):
+    """Stats that records nothing, used when instrumentation is off. Its timers and counters cost next to nothing."""
+
+    enabled = False
+    _NULL_TIMER = _NullTimer()
+
+    def timer(self, name: str) -> _NullTimer:
+        return self._NULL_TIMER
+
+    def record(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+
+def timed_iter(stats: Stats, name: str, iterable: Iterable) -> Iterator:
+    """Yields the items of the iterable, recording the time spent producing them under the name once it runs out.
+    The time spent by the consumer between items isn't counted, and nothing is held on to."""
+    iterator = iter(iterable)
+    seconds = 0.0
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            seconds += time.perf_counter() - start
+            break
+        seconds += time.perf_counter() - start
+        yield item
+    stats.record(name, seconds)
+
+
+def timed(name: str):
+    """Times every call of the method under the name, in the stats of the object that the method belongs to.
+    If the stats are disabled, the method is called straight away."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stats = self.stats
+            if not stats.enabled:
+                return method(self, *args, **kwargs)
+            with stats.timer(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,9 +1,10 @@
 from .errors import *
 from .notes import Note
 from .noteutil import NoteUtil
+from .structures import Buckets, BucketView
+import heapq
 import random
-import copy
-from typing import Generator
+from typing import Dict, Generator, List
 import os
 import json
 
@@ -19,14 +20,15 @@ class Leitner:
     ----------
     noteutil : NoteUtil
         The NoteUtil that has terms an definitions to be used in this Leitner.
+        If it is read-only, so is the Leitner: no .lt file is created and save raises ReadOnly.
 
     Attributes
     ----------
     noteutil : NoteUtil
     last_nindex : int
         The note index of the last Note generated.
-    boxes : Dict[int, List[Note]]
-        A dictionary where each box number (key) maps to the list of Notes inside of it (value).
+    boxes : Dict[int, BucketView]
+        A dictionary where each box number (key) maps to a view of the Notes inside of it (value).
     times : Dict[int, int]
         A dictionary where each box number (key) maps to the time period before review (# of sessions) (value).
     session : int
@@ -38,19 +40,78 @@ class Leitner:
     def __init__(self, noteutil: NoteUtil):
         self.noteutil = noteutil
         self.last_nindex = 0
-        self.boxes = dict(zip([x + 1 for x in range(7)], [[] for _ in range(7)]))
+        # Box numbers are kept in arrays indexed by nid and never on the Notes,
+        # so any number of Leitners can share one NoteUtil.
+        self._boxes = Buckets()
+        self.boxes = {number: BucketView(self._boxes, number, self.noteutil) for number in range(1, 8)}
         for pair in self.noteutil.pairs:
-            pair.box = 1
-            self.boxes[1].append(pair)
+            self._place(pair, 1)
+        self.noteutil._watch(self)
 
         self.times = {1: 1, 2: 2, 3: 3, 4: 5, 5: 11, 6: 19, 7: 29}
         self.session = 1
+        self._schedule()
 
         # Saving
-        self.lt_file = self.noteutil.note_file.split(".")[0] + ".lt"
-        if not os.path.exists(self.lt_file):
+        self.lt_file = os.path.splitext(self.noteutil.note_file)[0] + ".lt"
+        if not self.noteutil.read_only and not os.path.exists(self.lt_file):
             open(self.lt_file, mode="w", encoding="utf8").close()
 
+    def box_of(self, pair: Note) -> int:
+        """Returns the number of the box that the pair is in.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair to look up.
+
+        Returns
+        -------
+        int
+            The box number, or 0 if the pair isn't in any box.
+        """
+
+        if pair.nid is not None and self.noteutil.note_by_nid(pair.nid) is pair:
+            return self._boxes.bucket(pair.nid)
+        return 0
+
+    def _note_added(self, note: Note) -> None:
+        """Puts a pair that was just added to the NoteUtil at the end of box 1."""
+        if note.is_pair() and note.nid is not None and self._boxes.bucket(note.nid) == Buckets.NONE:
+            self._place(note, 1)
+
+    def _note_removed(self, note: Note) -> None:
+        """Takes a pair that was edited away or deleted from the NoteUtil out of its box."""
+        if note.nid is not None:
+            self._boxes.discard(note.nid)
+
+    def _notes_reloaded(self, noteutil: NoteUtil, nids: Dict[int, int]) -> None:
+        """Keeps every pair in its box after load or refresh made the Notes again, and puts new pairs in box 1."""
+        self._boxes.remap(nids)
+        for pair in self.noteutil.pairs:
+            self._note_added(pair)
+
+    def _place(self, pair: Note, box_number: int) -> None:
+        """Moves the pair to the end of a box."""
+        self._boxes.add(pair.nid, box_number)
+
+    def _schedule(self) -> None:
+        """Rebuilds the queue of (next due session, box number) from the current session and times."""
+        self._due = [(-(-self.session // time) * time, number) for number, time in self.times.items()]
+        heapq.heapify(self._due)
+        self._scheduled = (self.session, dict(self.times))
+
+    def _pop_due(self) -> List[int]:
+        """Pops the numbers of the boxes that are due this session and queues their next review."""
+        if self._scheduled != (self.session, self.times):
+            self._schedule()
+        numbers = []
+        while self._due and self._due[0][0] <= self.session:
+            numbers.append(heapq.heappop(self._due)[1])
+        for number in numbers:
+            heapq.heappush(self._due, (self.session + self.times[number], number))
+        return sorted(numbers)
+
     def generate(self, *, randomize: bool) -> Generator[Note, None, None]:
         """A generator that yields Notes according to the session number.
         If the session number is divisible by the time on a box, then we review that box.
@@ -61,17 +122,47 @@ class Leitner:
             A randomly selected pair from all of the pairs we are reviewing in this session.
         """
 
-        pairs = []
-        for number, box in self.boxes.items():
-            if self.session % self.times[number] == 0:
-                pairs.extend(self.boxes[number])
+        numbers = self._pop_due()
+        times = self._scheduled[1]
+        # If this generator isn't finished, the queue has to be rebuilt for the unfinished session.
+        self._scheduled = None
 
+        # Pairs move between boxes while they are answered, so the due boxes are copied before yielding.
+        boxes = [list(self.boxes[number]) for number in numbers]
         if randomize:
+            pairs = [pair for box in boxes for pair in box]
             random.shuffle(pairs)
-        for pair in pairs:
-            self.last_nindex = pair.nindex
-            yield pair
+            boxes = [pairs]
+        for box in boxes:
+            for pair in box:
+                self.last_nindex = pair.nindex
+                yield pair
         self.session += 1
+        self._scheduled = (self.session, times)
+
+    def preview(self, *, sessions: int) -> Dict[int, int]:
+        """Forecasts how many pairs will be reviewed in each of the upcoming sessions.
+        The forecast assumes that the boxes keep their current pairs.
+
+        Parameters
+        ----------
+        sessions : int
+            The number of sessions to forecast, starting with the current session.
+
+        Returns
+        -------
+        Dict[int, int]
+            A dictionary where each session number (key) maps to the number of pairs due in it (value).
+        """
+
+        end = self.session + sessions
+        workload = dict.fromkeys(range(self.session, end), 0)
+        for number, time in self.times.items():
+            size = len(self.boxes[number])
+            if size:
+                for session in range(-(-self.session // time) * time, end, time):
+                    workload[session] += size
+        return workload
 
     def correct(self, pair: Note) -> None:
         """Handles the pair if it was answered correctly.
@@ -87,10 +178,9 @@ class Leitner:
         None
         """
 
-        if pair.box != len(self.boxes):
-            self.boxes[pair.box].remove(pair)
-            self.boxes[pair.box + 1].append(pair)
-            pair.box += 1
+        box_number = self.box_of(pair)
+        if box_number != 0 and box_number != len(self.boxes):
+            self._place(pair, box_number + 1)
 
     def incorrect(self, pair: Note) -> None:
         """Handles the pair if it was answered correctly.
@@ -106,10 +196,9 @@ class Leitner:
         None
         """
 
-        if pair.box != 0:
-            self.boxes[pair.box].remove(pair)
-            self.boxes[1].append(pair)
-            pair.box = 1
+        box_number = self.box_of(pair)
+        if box_number != 0:
+            self._place(pair, 1)
 
     def append_box(self, time: int) -> None:
         """Adds an additional box to store pairs in.
@@ -133,7 +222,7 @@ class Leitner:
         if time <= self.times[len(self.times)]:
             raise TimeTooShort(self.times[len(self.boxes)])
 
-        self.boxes[len(self.boxes) + 1] = []
+        self.boxes[len(self.boxes) + 1] = BucketView(self._boxes, len(self.boxes) + 1, self.noteutil)
         self.times[len(self.times) + 1] = time
 
     def pop_box(self):
@@ -152,11 +241,10 @@ class Leitner:
         if len(self.boxes) == 1:
             raise LastBox
 
-        pairs = self.boxes.pop(len(self.boxes))
-        for pair in pairs:
-            pair.box -= 1
+        pairs = list(self.boxes.pop(len(self.boxes)))
         self.times.pop(len(self.times))
-        self.boxes[len(self.boxes)].extend(pairs)
+        for pair in pairs:
+            self._place(pair, len(self.boxes))
 
     def edit_box(self, box: int, time: int) -> None:
         """Modifies the box and changes its time.
@@ -194,8 +282,15 @@ class Leitner:
         Returns
         -------
         None
+
+        Raises
+        ------
+        ReadOnly
+            If the NoteUtil is read-only.
         """
 
+        if self.noteutil.read_only:
+            raise ReadOnly(self.lt_file)
         kwargs = dict()
         boxes = {}
         for box_number, pairs in self.boxes.items():
@@ -210,6 +305,8 @@ class Leitner:
 
     def load(self) -> None:
         """Loads a Leitner state from a .lt file.
+        Boxes that were appended before saving are appended again, and pairs saved in a box past the last one are
+        put in the last box.
 
         Returns
         -------
@@ -218,26 +315,43 @@ class Leitner:
 
         self.reset()
         kwargs = dict()
-        with open(self.lt_file, mode="r", encoding="utf8") as f:
+        # A NoteUtil made by from_strings or from_iterable has no files, so nothing was ever saved for it.
+        if self.noteutil._config_text is None:
             try:
-                kwargs = json.loads(f.read())
-            except json.JSONDecodeError:
-                pass
+                with open(self.lt_file, mode="r", encoding="utf8") as f:
+                    try:
+                        kwargs = json.loads(f.read())
+                    except json.JSONDecodeError:
+                        pass
+            except FileNotFoundError:
+                # A read-only NoteUtil doesn't make the empty file, so there may be nothing saved to load.
+                if not self.noteutil.read_only:
+                    raise
 
+        for box_number, time_period in kwargs.get("times", self.times).items():
+            self.times[int(box_number)] = int(time_period)
+        self.session = kwargs.get("session", self.session)
+        # Boxes that were appended before saving are appended again.
+        for box_number in sorted(self.times):
+            if box_number not in self.boxes:
+                self.boxes[box_number] = BucketView(self._boxes, box_number, self.noteutil)
+
+        # After the reset every pair is in box 1; pairs that aren't in the save stay there in their original order.
+        unplaced = {pair.rcontent: pair for pair in self.boxes[1]}
+        loaded = []
         boxes = kwargs.get("boxes", {})
         for box_number, rcontents in boxes.items():
-            box_number = int(box_number)
+            # Pairs saved in a box past the last one are kept in the last box rather than lost.
+            box_number = min(int(box_number), len(self.boxes))
             for rcontent in rcontents:
-                for pair in self.boxes[1].copy():
-                    if rcontent == pair.rcontent:
-                        self.boxes[1].remove(pair)
-                        pair.box = box_number
-                        self.boxes[box_number].append(pair)
-                        break
+                pair = unplaced.pop(rcontent, None)
+                if pair is not None:
+                    loaded.append((pair, box_number))
 
-        for box_number, time_period in kwargs.get("times", self.times).items():
-            self.times[int(box_number)] = int(time_period)
-        self.session = kwargs.get("session", self.session)
+        for pair in unplaced.values():
+            self._place(pair, 1)
+        for pair, box_number in loaded:
+            self._place(pair, box_number)
 
     def reset(self) -> None:
         """Resets the state of the Leitner to as if it had just been initialized.
@@ -259,27 +373,27 @@ class Leitner:
         None
         """
 
+        # Notes hash and compare by rcontent, so an old Note pops the new Note with identical rcontent.
+        new_pairs = {pair: pair for pair in noteutil.pairs}
+        boxes = {box_number: [] for box_number in self.boxes}
+        for box_number, pairs in self.boxes.items():
+            for old_note in pairs:
+                new_note = new_pairs.pop(old_note, None)
+                if new_note is not None:
+                    boxes[box_number].append(new_note)
+        boxes[1].extend(new_pairs.values())
+
+        # The new NoteUtil has its own nids, so every box number is recorded again.
+        self.noteutil._unwatch(self)
         self.noteutil = noteutil
-
-        new_pairs = copy.deepcopy(self.noteutil.pairs)
-        for box_number, pairs in zip(self.boxes.keys(), list(self.boxes.values()).copy()):
-            for _ in range(len(pairs)):
-                old_note = pairs.pop(0)
-                for new_note in new_pairs:
-                    if old_note.rcontent == new_note.rcontent:
-                        new_pairs.remove(new_note)
-                        self.boxes[box_number].append(new_note)
-                        new_note.box = box_number
-                        break
-
-        for pair in new_pairs:
-            pair.box = 1
-            self.boxes[1].append(pair)
-
-        for pairs in self.boxes.values():
-            pairs.sort(key=lambda n: n.nindex)
+        self.noteutil._watch(self)
+        self._boxes = Buckets()
+        for box_number, pairs in boxes.items():
+            self.boxes[box_number] = BucketView(self._boxes, box_number, self.noteutil)
+            for pair in sorted(pairs, key=lambda n: n.nindex):
+                self._place(pair, box_number)
 
         self.last_nindex = 0
         self.session = 1
-        self.lt_file = self.noteutil.note_file.split(".")[0] + ".lt"
+        self.lt_file = os.path.splitext(self.noteutil.note_file)[0] + ".lt"
 
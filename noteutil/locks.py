@@ -0,0 +1,128 @@
+"""This module is for the locks that let a NoteUtil be read from and edited by several threads."""
+from contextlib import contextmanager, nullcontext
+import functools
+import threading
+
+
+class RWLock:
+    """A reader/writer lock: any number of threads may read at once, but a writer has the lock to itself.
+
+    Both sides are reentrant within a thread, and a thread that holds the write lock may also read.
+    Waiting writers are preferred, so a steady stream of readers can't starve an edit.
+    A thread that only holds the read lock can't upgrade it to the write lock, since two such threads would deadlock.
+
+    Attributes
+    ----------
+    enabled : bool
+        Always True, and False for NullLock.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = dict()
+        self._writer = None
+        self._writes = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            # Reentrant reads must not wait behind a waiting writer, or the thread would deadlock with it.
+            if me not in self._readers and self._writer != me:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            depth = self._readers.get(me, 0)
+            if depth == 0:
+                raise RuntimeError("release_read() called without holding the read lock")
+            if depth == 1:
+                del self._readers[me]
+                if not self._readers:
+                    self._condition.notify_all()
+            else:
+                self._readers[me] = depth - 1
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writes += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("A read lock can't be upgraded to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writes = 1
+
+    def release_write(self) -> None:
+        with self._condition:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write() called without holding the write lock")
+            self._writes -= 1
+            if self._writes == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class NullLock:
+    """Stands in for RWLock when a NoteUtil is only used by one thread, so locking costs next to nothing.
+    reads and writes don't take it at all."""
+
+    enabled = False
+
+    def read(self):
+        return nullcontext()
+
+    def write(self):
+        return nullcontext()
+
+
+def reads(method):
+    """Runs the method with the read lock of its NoteUtil held, or just runs it if the NoteUtil isn't concurrent."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        lock = self._lock
+        if not lock.enabled:
+            return method(self, *args, **kwargs)
+        with lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writes(method):
+    """Runs the method with the write lock of its NoteUtil held, or just runs it if the NoteUtil isn't concurrent."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        lock = self._lock
+        if not lock.enabled:
+            return method(self, *args, **kwargs)
+        with lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,249 @@
+from .errors import *
+from .notes import Note
+from .noteutil import NoteUtil
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os.path
+import threading
+from typing import Dict, Generator, List, Tuple
+
+
+class Notebook:
+    """A Notebook is a group of note files that share one config file and are read as one sequence of Notes.
+
+    Each note file gets its own NoteUtil, which is only created the first time one of its Notes is needed.
+    The Notes of the Notebook are the Notes of every file in the order of the sorted file names.
+
+    Parameters
+    ----------
+    config_file : str
+        The name of the config file that is used to set up the NoteUtil of every note file.
+        The note file in the config file is ignored.
+    files : str
+        A directory, in which case every .txt file inside of it is used, or a glob pattern of note files.
+    refresh : bool
+        Whether to parse the note files again instead of reusing their .nu files.
+    workers : int, optional
+        The number of threads that load note files at the same time in load. Defaults to one per processor.
+    read_only : bool
+        Whether the NoteUtils never write any files. See NoteUtil.
+
+    Attributes
+    ----------
+    config_file : str
+    note_files : List[str]
+        The note files in the Notebook, sorted by name.
+    noteutils : Dict[str, NoteUtil]
+        The NoteUtils of the note files that have been loaded so far, by note file.
+    notes : List[Note]
+        All Notes of all note files.
+    pairs : List[Note]
+        All Notes of all note files that have terms and definitions.
+    terms : Dict[str, List[Note]]
+        Mapped terms to the pairs that have them, across the note files that have been loaded so far.
+        Call load first to index every note file.
+    headings : Dict[str, List[Note]]
+        Mapped heading names to the headings that have them, across the note files that have been loaded so far.
+
+    Raises
+    ------
+    NoteFileNotFound
+        If no note files match.
+    """
+
+    def __init__(self, config_file: str, files: str, refresh: bool = True, workers: int = None,
+                 read_only: bool = False):
+        self.config_file = config_file
+        self.refresh = refresh
+        self.workers = workers
+        self.read_only = read_only
+        pattern = os.path.join(files, "*.txt") if os.path.isdir(files) else files
+        self.note_files = sorted(os.path.normpath(file) for file in glob.glob(pattern))
+        if not self.note_files:
+            raise NoteFileNotFound(pattern)
+
+        self.noteutils = dict()
+        self._locks = {note_file: threading.Lock() for note_file in self.note_files}
+        # The terms and headings of each loaded note file, which are merged in file order into _terms and _headings.
+        # The index of a note file is made when it's loaded, and again on the next use after one of its Notes changes.
+        self._indexes = dict()
+        self._merged = []
+        self._terms = dict()
+        self._headings = dict()
+        self._index_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.note_files)
+
+    def __iter__(self) -> Generator[Note, None, None]:
+        """Yields every Note in order, loading each note file only when its Notes are reached."""
+        for note_file in self.note_files:
+            yield from self.noteutil(note_file).notes
+
+    @property
+    def notes(self) -> List[Note]:
+        return list(self)
+
+    @property
+    def pairs(self) -> List[Note]:
+        return list(filter(lambda n: n.is_pair(), self))
+
+    @property
+    def terms(self) -> Dict[str, List[Note]]:
+        self._merge()
+        return self._terms
+
+    @property
+    def headings(self) -> Dict[str, List[Note]]:
+        self._merge()
+        return self._headings
+
+    @staticmethod
+    def _index(noteutil: NoteUtil) -> Tuple[Dict[str, List[Note]], Dict[str, List[Note]]]:
+        """Returns the terms and headings of one note file."""
+        terms = dict()
+        headings = dict()
+        for note in noteutil.notes:
+            if note.is_pair():
+                terms.setdefault(note.term, []).append(note)
+            if note.is_heading():
+                headings.setdefault(note.heading_name, []).append(note)
+        return terms, headings
+
+    def _merge(self) -> None:
+        """Merges the indexes of the loaded note files that aren't merged yet into _terms and _headings.
+        Files are merged in order, so if an earlier file was loaded or changed since, everything is merged again."""
+        with self._index_lock:
+            loaded = [note_file for note_file in self.note_files if note_file in self._indexes]
+            if loaded[:len(self._merged)] != self._merged:
+                self._merged = []
+                self._terms = dict()
+                self._headings = dict()
+            for note_file in loaded[len(self._merged):]:
+                if self._indexes[note_file] is None:
+                    self._indexes[note_file] = self._index(self.noteutils[note_file])
+                terms, headings = self._indexes[note_file]
+                for term, pairs in terms.items():
+                    self._terms.setdefault(term, []).extend(pairs)
+                for heading_name, notes in headings.items():
+                    self._headings.setdefault(heading_name, []).extend(notes)
+                self._merged.append(note_file)
+
+    def _note_added(self, note: Note) -> None:
+        """Has the note file of a Note that was just added indexed again."""
+        self._reindex(note._noteutil)
+
+    def _note_removed(self, note: Note) -> None:
+        """Has the note file of a Note that was edited away or deleted indexed again."""
+        self._reindex(note._noteutil)
+
+    def _notes_reloaded(self, noteutil: NoteUtil, nids: Dict[int, int]) -> None:
+        """Has the note file of a NoteUtil whose Notes were made again by load or refresh indexed again."""
+        self._reindex(noteutil)
+
+    def _reindex(self, noteutil: NoteUtil) -> None:
+        """Drops the index of the note file, so that the next _merge makes it again and merges everything again."""
+        note_file = os.path.normpath(noteutil.note_file)
+        with self._index_lock:
+            self._indexes[note_file] = None
+            self._merged = []
+            self._terms = dict()
+            self._headings = dict()
+
+    def noteutil(self, note_file: str) -> NoteUtil:
+        """Retrieves the NoteUtil of a note file, creating it if it hasn't been loaded yet.
+
+        Parameters
+        ----------
+        note_file : str
+            One of the note files of the Notebook.
+
+        Returns
+        -------
+        NoteUtil
+
+        Raises
+        ------
+        NoteFileNotFound
+            If the note file is not part of the Notebook.
+        NoteError
+            If there were any severe problems during the Note creation process of the note file.
+        """
+
+        note_file = os.path.normpath(note_file)
+        if note_file not in self._locks:
+            raise NoteFileNotFound(note_file)
+        # Two threads asking for the same note file must not both parse it.
+        with self._locks[note_file]:
+            if note_file not in self.noteutils:
+                noteutil = NoteUtil(self.config_file, refresh=self.refresh, note_file=note_file,
+                                    read_only=self.read_only)
+                index = self._index(noteutil)
+                with self._index_lock:
+                    self._indexes[note_file] = index
+                noteutil._watch(self)
+                self.noteutils[note_file] = noteutil
+        return self.noteutils[note_file]
+
+    def load(self) -> None:
+        """Loads every note file that hasn't been loaded yet, several at a time in a thread pool.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        NoteError
+            If there were any severe problems during the Note creation process of a note file.
+        """
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            # list re-raises the first error of a note file.
+            list(executor.map(self.noteutil, self.note_files))
+
+    def locate(self, note: Note) -> Tuple[str, int]:
+        """Retrieves where a Note of the Notebook came from.
+
+        Parameters
+        ----------
+        note : Note
+
+        Returns
+        -------
+        Tuple[str, int]
+            The note file of the Note and its nindex in that file.
+        """
+
+        return note._noteutil.note_file, note.nindex
+
+    def get(self, **kwargs) -> Note:
+        """Retrieves the first Note of the Notebook with attributes equal to passed keyword args.
+        See NoteUtil.get.
+
+        Returns
+        -------
+        Note or None
+        """
+
+        for note_file in self.note_files:
+            note = self.noteutil(note_file).get(**dict(kwargs))
+            if note is not None:
+                return note
+        return None
+
+    def save(self) -> None:
+        """Saves the NoteUtil of every note file that has been loaded.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ReadOnly
+            If the Notebook is read-only.
+        """
+
+        for noteutil in self.noteutils.values():
+            noteutil.save()
@@ -1,3 +1,6 @@
+import hashlib
+
+
 class Note:
     """A Note is the text found in the notes file. It contains the actual notes from each line of text.
     They can be Headings, which means a group of notes that come after this Note belong to this Note.
@@ -23,8 +26,12 @@ class Note:
         The content of the Note excluding prefixes and Extensions.
     rcontent : str
         The raw content of the Note before parsing, including prefixes and Extensions.
+    digest : str
+        A stable hex digest of the rcontent, used to identify the Note across saves.
     nindex : int
         The index at which this Note resides in NoteUtil.notes.
+    nid : int or None
+        An id that NoteUtil gives each Note it creates. Unlike the nindex, it never changes or gets reused.
 
     If the NoteUtil uses headings:
         previous_heading : Note
@@ -79,6 +86,7 @@ class Note:
         self._noteutil = noteutil
         self.content = content
         self.nindex = nindex
+        self.nid = kwargs.get("nid", None)
 
         # Heading parameters
         self.heading_char = kwargs.get("heading_char", None)
@@ -104,18 +112,26 @@ class Note:
         self.extension_bounds = kwargs.get("extension_bounds", [])
         self.extensions = kwargs.get("extensions", [])
 
+        # Cached on first use. Notes are never changed in place, since NoteUtil.edit makes a new Note.
+        self._rcontent = None
+        self._digest = None
+
     def __eq__(self, other):
         if isinstance(other, Note):
-            return self.rcontent == other.rcontent
+            return self is other or (hash(self) == hash(other) and self.rcontent == other.rcontent)
         else:
             return False
 
     def __ne__(self, other):
         if isinstance(other, Note):
-            return self.rcontent != other.rcontent
+            return not self == other
         else:
             return False
 
+    def __hash__(self):
+        # str caches its own hash, so this is constant time after the first call.
+        return hash(self.rcontent)
+
     def __lt__(self, other):
         return self.nindex < other.nindex
 
@@ -144,81 +160,96 @@ class Note:
     @property
     def rcontent(self) -> str:
         """What a Note looked like before parsing it."""
-        rcontent = ""
-        if self.is_heading():
-            rcontent += self.heading
-        if self.has_categories():
-            for prefix in self.category_prefixes:
-                rcontent += prefix
-        rcontent += self.content
-        if self.has_extensions():
-            for ext in self.extensions:
-                rcontent += ext.rcontent
-        return rcontent
+        if self._rcontent is None:
+            parts = []
+            if self.is_heading():
+                parts.append(self.heading)
+            if self.has_categories():
+                parts.extend(self.category_prefixes)
+            parts.append(self.content)
+            if self.has_extensions():
+                parts.extend(ext.rcontent for ext in self.extensions)
+            self._rcontent = "".join(parts)
+        return self._rcontent
+
+    @property
+    def digest(self) -> str:
+        """A stable hex digest of the rcontent that does not change between runs."""
+        if self._digest is None:
+            self._digest = hashlib.blake2b(self.rcontent.encode("utf8"), digest_size=16).hexdigest()
+        return self._digest
 
     @property
     def previous_heading(self):
-        if self._noteutil.heading_char is not None:
-            for heading in self._noteutil.heading_order[::-1]:
-                if self.nindex > heading.nindex:
-                    return heading
-        return None
+        with self._noteutil.reading():
+            if self._noteutil.heading_char is not None:
+                for heading in self._noteutil.heading_order[::-1]:
+                    if self.nindex > heading.nindex:
+                        return heading
+            return None
 
     @property
     def next_heading(self):
-        if self._noteutil.heading_char is not None:
-            for heading in self._noteutil.heading_order:
-                if self.nindex < heading.nindex:
-                    return heading
-        return None
+        with self._noteutil.reading():
+            if self._noteutil.heading_char is not None:
+                for heading in self._noteutil.heading_order:
+                    if self.nindex < heading.nindex:
+                        return heading
+            return None
 
     @property
     def pairs(self):
-        if self.is_heading():
-            return list(filter(lambda n: n.is_pair(), [self._noteutil.get(nindex=i)
-                                                       for i in range(self.begin_nindex, self.end_nindex)]))
-        return []
+        with self._noteutil.reading():
+            if self.is_heading():
+                return list(filter(lambda n: n.is_pair(), [self._noteutil.get(nindex=i)
+                                                           for i in range(self.begin_nindex, self.end_nindex)]))
+            return []
 
     @property
     def heading_order(self):
-        if self.is_heading():
-            return list(filter(lambda n: n.is_heading(), [self._noteutil.get(nindex=i)
-                                                          for i in range(self.begin_nindex, self.end_nindex)]))
-        return []
+        with self._noteutil.reading():
+            if self.is_heading():
+                return list(filter(lambda n: n.is_heading(), [self._noteutil.get(nindex=i)
+                                                              for i in range(self.begin_nindex, self.end_nindex)]))
+            return []
 
     @property
     def heading_names(self):
-        if self.is_heading():
-            return list(map(lambda n: n.heading_name, self.heading_order))
-        return []
+        with self._noteutil.reading():
+            if self.is_heading():
+                return list(map(lambda n: n.heading_name, self.heading_order))
+            return []
 
     @property
     def level_order(self):
-        if self.is_heading():
-            level_order = {name: [] for name in self._noteutil.level_names}
-            for note in self.heading_order:
-                level_name = self._noteutil.level_names[note.level - 1]
-                level_order[level_name].append(note)
-            return level_order
-        return {}
+        with self._noteutil.reading():
+            if self.is_heading():
+                level_order = {name: [] for name in self._noteutil.level_names}
+                for note in self.heading_order:
+                    level_name = self._noteutil.level_names[note.level - 1]
+                    level_order[level_name].append(note)
+                return level_order
+            return {}
 
     @property
     def categories(self):
-        if self.is_heading():
-            categories = {name: [] for name in self._noteutil.category_names}
-            for note in [self._noteutil.get(nindex=i) for i in range(self.begin_nindex, self.end_nindex)]:
-                for category_name in note.category_names:
-                    categories[category_name].append(note)
-            return categories
-        else:
-            return {}
+        with self._noteutil.reading():
+            if self.is_heading():
+                categories = {name: [] for name in self._noteutil.category_names}
+                for note in [self._noteutil.get(nindex=i) for i in range(self.begin_nindex, self.end_nindex)]:
+                    for category_name in note.category_names:
+                        categories[category_name].append(note)
+                return categories
+            else:
+                return {}
 
     @property
     def with_extensions(self):
-        if self.is_heading():
-            return list(filter(lambda n: n.has_extensions(), [self._noteutil.get(nindex=i)
-                                                              for i in range(self.begin_nindex, self.end_nindex)]))
-        return []
+        with self._noteutil.reading():
+            if self.is_heading():
+                return list(filter(lambda n: n.has_extensions(), [self._noteutil.get(nindex=i)
+                                                                  for i in range(self.begin_nindex, self.end_nindex)]))
+            return []
 
     def is_pair(self) -> bool:
         """Returns whether the Note should have the parameters of a pair.
@@ -1,25 +1,79 @@
-from .notes import Note, Extension
+from .notes import Note
 from .comparisons import CompareOptions
+from .columns import NoteColumns
 from .errors import *
+from .headings import HeadingNode
+from .structures import bitset
+from .instrumentation import NullStats, Stats, timed, timed_iter
+from .locks import NullLock, RWLock, reads, writes
+from .parsing import CategoryTrie, ExtensionScanner, Syntax, classify, classify_chunk
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+import inspect
+import io
 import os.path
-from typing import List, Dict, Generator, Union, Tuple
+import types
+import weakref
+from typing import List, Dict, Generator, Iterable, Union, Tuple
 
 
-def readlines(f) -> Generator[str, None, None]:
-    """Splits a file into lines without the "\n" suffixes.
+def iterlines(f, size: int = 2 ** 20) -> Generator[str, None, None]:
+    """Yields the same lines as f.read().split("\n"), reading the file a chunk at a time.
 
     Parameters
     ----------
     f: File
+    size : int
+        The number of characters to read at a time.
 
     Yields
     ------
     str
     """
 
-    lines = f.read().split("\n")
-    for line in lines:
-        yield line.strip()
+    # The start of a line that continues into the next chunk
+    pending = []
+    for chunk in iter(lambda: f.read(size), ""):
+        lines = chunk.split("\n")
+        if len(lines) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(lines[0])
+        lines[0] = "".join(pending)
+        pending = [lines.pop()]
+        yield from lines
+    yield "".join(pending)
+
+
+def join_blocks(lines, blocks: Union[None, str]) -> Generator[Tuple[int, str], None, None]:
+    """Joins the lines of every block into one content, and strips every content.
+    The line after the first line of a block always belongs to the block, even if the first line ends it.
+
+    Parameters
+    ----------
+    lines : Iterable[Tuple[int, str]]
+        The line number and the line without its "\n" suffix of every line.
+    blocks : str or None
+        The prefix and suffix of blocks.
+
+    Yields
+    ------
+    Tuple[int, str]
+        The line number where each content begins, and the content.
+    """
+
+    lines = iter(lines)
+    for number, line in lines:
+        if blocks is not None:
+            if line.strip().startswith(blocks):
+                block = [line[len(blocks):]]
+                for _, line in lines:
+                    block.append(line)
+                    if line.strip().endswith(blocks):
+                        break
+                line = "\n".join(block)[:-1 * len(blocks)]
+        if line != "":
+            yield number, line.strip()
 
 
 class NoteUtil:
@@ -30,6 +84,20 @@ class NoteUtil:
     ----------
     config_file : str
         The name of the config file that is used to set up this NoteUtil.
+    refresh : bool
+        Whether to parse the note file again instead of reusing the .nu file.
+    concurrent : bool
+        Whether the NoteUtil will be read from and edited by several threads at once.
+        If so, reads share a reader/writer lock and edit, insert, delete, load and refresh wait for it alone.
+    processes : int
+        The number of processes that classify the Notes while parsing. More than 1 only helps with large note files.
+    note_file : str, optional
+        The note file to read instead of the one in the config file, so one config can be shared by many note files.
+    stats : Stats, optional
+        Where to record how long each parsing phase, query and edit takes. Nothing is recorded if not given.
+    read_only : bool
+        Whether to never write any files. Notes are read straight from the note file unless refresh is False and
+        there is a .nu file, and save raises ReadOnly.
 
     Attributes
     ----------
@@ -73,6 +141,19 @@ class NoteUtil:
         All Notes that have extensions.
     pairs : List[Note]
         All Notes that have terms and definitions.
+    columns : NoteColumns
+        The levels, flags, categories, nids and contents of the Notes as parallel arrays, which bulk filters work on.
+        They are made again after every edit, insert or delete.
+    heading_tree : HeadingNode
+        The root of the tree of headings, whose nodes count the pairs, Extensions and categories under each heading.
+    concurrent : bool
+        Whether the NoteUtil is locked for use by several threads.
+    processes : int
+        The number of processes that classify the Notes while parsing.
+    read_only : bool
+    stats : Stats
+        The timers and counters of the NoteUtil. See statistics.
+        Like concurrent, it is fixed when the NoteUtil is made, so set it by passing it in or through load.
     warnings : List[str]
         List of all of the warnings that occurred during the Note creation process.
     errors : List[str]
@@ -85,29 +166,182 @@ class NoteUtil:
     """
 
     CONFIG_IGNORE_PREFIX = "#|"
-    TEMPORARY_CONFIG_FILE = "noteutil_temporary_config.txt"
-
-    def __init__(self, config_file: str, refresh: bool = True):
+    PARSE_CHUNK_SIZE = 16384
+
+    _lock = NullLock()
+    stats = NullStats()
+    # The config and note lines of NoteUtils made by from_strings and from_iterable, instead of their files
+    _config_text = None
+    _note_lines = None
+    # The Quizzes and the like that are told about every Note that is added or removed. See _watch.
+    _watchers = ()
+
+    def __init__(self, config_file: str, refresh: bool = True, concurrent: bool = False, processes: int = 1,
+                 note_file: str = None, stats: Stats = None, read_only: bool = False):
+        # load and refresh re-initialize while holding the lock, so an existing lock is kept.
+        self.concurrent = concurrent
+        if concurrent != isinstance(self._lock, RWLock):
+            self._lock = RWLock() if concurrent else NullLock()
+        self.processes = processes
+        self.read_only = read_only
+        if stats is not None:
+            self.stats = stats
+        self._bind_methods()
         self.notes = []
+        self._columns = None
+        # The heading tree is rebuilt by _complete_headings whenever a heading is added or removed,
+        # before the writer that added or removed it returns
+        self._heading_tree = None
+        self._heading_nodes = dict()
+        # The Notes that are in the NoteUtil, by nid. Nids are never reused.
+        self._nid_notes = dict()
+        self._nids = 0
         self.config_file = config_file
+        self._note_file = note_file
         self.errors = []
         self._parse_config()
         self._read_config()
-        if not os.path.exists(self.nu_file) or refresh:
-            self._parse_notes()
+        # Whether _read_notes reads the note file itself, because a read-only NoteUtil can't write the .nu file
+        self._unparsed = False
+        if refresh or not os.path.exists(self.nu_file):
+            if read_only:
+                self._unparsed = True
+            else:
+                self._parse_notes()
         self._make_notes()
         if self.errors:
             raise NoteError("Errors\n"
                             "------\n"
                             "\t{0}\n"
                             "------".format("\n\t".join(self.errors)))
-        self.save()
+        if not read_only:
+            self.save()
+
+    @classmethod
+    def from_strings(cls, config: str, notes: str, concurrent: bool = False, processes: int = 1,
+                     stats: Stats = None) -> "NoteUtil":
+        """Creates a NoteUtil from the text of a config file and the text of a note file, without any file I/O.
+        The NoteUtil is read-only, and load and refresh parse the same text again.
+
+        Parameters
+        ----------
+        config : str
+            What would be in the config file. Its note file only names the NoteUtil's files, which are never used.
+        notes : str
+            What would be in the note file.
+        concurrent, processes, stats
+            See NoteUtil.
+
+        Returns
+        -------
+        NoteUtil
+
+        Raises
+        ------
+        NoteError
+            If there were any severe problems during the Note creation process.
+        """
+
+        return cls.from_iterable(config, io.StringIO(notes, newline=None), concurrent, processes, stats)
+
+    @classmethod
+    def from_iterable(cls, config: str, lines: Iterable[str], concurrent: bool = False, processes: int = 1,
+                      stats: Stats = None) -> "NoteUtil":
+        """Creates a NoteUtil from the text of a config file and the lines of a note file, without any file I/O.
+        The NoteUtil is read-only, and load and refresh parse the same lines again.
+
+        Parameters
+        ----------
+        config : str
+            What would be in the config file. Its note file only names the NoteUtil's files, which are never used.
+        lines : Iterable[str]
+            The lines of the note file, with or without their "\n" suffixes.
+        concurrent, processes, stats
+            See NoteUtil.
+
+        Returns
+        -------
+        NoteUtil
+
+        Raises
+        ------
+        NoteError
+            If there were any severe problems during the Note creation process.
+        """
+
+        noteutil = cls.__new__(cls)
+        noteutil._config_text = config
+        noteutil._note_lines = list(lines)
+        noteutil.__init__(None, concurrent=concurrent, processes=processes, stats=stats, read_only=True)
+        return noteutil
+
+    @classmethod
+    def validate(cls, config_file: str, fail_fast: bool = False,
+                 note_file: Union[None, str] = None) -> List[Tuple[int, NoteError]]:
+        """Finds the errors in a note file without making any Notes or writing any files.
+        The note file is read one line at a time, and only the heading names and terms are kept to find duplicates.
+
+        Parameters
+        ----------
+        config_file : str
+        fail_fast : bool
+            Whether to stop at the first error.
+        note_file : str, optional
+            The note file to check instead of the one in the config file.
+
+        Returns
+        -------
+        List[Tuple[int, NoteError]]
+            The line number in the note file where each Note with an error begins, and the error.
+            It is empty if NoteUtil(config_file) would not raise a NoteError.
+
+        Raises
+        ------
+        NoteFileNotFound
+            If the note file doesn't exist.
+        """
+
+        noteutil = cls.__new__(cls)
+        noteutil.config_file = config_file
+        noteutil._note_file = note_file
+        noteutil._parse_config()
+        noteutil._read_config()
+        syntax = noteutil._syntax
+
+        errors = []
+        previous_level = 0
+        heading_names = set()
+        terms = set()
+        try:
+            f = open(noteutil.note_file, mode="r", encoding="utf8")
+        except FileNotFoundError:
+            raise NoteFileNotFound(noteutil.note_file)
+        with f:
+            for number, content in join_blocks(noteutil._kept_lines(f), noteutil.blocks):
+                classified = classify(syntax, content)
+                try:
+                    noteutil._check(content, classified, previous_level, heading_names, terms)
+                except NoteError as e:
+                    errors.append((number, e))
+                    if fail_fast:
+                        break
+                    continue
+
+                kwargs = classified.kwargs
+                if classified.heading_name is not None:
+                    previous_level = kwargs["level"]
+                    heading_names.add(kwargs["heading_name"])
+                if "term" in kwargs:
+                    terms.add(kwargs["term"])
+        return errors
 
     @property
+    @reads
     def pairs(self) -> List[Note]:
         return list(filter(lambda n: n.is_pair(), self.notes))
 
     @property
+    @reads
     def level_order(self) -> Dict[str, List[Note]]:
         level_order = {name: [] for name in self.level_names}
         for note in self.heading_order:
@@ -116,14 +350,17 @@ class NoteUtil:
         return level_order
 
     @property
+    @reads
     def heading_order(self) -> List[Note]:
         return list(filter(lambda n: n.is_heading(), self.notes))
 
     @property
+    @reads
     def heading_names(self) -> List[str]:
         return list(map(lambda n: n.heading_name, self.heading_order))
 
     @property
+    @reads
     def categories(self) -> Dict[str, List[Note]]:
         categories = {name: [] for name in self.category_names}
         for note in self.notes:
@@ -132,16 +369,84 @@ class NoteUtil:
         return categories
 
     @property
+    @reads
     def with_extensions(self) -> List[Note]:
         return list(filter(lambda n: n.has_extensions(), self.notes))
 
+    @property
+    @reads
+    def columns(self) -> NoteColumns:
+        if self._columns is None:
+            self.stats.count("columns.miss")
+            self._columns = NoteColumns(self)
+        else:
+            self.stats.count("columns.hit")
+        return self._columns
+
+    @property
+    @reads
+    def heading_tree(self) -> HeadingNode:
+        # Every writer leaves the tree built, so reading it never changes anything
+        return self._heading_tree
+
+    @reads
+    def heading_node(self, heading: Union[None, Note]) -> Union[None, HeadingNode]:
+        """Retrieves the node of a heading in the heading tree, which holds its subheadings and the counts of the
+        Notes under it.
+
+        Parameters
+        ----------
+        heading : Note or None
+            A heading of this NoteUtil, or None for the root of the heading tree.
+
+        Returns
+        -------
+        HeadingNode or None
+            The node of the heading, or None if the Note isn't one of the headings of this NoteUtil.
+        """
+
+        root = self.heading_tree
+        if heading is None:
+            return root
+        return self._heading_nodes.get(id(heading))
+
+    @timed("select")
+    @reads
+    def select(self, flags: int = 0, level: Union[None, int] = None, category: Union[None, str] = None) -> List[Note]:
+        """Retrieves all Notes that match the given filters.
+        The filters are worked out as bitsets over whole columns (see NoteColumns.row_set), and only the Notes of
+        the matching rows are looked up.
+
+        Parameters
+        ----------
+        flags : int
+            Bits from columns.HEADING, columns.PAIR and columns.EXTENSION that the Notes must all have.
+        level : int or None
+            The heading level that the Notes must have, if given.
+        category : str or None
+            The category name that the Notes must belong to, if given.
+
+        Returns
+        -------
+        List[Note]
+            The matching Notes in chronological order.
+        """
+
+        return [self.notes[row] for row in self.columns.rows(flags, level, category)]
+
+    @timed("parse_config")
     def _parse_config(self) -> None:
         """Strips the config file of white space, empty lines, and comments.
-        Detects unusual spacing and writes stripped contents into a temporary config file.
+        Detects unusual spacing and keeps the stripped lines for _read_config.
+        The config is never written back out, so several NoteUtils can be created at once.
         """
 
-        with open(self.config_file, mode="r", encoding="utf8") as f:
-            raw_config = ""
+        if self._config_text is not None:
+            f = io.StringIO(self._config_text, newline=None)
+        else:
+            f = open(self.config_file, mode="r", encoding="utf8")
+        with f:
+            self._config_lines = []
             lines = f.readlines()
             for index, line in enumerate(lines):
                 # If this line and the last line are blank, that means there are two blank lines.
@@ -159,34 +464,29 @@ class NoteUtil:
                     continue
 
                 else:
-                    raw_config += line + "\n"
-
-        with open("noteutil_temporary_config.txt", mode="w", encoding="utf8") as f:
-            f.write(raw_config)
+                    self._config_lines.append(line)
 
+    @timed("read_config")
     def _read_config(self) -> None:
         """Parses the config file into NoteUtil attributes."""
 
-        with open(self.TEMPORARY_CONFIG_FILE, mode="r", encoding="utf8") as f:
-            lines = f.readlines()
-            if len(lines) < 13:
-                raise IncorrectConfig(len(lines))
-
-        with open(self.TEMPORARY_CONFIG_FILE, mode="r", encoding="utf8") as f:
-            lines = readlines(f)
+        if len(self._config_lines) < 13:
+            raise IncorrectConfig(len(self._config_lines))
+        lines = iter(self._config_lines + [""])
 
-            # Read line by line to get each variable
-            self.note_file = next(lines)
-            self.nu_file = self.note_file.split(".")[0] + ".nu"
-            self.comments = next(lines) or None
-            self.blocks = next(lines) or None
+        # Read line by line to get each variable
+        self.note_file = next(lines)
+        if self._note_file is not None:
+            self.note_file = self._note_file
+        self.nu_file = os.path.splitext(self.note_file)[0] + ".nu"
+        self.comments = next(lines) or None
+        self.blocks = next(lines) or None
 
-            self.separator = next(lines) or None
-            self._read_headings(lines)
-            self._read_categories(lines)
-            self._read_extensions(lines)
-
-        os.remove(self.TEMPORARY_CONFIG_FILE)
+        self.separator = next(lines) or None
+        self._read_headings(lines)
+        self._read_categories(lines)
+        self._read_extensions(lines)
+        del self._config_lines
 
     def _read_headings(self, lines):
         self.heading_char = next(lines) or None
@@ -214,6 +514,7 @@ class NoteUtil:
             self.category_prefixes = []
             next(lines)
             next(lines)
+        self._category_trie = CategoryTrie(self.category_names, self.category_prefixes)
 
     def _read_extensions(self, lines):
         extension_number = next(lines) or None
@@ -229,7 +530,9 @@ class NoteUtil:
             self.extension_bounds = []
             next(lines)
             next(lines)
+        self._extension_scanner = ExtensionScanner(self.extension_names, self.extension_bounds)
 
+    @timed("parse_notes")
     def _parse_notes(self) -> None:
         """Strips the note file of empty lines, and comments.
         Writes the content to the .nu file.
@@ -241,8 +544,8 @@ class NoteUtil:
             raise NoteFileNotFound(self.note_file)
 
         with open(self.note_file, mode="r", encoding="utf8") as f:
-            raw_notes = ""
-            for line in f.readlines():
+            raw_notes = []
+            for line in f:
                 # Check for comments or empty line
                 if self.comments is not None:
                     if line.strip().startswith(self.comments):
@@ -251,179 +554,336 @@ class NoteUtil:
                     continue
 
                 # Passed, add it to the raw notes
-                raw_notes += line
+                raw_notes.append(line)
 
         with open(self.nu_file, mode="w", encoding="utf8") as f:
-            f.write(raw_notes)
+            f.writelines(raw_notes)
+
+    def _kept_lines(self, f) -> Generator[Tuple[int, str], None, None]:
+        """Yields the line number and line of every line of the note file that _parse_notes keeps,
+        the way that _read_notes reads them back from the .nu file."""
+        number = 0
+        ended = True    # Whether the .nu file would end with "\n", which split follows with an empty line
+        for number, line in enumerate(f, start=1):
+            if self.comments is not None:
+                if line.strip().startswith(self.comments):
+                    continue
+            if line.strip() == "":
+                continue
+
+            ended = line.endswith("\n")
+            yield number, line[:-1] if ended else line
+        if ended:
+            yield number + 1, ""
 
     def _read_notes(self) -> Generator[str, None, None]:
         """Splits a file into lines without the "\n" suffixes.
         Continues a line if it starts with line_continue.
+        The file is read one line at a time, and the lines of a block are only joined once the block ends.
 
         Yields
         ------
         str
         """
 
+        if self._note_lines is not None:
+            for _, content in join_blocks(self._kept_lines(self._note_lines), self.blocks):
+                yield content
+            return
+        if self._unparsed:
+            # The note file is read as if it had been parsed into a .nu file
+            try:
+                f = open(self.note_file, mode="r", encoding="utf8")
+            except FileNotFoundError:
+                raise NoteFileNotFound(self.note_file)
+            with f:
+                for _, content in join_blocks(self._kept_lines(f), self.blocks):
+                    yield content
+            return
+
         with open(self.nu_file, mode="r", encoding="utf8") as f:
-            lines = f.read().split("\n")
-
-            index = 0
-            while index < len(lines):
-                line = lines[index]
-                if self.blocks is not None:
-                    if line.strip().startswith(self.blocks):
-                        line = line[len(self.blocks):]
-                        index += 1
-                        while index < len(lines):
-                            line += "\n" + lines[index]
-                            if lines[index].strip().endswith(self.blocks):
-                                break
-                            index += 1
-                        line = line[:-1 * len(self.blocks)]
-                if line != "":
-                    yield line.strip()
-                index += 1
+            for _, content in join_blocks(enumerate(iterlines(f)), self.blocks):
+                yield content
 
+    @property
+    def _syntax(self) -> Syntax:
+        return Syntax(self.heading_char, getattr(self, "levels", 0), getattr(self, "level_names", []),
+                      self.category_names, self.category_prefixes, self.extension_names, self.extension_bounds,
+                      self.separator, getattr(self, "_extension_scanner", None),
+                      getattr(self, "_category_trie", None))
+
+    @timed("make_notes")
     def _make_notes(self) -> None:
         """Parses the newly written .nu file and creates Notes in the order of Heading, Extensions, Pairs, and Notes.
         Adds all of the notes to self.notes.
+
+        Each content is classified on its own (in parallel if processes > 1), then stitched into Notes in order while
+        checking for heading jumps, duplicate headings and duplicate terms against the Notes made so far.
         """
 
-        for nindex, content in enumerate(self._read_notes()):
+        previous_level = 0
+        heading_names = set()
+        terms = set()
+        for nindex, (content, classified) in enumerate(self._classify_notes()):
             try:
-                note = self._make_note(content, nindex)
-                self.notes.append(note)
+                self._check(content, classified, previous_level, heading_names, terms)
             except NoteError as e:
                 self.errors.append(e.args[0])
+                self.stats.count("errors")
+                continue
+
+            note = self._new_note(classified, nindex)
+            self.notes.append(note)
+            if note.is_heading():
+                previous_level = note.level
+                heading_names.add(note.heading_name)
+            if note.is_pair():
+                terms.add(note.term)
+        self.stats.count("notes", len(self.notes))
 
         # Headings are still missing their end_nindex:
         self._complete_headings()
 
+    def _classify_notes(self) -> Generator[Tuple[str, object], None, None]:
+        """Yields every content of the .nu file with its classification.
+        With more than one process, the contents are split into chunks that are classified in a process pool.
+        Blocks are joined before the split, so every chunk boundary falls between two whole Notes.
+        """
+
+        syntax = self._syntax
+        contents = self._read_notes()
+        if self.stats.enabled:
+            contents = timed_iter(self.stats, "read_notes", contents)
+        if self.processes <= 1:
+            stats = self.stats if self.stats.enabled else None
+            for content in contents:
+                yield content, classify(syntax, content, stats)
+            return
+
+        contents = iter(contents)
+        chunks = list(iter(lambda: list(islice(contents, self.PARSE_CHUNK_SIZE)), []))
+        with self.stats.timer("classify"):
+            if len(chunks) == 1:
+                results = [classify_chunk(syntax, chunks[0])]
+            else:
+                with ProcessPoolExecutor(min(self.processes, len(chunks))) as executor:
+                    results = list(executor.map(classify_chunk, repeat(syntax), chunks))
+        for chunk, classified in zip(chunks, results):
+            yield from zip(chunk, classified)
+
+    def _check(self, content, classified, previous_level, heading_names, terms) -> None:
+        """Raises the first error of a classified content, in the order that the detection steps find them.
+        The heading checks come first, then errors within the content itself, then the pair checks."""
+        kwargs = classified.kwargs
+        if classified.heading_name is not None:
+            if kwargs["level"] - previous_level > 1:
+                raise HeadingJump(content, previous_level, kwargs["level"])
+            if classified.heading_name in heading_names:
+                raise DuplicateHeading(classified.heading_name)
+        if isinstance(classified.error, NoteError):
+            raise classified.error
+        if classified.error is not None:
+            raise NoteError(classified.error)
+        if "term" in kwargs:
+            if kwargs["term"] in terms:
+                raise DuplicateTerm(kwargs["term"])
+            if kwargs["definition"] == "":
+                raise NoDefinition(classified.content)
+
     def _make_note(self, content, nindex):
         """This private version exists because Notes do not have their end_nindex yet and thus it can't be assigned,
         whereas in public use, end_nindexes and heading order have already been assigned."""
-        kwargs = {}
-        # The following 3 all modify content in some way:
-        content = self._detect_headings(content, nindex, kwargs)
-        content = self._detect_categories(content, kwargs)
-        content = self._detect_extensions(content, kwargs)
-        self._detect_pairs(content, kwargs)
-
-        # Since content may have been modified, fix up heading_name
-        if kwargs.get("heading_name", False):
-            kwargs["heading_name"] = content
-        return Note(self, content, nindex, **kwargs)
+        classified = classify(self._syntax, content)
+        heading = classified.heading_name is not None
+        heading_order = self.heading_order if heading else []
+        self._check(content, classified,
+                    heading_order[-1].level if heading_order else 0,
+                    set(map(lambda n: n.heading_name, heading_order)),
+                    set(map(lambda n: n.term, self.pairs)) if "term" in classified.kwargs else set())
+
+        return self._new_note(classified, nindex)
+
+    def _new_note(self, classified, nindex) -> Note:
+        """Creates the Note of a checked classification at the nindex and gives it the next nid."""
+        if classified.heading_name is not None:
+            classified.kwargs["begin_nindex"] = nindex + 1
+        note = Note(self, classified.content, nindex, **classified.kwargs)
+        self._register(note)
+        return note
+
+    def _register(self, note) -> None:
+        """Gives the Note the next nid, by which note_by_nid finds it until it is edited away or deleted."""
+        note.nid = self._nids
+        self._nid_notes[note.nid] = note
+        self._nids += 1
 
+    def _unregister(self, note) -> None:
+        if self._nid_notes.get(note.nid) is note:
+            del self._nid_notes[note.nid]
+
+    @writes
     def make_note(self, content, nindex):
         note = self._make_note(content, nindex)
         note.end_nindex = note.next_heading.nindex if note.next_heading else len(self.notes)
         self.insert(note, nindex)
         return note
 
-    def _detect_headings(self, content, nindex, kwargs):
-        if self.heading_char is not None:
-            if content.startswith(self.heading_char):
-                kwargs["heading_char"] = self.heading_char
+    @timed("complete_headings")
+    def _complete_headings(self):
+        """Sets the end_nindex of every heading to the nindex of whichever comes first:
+        the next heading at the same level, or the next heading at the same or a higher level.
+        Either one defaults to the number of Notes if there is no such heading.
+
+        If headings were added or removed since it was built, the heading tree is built again in the same pass,
+        counting every Note under the innermost heading that is open at it."""
+        build = self._heading_tree is None
+        if self.heading_char is None and not build:
+            return
+
+        if build:
+            root = HeadingNode(None, None)
+            nodes = {}
+            # The nids counted into each node, which are turned into its bitset all at once
+            nids = {id(root): []}
+            notes = self.notes
+        else:
+            notes = self.heading_order
+        open_headings = []
+        last_by_level = {}
+        for note in notes:
+            if not note.is_heading():
+                node = nodes[id(open_headings[-1])] if open_headings else root
+                node._count(note, 1)
+                nids[id(node)].append(note.nid)
+                continue
+            note.end_nindex = None
+            while open_headings and open_headings[-1].level >= note.level:
+                open_headings.pop().end_nindex = note.nindex
+            if note.level in last_by_level:
+                previous = last_by_level[note.level]
+                previous.end_nindex = min(previous.end_nindex, note.nindex)
+            last_by_level[note.level] = note
+            if build:
+                parent = nodes[id(open_headings[-1])] if open_headings else root
+                parent._count(note, 1)
+                nids[id(parent)].append(note.nid)
+                node = nodes[id(note)] = HeadingNode(note, parent)
+                nids[id(node)] = []
+            open_headings.append(note)
+
+        for heading in last_by_level.values():
+            if heading.end_nindex is None or heading.end_nindex > len(self.notes):
+                heading.end_nindex = len(self.notes)
+
+        if build:
+            root.nids = bitset(nid for nid in nids[id(root)] if nid is not None)
+            # Headings come after the headings above them, so in reverse every node is complete before its parent
+            for node in reversed(nodes.values()):
+                node.nids |= bitset(nid for nid in nids[id(node)] if nid is not None)
+                node.parent._absorb(node)
+            self._heading_tree = root
+            self._heading_nodes = nodes
+
+    def _count_note(self, note, nindex: int, amount: int) -> None:
+        """Adds the amount to the counts of every node over the Note at the nindex, or has the heading tree built
+        again if the Note is a heading. Only the Notes up to the closest heading before it are looked at."""
+        if note.is_heading():
+            self._heading_tree = None
+            return
+        if self._heading_tree is None:
+            return
+        node = self._heading_tree
+        if self._heading_nodes:
+            for i in range(nindex - 1, -1, -1):
+                if self.notes[i].is_heading():
+                    node = self._heading_nodes[id(self.notes[i])]
+                    break
+        for node in node.ancestry():
+            node.count(note, amount)
+
+    def statistics(self) -> Dict[str, Union[dict, float]]:
+        """Returns everything recorded in stats, along with the rates worked out from it.
 
-                try:
-                    previous_level = self.heading_order[-1].level
-                except IndexError:
-                    previous_level = 0
-                kwargs["level"] = current_level = content.count(self.heading_char, 0, self.levels)
-                kwargs["level_name"] = self.level_names[kwargs["level"] - 1]
-                if current_level - previous_level > 1:
-                    raise HeadingJump(content, previous_level, current_level)
-                kwargs["heading"] = kwargs["heading_char"] * kwargs["level"]
-                content = content[len(kwargs["heading"]):].lstrip()
-                kwargs["heading_name"] = content
-                if kwargs["heading_name"] in self.heading_names:
-                    raise DuplicateHeading(kwargs["heading_name"])
-
-                kwargs["begin_nindex"] = nindex + 1
-        return content
-
-    def _detect_categories(self, content, kwargs):
-        if self.category_names is not None and self.category_prefixes is not None:
-            kwargs["category_names"] = []
-            kwargs["category_prefixes"] = []
-            for name, prefix in zip(self.category_names, self.category_prefixes):
-                if content.startswith(prefix):
-                    kwargs["category_names"].append(name)
-                    kwargs["category_prefixes"].append(prefix)
-                    content = content[len(prefix):].lstrip()
-        return content
-
-    def _detect_extensions(self, content, kwargs):
-        if self.extension_names is not None and self.extension_bounds is not None:
-            kwargs["extensions"] = []
-            kwargs["extension_bounds"] = []
-            kwargs["extension_names"] = []
-            for name, bounds in zip(self.extension_names, self.extension_bounds):
-                lbound, rbound = bounds
-                kwargs["extension_bounds"].append(tuple([lbound, rbound]))
-                while lbound in content:
-                    lindex = content.index(lbound) + len(lbound)
-                    if rbound in content[lindex:]:
-                        rindex = content.index(rbound, lindex)
-                        kwargs["extensions"].append(
-                            Extension(content[lindex:rindex].strip(), name, lbound, rbound))
-                        if name not in kwargs["extension_names"]:
-                            kwargs["extension_names"].append(name)
-
-                        content = content[:lindex - len(lbound)].strip() + " " + content[rindex + len(rbound):].strip()
-                    else:
-                        raise MissingBound(content, lbound, rbound)
-        return content
-
-    def _detect_pairs(self, content, kwargs):
-        if self.separator is not None:
-            if self.separator in content:  # Line is a pair, add additional parameters
-                if len(content.split(self.separator)) > 2:
-                    raise ExtraSeparator(content)
-
-                kwargs["term"] = content.split(self.separator)[0].strip()
-                if kwargs["term"] in map(lambda n: n.term, self.pairs):
-                    raise DuplicateTerm(kwargs["term"])
-
-                kwargs["definition"] = content.split(self.separator)[1].strip()
-                if kwargs["definition"] == "":
-                    raise NoDefinition(content)
-
-                kwargs["separator"] = self.separator
+        Returns
+        -------
+        Dict[str, Union[dict, float]]
+            The "timers" and "counters" of Stats.as_dict, and:
+            "notes_per_second", the Notes made per second of make_notes.
+            "columns_hit_rate", the share of columns accesses that reused the built columns.
+        """
 
-    def _complete_headings(self):
-        if self.heading_char is not None:
-            headings_by_level = list(self.level_order.values())
-            heading_order = self.heading_order
+        statistics = self.stats.as_dict()
+        seconds = self.stats.seconds("make_notes")
+        statistics["notes_per_second"] = self.stats.counter("notes") / seconds if seconds else 0.0
+        hits, misses = self.stats.counter("columns.hit"), self.stats.counter("columns.miss")
+        statistics["columns_hit_rate"] = hits / (hits + misses) if hits + misses else 0.0
+        return statistics
+
+    def reading(self):
+        """Returns a context manager that holds the read lock, so several reads see the same Notes.
+        Edits from other threads wait until it exits. It does nothing unless the NoteUtil is concurrent.
+
+        Returns
+        -------
+        ContextManager
+        """
+
+        return self._lock.read()
+
+    def writing(self):
+        """Returns a context manager that holds the write lock, so several edits are seen by readers all at once.
+        It does nothing unless the NoteUtil is concurrent.
+
+        Returns
+        -------
+        ContextManager
+        """
+
+        return self._lock.write()
+
+    def _bind_methods(self) -> None:
+        """Decides once whether the methods go through their timing and locking wrappers.
+        If the NoteUtil is neither timed nor concurrent, the undecorated methods are bound onto it instead,
+        so that calling them costs no more than calling a plain method."""
+        direct = not self.stats.enabled and not self._lock.enabled
+        for name, method in inspect.getmembers(type(self), inspect.isfunction):
+            if hasattr(method, "__wrapped__"):
+                if direct:
+                    self.__dict__[name] = types.MethodType(inspect.unwrap(method), self)
+                else:
+                    self.__dict__.pop(name, None)
 
-            for headings in headings_by_level:
-                for i in range(len(headings)):
-                    heading = headings[i]
-                    level_index = i + 1     # The next heading index at the same level
-                    order_index = heading_order.index(heading) + 1    # The next heading index in heading order
+    def _watch(self, watcher) -> None:
+        """Has the watcher told about every Note that is inserted, deleted or edited from now on, through
+        watcher._note_added(note) and watcher._note_removed(note), and about load and refresh through
+        watcher._notes_reloaded(noteutil, nids). Watchers are held weakly and kept by load."""
+        if not isinstance(self._watchers, weakref.WeakSet):
+            self._watchers = weakref.WeakSet()
+        self._watchers.add(watcher)
 
-                    while order_index != len(heading_order) and \
-                            heading_order[order_index].level > heading.level:
-                        order_index += 1
+    def _unwatch(self, watcher) -> None:
+        if isinstance(self._watchers, weakref.WeakSet):
+            self._watchers.discard(watcher)
 
-                    if level_index == len(headings):
-                        level_nindex = len(self.notes)
-                    else:
-                        level_nindex = headings[level_index].nindex
+    def note_by_nid(self, nid: int) -> Union[None, Note]:
+        """Retrieves the Note of the NoteUtil that was given the nid.
 
-                    if order_index == len(heading_order):
-                        order_nindex = len(self.notes)
-                    else:
-                        order_nindex = heading_order[order_index].nindex
+        Parameters
+        ----------
+        nid : int
+            The nid of the Note.
 
-                    if level_nindex < order_nindex:
-                        end_nindex = level_nindex
-                    else:
-                        end_nindex = order_nindex
+        Returns
+        -------
+        Note or None
+            If a Note of the NoteUtil was given the nid.
+            If no Note was given the nid, or it has since been edited away or deleted.
+        """
 
-                    heading.end_nindex = end_nindex
+        return self._nid_notes.get(nid)
 
+    @timed("get")
+    @reads
     def get(self, **kwargs) -> Union[None, Note]:
         """Retrieves a Note with attributes equal to passed keyword args.
 
@@ -455,6 +915,8 @@ class NoteUtil:
                 return note
         return None
 
+    @timed("get_list")
+    @reads
     def get_list(self, **kwargs) -> Union[None, List[Note]]:
         """Retrieves all Notes with attributes equal to passed keyword args and stores them in a List.
 
@@ -486,6 +948,8 @@ class NoteUtil:
                 notes.append(note)
         return notes if notes else None
 
+    @timed("iget")
+    @reads
     def iget(self, **kwargs) -> Union[None, Note]:
         """Retrieves a Note without attributes equal to passed keyword args.
         "Inverted"-get
@@ -518,6 +982,8 @@ class NoteUtil:
                 return note
         return None
 
+    @timed("iget_list")
+    @reads
     def iget_list(self, **kwargs) -> Union[None, List[Note]]:
         """Retrieves all Notes without attributes equal to passed keyword args and stores them in a List.
         "Inverted"-get_list
@@ -551,6 +1017,8 @@ class NoteUtil:
                 notes.append(note)
         return notes if notes else None
 
+    @timed("edit")
+    @writes
     def edit(self, nindex: int, content: str) -> Note:
         """Given a Note, edit its content.
         This can have many side effects:
@@ -584,21 +1052,32 @@ class NoteUtil:
         """
 
         content = content.strip()
+        self._columns = None
         old_note = self.notes.pop(nindex)
+        self._count_note(old_note, nindex, -1)
         try:
             self.make_note(content, nindex)
         except NoteError:
             self.notes.insert(nindex, old_note)
+            self._count_note(old_note, nindex, 1)
+            if self._heading_tree is None:
+                self._complete_headings()
             raise
+        self._unregister(old_note)
+        for watcher in list(self._watchers):
+            watcher._note_removed(old_note)
         return self.notes[nindex]
 
+    @timed("insert")
+    @writes
     def insert(self, note, nindex):
         """Creates and inserts a Note at the given nindex.
 
         Parameters
         ----------
         note : Note
-            The Note to insert at position nindex.
+            The Note to insert at position nindex. Unless it already has its nid from this NoteUtil, it is given
+            the next one, so that Quizzes and the like can keep track of it.
         nindex : int
             The note index of the Note to be inserted.
 
@@ -610,7 +1089,12 @@ class NoteUtil:
         if not 0 <= nindex <= len(self.notes):
             raise NindexError(nindex)
 
+        # A Note that was deleted, or that came from another NoteUtil, may carry a nid that isn't its own here.
+        if note.nid is None or self._nid_notes.get(note.nid) is not note:
+            self._register(note)
         self.notes.insert(nindex, note)
+        self._columns = None
+        self._count_note(note, nindex, 1)
         if note.previous_heading is not None and note.previous_heading.end_nindex is not None:
             note.previous_heading.end_nindex += 1
 
@@ -620,7 +1104,11 @@ class NoteUtil:
             if n.is_heading():
                 n.begin_nindex = n.nindex + 1
         self._complete_headings()
+        for watcher in list(self._watchers):
+            watcher._note_added(note)
 
+    @timed("delete")
+    @writes
     def delete(self, nindex) -> None:
         """Deletes a Note at the given nindex.
 
@@ -640,7 +1128,9 @@ class NoteUtil:
         n = self.notes[nindex]
         if n.previous_heading is not None and n.previous_heading.end_nindex is not None:
             n.previous_heading.end_nindex -= 1
+        self._count_note(n, nindex, -1)
         del self.notes[nindex]
+        self._columns = None
 
         for i in range(nindex, len(self.notes)):
             note = self.notes[i]
@@ -648,7 +1138,12 @@ class NoteUtil:
             if note.is_heading():
                 note.begin_nindex -= 1
         self._complete_headings()
+        self._unregister(n)
+        for watcher in list(self._watchers):
+            watcher._note_removed(n)
 
+    @timed("save")
+    @reads
     def save(self, override_notes: bool = False) -> None:
         """Writes all of the Notes back into what they were when they were being parsed into a .nu file.
 
@@ -657,8 +1152,15 @@ class NoteUtil:
         Returns
         -------
         None
+
+        Raises
+        ------
+        ReadOnly
+            If the NoteUtil is read-only.
         """
 
+        if self.read_only:
+            raise ReadOnly(self.nu_file)
         raw_notes = "\n".join(list(map(lambda n: n.rcontent, self.notes)))
         with open(self.nu_file, mode="w", encoding="utf8") as f:
             f.write(raw_notes)
@@ -666,16 +1168,25 @@ class NoteUtil:
             with open(self.note_file, mode="w", encoding="utf8") as f:
                 f.write(raw_notes)
 
+    @writes
     def load(self) -> None:
         """Re-parses the .nu file, reverting any changes that could have been made to NoteUtil during use.
+        A read-only NoteUtil re-parses whichever file it was made from.
 
         Returns
         -------
         None
         """
 
-        self.__init__(self.config_file, refresh=False)
+        old_notes = self.notes
+        try:
+            self.__init__(self.config_file, refresh=self._unparsed, concurrent=self.concurrent,
+                          processes=self.processes, note_file=self._note_file, stats=self.stats,
+                          read_only=self.read_only)
+        finally:
+            self._reloaded(old_notes)
 
+    @writes
     def refresh(self) -> None:
         """Re-initializes the NoteUtil from the note file instead of the .nu file.
         This is used to match a new or updated note file.
@@ -685,7 +1196,29 @@ class NoteUtil:
         None
         """
 
-        self.__init__(self.config_file, refresh=True)
+        old_notes = self.notes
+        try:
+            self.__init__(self.config_file, refresh=True, concurrent=self.concurrent, processes=self.processes,
+                          note_file=self._note_file, stats=self.stats, read_only=self.read_only)
+        finally:
+            self._reloaded(old_notes)
+
+    def _reloaded(self, old_notes: List[Note]) -> None:
+        """Tells every watcher, through watcher._notes_reloaded(noteutil, nids), which nid each of the old Notes
+        has now that the Notes were made again. An old Note is matched with the first unmatched new Note that has
+        the same rcontent, and old Notes without a match are left out."""
+        if not self._watchers:
+            return
+        unmatched = dict()
+        for note in reversed(self.notes):
+            unmatched.setdefault(note.rcontent, []).append(note)
+        nids = dict()
+        for note in old_notes:
+            matches = unmatched.get(note.rcontent)
+            if matches and note.nid is not None:
+                nids[note.nid] = matches.pop().nid
+        for watcher in list(self._watchers):
+            watcher._notes_reloaded(self, nids)
 
 
 
@@ -0,0 +1,398 @@
+"""This module is for the line-local part of Note detection, which can run in other processes.
+
+Every Note content is classified on its own into the keyword arguments of its Note (heading, categories, extensions and
+pair). Whatever depends on the Notes before it (heading jumps, duplicate headings and duplicate terms) is left for
+NoteUtil to check in order, while it stitches the classified contents into Notes.
+"""
+from .errors import *
+from .notes import Extension
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from typing import List, Tuple, Union
+
+
+Syntax = namedtuple("Syntax", ["heading_char", "levels", "level_names", "category_names", "category_prefixes",
+                               "extension_names", "extension_bounds", "separator", "extension_scanner",
+                               "category_trie"])
+Syntax.__doc__ = """The parts of a NoteUtil config that classify needs, small enough to be sent to other processes."""
+
+
+class CategoryTrie:
+    """Finds the category prefixes at the start of a content with a trie of every prefix,
+    so that a content costs the same no matter how many categories there are.
+
+    The categories found are exactly what checking every prefix in config order finds: a prefix counts if the content
+    starts with it once the prefixes found before it, and the spaces after them, are taken off.
+
+    Parameters
+    ----------
+    names : List[str]
+        The category names in config order.
+    prefixes : List[str]
+        The prefix of each category name.
+
+    Attributes
+    ----------
+    names : List[str]
+    prefixes : List[str]
+    """
+
+    def __init__(self, names: List[str], prefixes: List[str]):
+        self.names = list(names)
+        self.prefixes = list(prefixes)
+        # Every node is (the nodes after it by character, the indexes of the categories whose prefix ends there)
+        self._root = (dict(), [])
+        for index, prefix in enumerate(self.prefixes):
+            node = self._root
+            for char in prefix:
+                node = node[0].setdefault(char, (dict(), []))
+            node[1].append(index)
+
+    def categorize(self, content: str, kwargs: dict) -> str:
+        """Takes the category prefixes off of the content, adding "category_names" and "category_prefixes"
+        to the kwargs of its Note.
+
+        Parameters
+        ----------
+        content : str
+        kwargs : dict
+
+        Returns
+        -------
+        str
+            The content without its category prefixes.
+        """
+
+        kwargs["category_names"] = names = []
+        kwargs["category_prefixes"] = prefixes = []
+        index = self._match(content, 0)
+        while index is not None:
+            names.append(self.names[index])
+            prefixes.append(self.prefixes[index])
+            content = content[len(self.prefixes[index]):].lstrip()
+            index = self._match(content, index + 1)
+        return content
+
+    def _match(self, content: str, first: int) -> Union[int, None]:
+        """Returns the lowest index, from first on, of a category whose prefix the content starts with."""
+        best = None
+        node = self._root
+        position = 0
+        while node is not None:
+            indexes = node[1]
+            if indexes and indexes[-1] >= first:
+                index = indexes[bisect_left(indexes, first)]
+                if best is None or index < best:
+                    best = index
+                    if best == first:
+                        break
+            if position == len(content):
+                break
+            node = node[0].get(content[position])
+            position += 1
+        return best
+
+
+class ExtensionScanner:
+    """Finds every Extension of a content in one left-to-right pass over the bounds of each extension type, working
+    on the content itself instead of on the rest of the content after every Extension that is taken out.
+
+    The Extensions, and the content left once they are taken out, are exactly what taking them out one at a time
+    produces: every Extension of the first extension type from left to right, then every one of the second type, and
+    so on. Taking an Extension out joins what is left and right of it with a space, and bounds never hold whitespace,
+    so a bound is found in what is left exactly where it is in the content, unless an earlier Extension covered it.
+    Symmetric bounds like && && are paired off in turn, and a bound inside another bound, like ![ inside ![](,
+    only counts where no Extension of an earlier type took it out. When a right bound is missing, scan gives up and
+    the one-at-a-time way must be used, so that it raises MissingBound.
+
+    Parameters
+    ----------
+    names : List[str]
+        The extension names in config order.
+    bounds : List[Tuple[str, str]]
+        The (left bound, right bound) of each extension name.
+
+    Attributes
+    ----------
+    names : List[str]
+    bounds : List[Tuple[str, str]]
+    """
+
+    def __init__(self, names: List[str], bounds: List[Tuple[str, str]]):
+        self.names = list(names)
+        self.bounds = [tuple(bound) for bound in bounds]
+
+    @staticmethod
+    def _positions(content: str, bound: str, spans: List[Tuple[int, int]]) -> List[int]:
+        """Returns where the bound begins in the content, leaving out the places where it overlaps one of the spans
+        that were taken out. The spans are sorted and never overlap each other."""
+        positions = []
+        position = content.find(bound)
+        if not spans:
+            while position != -1:
+                positions.append(position)
+                position = content.find(bound, position + 1)
+            return positions
+        starts = [start for start, _ in spans]
+        while position != -1:
+            i = bisect_right(starts, position) - 1
+            if (i < 0 or spans[i][1] <= position) and (i + 1 == len(spans) or starts[i + 1] >= position + len(bound)):
+                positions.append(position)
+            position = content.find(bound, position + 1)
+        return positions
+
+    @staticmethod
+    def _join(content: str, begin: int, end: int, spans: List[Tuple[int, int]]) -> List[str]:
+        """Returns the stripped pieces of content[begin:end] around the spans that were taken out of it."""
+        pieces = []
+        for start, stop in spans:
+            pieces.append(content[begin:start].strip())
+            begin = stop
+        pieces.append(content[begin:end].strip())
+        return pieces
+
+    def scan(self, content: str, kwargs: dict) -> Union[str, None]:
+        """Takes every Extension out of the content, adding "extensions", "extension_bounds" and "extension_names"
+        to the kwargs of its Note.
+
+        Parameters
+        ----------
+        content : str
+        kwargs : dict
+
+        Returns
+        -------
+        str or None
+            The content without its Extensions. None if a right bound is missing, and the kwargs are left alone then.
+        """
+
+        # (left bound start, left bound end, right bound start, right bound end, kind) in the order they are taken out
+        found = []
+        # The outermost spans taken out so far, which never overlap
+        spans = []
+        for kind, (lbound, rbound) in enumerate(self.bounds):
+            if lbound not in content:
+                continue
+            lefts = self._positions(content, lbound, spans)
+            rights = lefts if rbound == lbound else self._positions(content, rbound, spans)
+            taken = []
+            position = 0
+            right = 0
+            for left in lefts:
+                if left < position:
+                    continue
+                right = bisect_left(rights, left + len(lbound), right)
+                if right == len(rights):
+                    return None
+                position = rights[right] + len(rbound)
+                taken.append((left, left + len(lbound), rights[right], position, kind))
+            found += taken
+            if not spans:
+                spans = [(t[0], t[3]) for t in taken]
+                continue
+            # A span of this type can hold spans of earlier types, but never cuts through one.
+            merged = []
+            for start, stop in sorted(spans + [(t[0], t[3]) for t in taken]):
+                if not merged or start >= merged[-1][1]:
+                    merged.append((start, stop))
+            spans = merged
+
+        kwargs["extension_bounds"] = self.bounds.copy()
+        if not found:
+            kwargs["extensions"] = []
+            kwargs["extension_names"] = []
+            return content
+        if len(found) == 1:
+            # One Extension, which is most of them, is a single take out.
+            lstart, lend, rstart, rend, kind = found[0]
+            kwargs["extensions"] = [Extension(content[lend:rstart].strip(), self.names[kind], *self.bounds[kind])]
+            kwargs["extension_names"] = [self.names[kind]]
+            return content[:lstart].strip() + " " + content[rend:].strip()
+
+        extensions = []
+        names = []
+        for lstart, lend, rstart, rend, kind in found:
+            # Extensions of earlier types inside this one were taken out first, leaving a space each.
+            inner = []
+            for start, _, _, stop, other in sorted(found):
+                if other < kind and lend <= start and stop <= rstart and (not inner or start >= inner[-1][1]):
+                    inner.append((start, stop))
+            text = " ".join(piece for piece in self._join(content, lend, rstart, inner) if piece)
+            name = self.names[kind]
+            lbound, rbound = self.bounds[kind]
+            extensions.append(Extension(text, name, lbound, rbound))
+            if name not in names:
+                names.append(name)
+        kwargs["extensions"] = extensions
+        kwargs["extension_names"] = names
+
+        # Every take out joins what is left and right of an Extension with a space after stripping both, so runs of
+        # Extensions with only spaces between them leave one space. Only the space of the last Extension taken out
+        # can stay at the start or at the end of the content, because it is stripped off by any take out after it.
+        pieces = self._join(content, 0, len(content), spans)
+        texts = [piece for piece in pieces if piece]
+        if not texts:
+            return " "
+        first = pieces.index(texts[0])
+        last = len(pieces) - 1 - pieces[::-1].index(texts[-1])
+        final = spans.index((found[-1][0], found[-1][3]))
+        if final < first:
+            return " " + " ".join(texts)
+        if final >= last:
+            return " ".join(texts) + " "
+        return " ".join(texts)
+
+
+class Classified:
+    """The result of classifying one Note content.
+
+    Attributes
+    ----------
+    content : str
+        The content of the Note without its heading, category prefixes and Extensions.
+    kwargs : dict
+        The keyword arguments of the Note.
+    heading_name : str or None
+        If the Note is a heading, the name that duplicates are checked against. It still has its category prefixes
+        and Extensions, unlike kwargs["heading_name"].
+    error : NoteError or str or None
+        The first error that doesn't depend on other Notes. It is the error message in classify_chunk results.
+    """
+
+    __slots__ = ("content", "kwargs", "heading_name", "error")
+
+    def __init__(self, content: str, kwargs: dict, heading_name: Union[None, str], error):
+        self.content = content
+        self.kwargs = kwargs
+        self.heading_name = heading_name
+        self.error = error
+
+
+def classify(syntax: Syntax, content: str, stats=None) -> Classified:
+    """Detects the heading, categories, Extensions and pair of a Note content, in that order.
+
+    Parameters
+    ----------
+    syntax : Syntax
+    content : str
+        The stripped content of the Note.
+    stats : Stats, optional
+        If given, each detection step is timed under "classify.<step>".
+
+    Returns
+    -------
+    Classified
+    """
+
+    kwargs = {}
+    error = None
+    try:
+        if stats is None:
+            for step in _STEPS:
+                content = step(syntax, content, kwargs)
+        else:
+            for name, step in zip(_STEP_NAMES, _STEPS):
+                with stats.timer(name):
+                    content = step(syntax, content, kwargs)
+    except NoteError as e:
+        error = e
+
+    heading_name = kwargs.get("heading_name", None)
+    # Since content may have been modified, fix up heading_name
+    if kwargs.get("heading_name", False):
+        kwargs["heading_name"] = content
+    return Classified(content, kwargs, heading_name, error)
+
+
+def classify_chunk(syntax: Syntax, contents: List[str]) -> List[Classified]:
+    """Classifies a chunk of Note contents. This is what runs in the worker processes.
+
+    Errors are replaced with their messages, since NoteErrors can't be rebuilt from their pickled arguments.
+
+    Parameters
+    ----------
+    syntax : Syntax
+    contents : List[str]
+
+    Returns
+    -------
+    List[Classified]
+    """
+
+    chunk = []
+    for content in contents:
+        classified = classify(syntax, content)
+        if classified.error is not None:
+            classified.error = classified.error.args[0]
+        chunk.append(classified)
+    return chunk
+
+
+def _classify_heading(syntax: Syntax, content: str, kwargs: dict) -> str:
+    if syntax.heading_char is None or not content.startswith(syntax.heading_char):
+        return content
+    kwargs["heading_char"] = syntax.heading_char
+    kwargs["level"] = content.count(syntax.heading_char, 0, syntax.levels)
+    kwargs["level_name"] = syntax.level_names[kwargs["level"] - 1]
+    kwargs["heading"] = kwargs["heading_char"] * kwargs["level"]
+    content = content[len(kwargs["heading"]):].lstrip()
+    kwargs["heading_name"] = content
+    return content
+
+
+def _classify_categories(syntax: Syntax, content: str, kwargs: dict) -> str:
+    if syntax.category_trie is not None:
+        return syntax.category_trie.categorize(content, kwargs)
+    kwargs["category_names"] = []
+    kwargs["category_prefixes"] = []
+    for name, prefix in zip(syntax.category_names, syntax.category_prefixes):
+        if content.startswith(prefix):
+            kwargs["category_names"].append(name)
+            kwargs["category_prefixes"].append(prefix)
+            content = content[len(prefix):].lstrip()
+    return content
+
+
+def _classify_extensions(syntax: Syntax, content: str, kwargs: dict) -> str:
+    if syntax.extension_scanner is not None:
+        scanned = syntax.extension_scanner.scan(content, kwargs)
+        if scanned is not None:
+            return scanned
+    return _classify_extensions_one_by_one(syntax, content, kwargs)
+
+
+def _classify_extensions_one_by_one(syntax: Syntax, content: str, kwargs: dict) -> str:
+    """Takes the Extensions out one at a time. This is what ExtensionScanner.scan must match."""
+    kwargs["extensions"] = []
+    kwargs["extension_bounds"] = []
+    kwargs["extension_names"] = []
+    for name, bounds in zip(syntax.extension_names, syntax.extension_bounds):
+        lbound, rbound = bounds
+        kwargs["extension_bounds"].append(tuple([lbound, rbound]))
+        while lbound in content:
+            lindex = content.index(lbound) + len(lbound)
+            if rbound in content[lindex:]:
+                rindex = content.index(rbound, lindex)
+                kwargs["extensions"].append(Extension(content[lindex:rindex].strip(), name, lbound, rbound))
+                if name not in kwargs["extension_names"]:
+                    kwargs["extension_names"].append(name)
+
+                content = content[:lindex - len(lbound)].strip() + " " + content[rindex + len(rbound):].strip()
+            else:
+                raise MissingBound(content, lbound, rbound)
+    return content
+
+
+def _classify_pair(syntax: Syntax, content: str, kwargs: dict) -> str:
+    if syntax.separator is not None and syntax.separator in content:
+        parts = content.split(syntax.separator)
+        if len(parts) > 2:
+            raise ExtraSeparator(content)
+        kwargs["term"] = parts[0].strip()
+        kwargs["definition"] = parts[1].strip()
+        kwargs["separator"] = syntax.separator
+    return content
+
+
+_STEPS = (_classify_heading, _classify_categories, _classify_extensions, _classify_pair)
+_STEP_NAMES = ("classify.heading", "classify.categories", "classify.extensions", "classify.pair")
@@ -1,9 +1,11 @@
+from .columns import PAIR
 from .errors import *
 from .notes import Note
 from .noteutil import NoteUtil
+from .structures import Buckets, BucketView, Division, FenwickTree
+from array import array
 import random
-from itertools import filterfalse
-from typing import Union, Generator
+from typing import Dict, Generator, Iterable, List, Union
 import os
 import json
 
@@ -16,47 +18,126 @@ class Quiz:
     ----------
     noteutil : NoteUtil
         The NoteUtil that has the terms and definitions to be used with this Quiz.
+        If it is read-only, so is the Quiz: no .qz file is created and save raises ReadOnly.
+    rng : random.Random, optional
+        The random number generator used for randomized orders. Pass a seeded one for reproducible sessions.
 
     Attributes
     ----------
     noteutil : NoteUtil
     last_nindex : int
         The nindex of the last Note generated.
-    correct : List[Note]
-        All Notes marked as correct.
-    incorrect : List[Note]
-        All Notes marked as incorrect.
-    unmarked : List[Note]
-        All Notes neither marked correct nor incorrect.
+    rng : random.Random
+    seed : int or None
+        The seed of the current randomized order, which lets it be resumed after saving and loading.
+    position : int
+        The number of pairs already generated in the current order.
+    correct : BucketView
+        All Notes marked as correct, in the order they were marked.
+    incorrect : BucketView
+        All Notes marked as incorrect, in the order they were marked.
+    unmarked : BucketView
+        All pairs in NoteUtil neither marked correct nor incorrect.
+        Pairs that are edited in or inserted into the NoteUtil later on are added to it.
+    history : Dict[Note, List[int]]
+        Maps pairs that have been answered to the number of times they were answered [correctly, incorrectly].
     pairs : List[Note]
         List of all Notes that are pairs that the Quiz is generating from.
         This can either be all pairs in NoteUtil, or only pairs inside a specific heading/category.
-    division : str or Note
-        The heading/category whose pairs are being used.
+    division : str or Note or Division
+        The heading/category, or combination of them, whose pairs are being used.
     qz_file : str
         File name for the .qz file to save the Quiz's correct and incorrect lists.
     """
 
-    def __init__(self, noteutil: NoteUtil):
+    def __init__(self, noteutil: NoteUtil, rng: random.Random = None):
         self.noteutil = noteutil
         self.last_nindex = 0
-        self.correct = list()
-        self.incorrect = list()
+        self.rng = rng if rng is not None else random.Random()
+        self.seed = None
+        self.position = 0
+        # Marks and answer counts are kept in arrays indexed by nid and never on the Notes,
+        # so any number of Quizzes can share one NoteUtil.
+        self._track(self.noteutil.pairs)
+        self._right = array("L")
+        self._wrong = array("L")
+
+        # Adaptive sampling over the pairs of the running generate_adaptive
+        self._weights = None
+        self._slots = dict()
 
         # Options
         self.pairs = self.noteutil.pairs
         self.division = "none"
 
         # Saving
-        self.qz_file = self.noteutil.note_file.split(".")[0] + ".qz"
-        if not os.path.exists(self.qz_file):
+        self.qz_file = os.path.splitext(self.noteutil.note_file)[0] + ".qz"
+        if not self.noteutil.read_only and not os.path.exists(self.qz_file):
             open(self.qz_file, mode="w", encoding="utf8").close()
 
-    @property
-    def unmarked(self):
-        return list(filterfalse(lambda p: p in self.incorrect or p in self.correct, self.noteutil.pairs))
+    _UNMARKED = 1
+    _CORRECT = 2
+    _INCORRECT = 3
+
+    def _track(self, pairs: Iterable[Note]) -> None:
+        """Starts over with every one of the pairs unmarked."""
+        self._marks = Buckets()
+        for pair in pairs:
+            self._marks.add(pair.nid, self._UNMARKED)
+        self.correct = BucketView(self._marks, self._CORRECT, self.noteutil)
+        self.incorrect = BucketView(self._marks, self._INCORRECT, self.noteutil)
+        self.unmarked = BucketView(self._marks, self._UNMARKED, self.noteutil)
+        self.noteutil._watch(self)
+
+    def _note_added(self, note: Note) -> None:
+        """Leaves a pair that was just added to the NoteUtil unmarked."""
+        if note.is_pair() and note.nid is not None and self._marks.bucket(note.nid) == Buckets.NONE:
+            self._marks.add(note.nid, self._UNMARKED)
+
+    def _note_removed(self, note: Note) -> None:
+        """Forgets the mark and answer counts of a pair that was edited away or deleted from the NoteUtil."""
+        if note.nid is not None:
+            self._marks.discard(note.nid)
+            if note.nid < len(self._right):
+                self._right[note.nid] = self._wrong[note.nid] = 0
+
+    def _notes_reloaded(self, noteutil: NoteUtil, nids: Dict[int, int]) -> None:
+        """Moves the marks and answer counts over to the Notes that the pairs were made again as by load or refresh.
+        Pairs that weren't there before are left unmarked."""
+        self._marks.remap(nids)
+        right, wrong = self._right, self._wrong
+        self._right = array("L")
+        self._wrong = array("L")
+        for old, new in nids.items():
+            if old < len(right) and (right[old] or wrong[old]):
+                self._answer(new, right[old], wrong[old])
+        for pair in self.noteutil.pairs:
+            self._note_added(pair)
+        if isinstance(self.pairs, list):
+            self.pairs = [self.noteutil.note_by_nid(nids[pair.nid]) for pair in self.pairs if pair.nid in nids]
+
+    def _owns(self, pair: Note) -> bool:
+        """Returns whether the pair is one of the Notes of this Quiz's NoteUtil."""
+        return pair.nid is not None and self.noteutil.note_by_nid(pair.nid) is pair
 
-    def generate(self, *, randomize: bool) -> Generator[Note, None, None]:
+    @property
+    def history(self) -> Dict[Note, List[int]]:
+        history = dict()
+        for nid, (right, wrong) in enumerate(zip(self._right, self._wrong)):
+            if right or wrong:
+                history[self.noteutil.note_by_nid(nid)] = [right, wrong]
+        return history
+
+    def _answer(self, nid: int, right: int, wrong: int) -> None:
+        """Adds to the answer counts of the nid."""
+        missing = nid + 1 - len(self._right)
+        if missing > 0:
+            self._right.extend([0] * missing)
+            self._wrong.extend([0] * missing)
+        self._right[nid] += right
+        self._wrong[nid] += wrong
+
+    def generate(self, *, randomize: bool, resume: bool = False) -> Generator[Note, None, None]:
         """A generator that yields Notes, either chronologically or randomly.
         Quiz keeps track of the last index used, which changes every time this generator is iterated.
 
@@ -64,6 +145,9 @@ class Quiz:
         ----------
         randomize : bool
             Whether to generate a random term from the list of pairs.
+        resume : bool
+            Whether to continue the last order from position instead of starting a new one.
+            The pairs and randomize must be the same as when the order was started.
 
         Yields
         ------
@@ -72,20 +156,69 @@ class Quiz:
         """
 
         notes = [n for n in self.pairs]
+        if not resume or randomize != (self.seed is not None):
+            self.seed = self.rng.getrandbits(64) if randomize else None
+            self.position = 0
+        start = self.position
+
         if randomize:
-            random.shuffle(notes)
-            while notes:
-                index = random.randint(0, len(notes) - 1)
-                note = notes.pop(index)
-                self.last_nindex = note.nindex
-                yield note
+            # Fisher-Yates shuffle done one step per yield; the steps before start are replayed to resume.
+            order = random.Random(self.seed)
+            for index in range(len(notes)):
+                swap = order.randrange(index, len(notes))
+                notes[index], notes[swap] = notes[swap], notes[index]
+                if index >= start:
+                    self.position = index + 1
+                    self.last_nindex = notes[index].nindex
+                    yield notes[index]
         else:
-            index = 0
-            while index < len(notes):
-                note = notes[index]
-                self.last_nindex = note.nindex
-                yield note
-                index += 1
+            for index in range(start, len(notes)):
+                self.position = index + 1
+                self.last_nindex = notes[index].nindex
+                yield notes[index]
+
+    def weight(self, pair: Note) -> float:
+        """Returns how likely the pair is to be drawn by generate_adaptive, relative to other pairs.
+        Every incorrect answer raises the weight and every correct answer lowers it.
+
+        Parameters
+        ----------
+        pair : Note
+
+        Returns
+        -------
+        float
+        """
+
+        right, wrong = 0, 0
+        if self._owns(pair) and pair.nid < len(self._right):
+            right, wrong = self._right[pair.nid], self._wrong[pair.nid]
+        return (wrong + 1) / (right + 1)
+
+    def generate_adaptive(self, count: int = None) -> Generator[Note, None, None]:
+        """A generator that yields randomly drawn pairs, favoring pairs that were answered incorrectly more often.
+        Pairs are drawn with replacement in proportion to their weight, which is updated whenever they are appended.
+
+        Parameters
+        ----------
+        count : int, optional
+            The number of pairs to draw. If left as None, pairs are drawn until the generator is closed.
+
+        Yields
+        ------
+        Note
+            A pair drawn in proportion to its weight.
+        """
+
+        pairs = list(self.pairs)
+        self._weights = FenwickTree(self.weight(pair) for pair in pairs)
+        self._slots = {pair: slot for slot, pair in enumerate(pairs)}
+        drawn = 0
+        while pairs and (count is None or drawn < count):
+            pair = pairs[self._weights.sample(self.rng)]
+            drawn += 1
+            self.last_nindex = pair.nindex
+            yield pair
 
     def append(self, pair: Note, *, correct: bool) -> None:
         """Adds a pair to one of the correct or incorrect lists.
@@ -103,14 +236,15 @@ class Quiz:
         None
         """
 
-        if correct:
-            if pair not in self.correct:
-                self.correct.append(pair)
-            self.remove(pair, correct=False)
-        else:
-            if pair not in self.incorrect:
-                self.incorrect.append(pair)
-            self.remove(pair, correct=True)
+        if not self._owns(pair):
+            return
+        mark = self._CORRECT if correct else self._INCORRECT
+        if self._marks.bucket(pair.nid) != mark:
+            self._marks.add(pair.nid, mark)
+
+        self._answer(pair.nid, 1 if correct else 0, 0 if correct else 1)
+        if pair in self._slots:
+            self._weights[self._slots[pair]] = self.weight(pair)
 
     def remove(self, pair: Note, *, correct: bool) -> None:
         """Removes a pair from one of the correct or incorrect lists.
@@ -127,16 +261,12 @@ class Quiz:
         None
         """
 
-        if correct:
-            try:
-                self.correct.remove(pair)
-            except ValueError:
-                pass
+        if pair not in (self.correct if correct else self.incorrect):
+            return
+        if pair.is_pair():
+            self._marks.add(pair.nid, self._UNMARKED)
         else:
-            try:
-                self.incorrect.remove(pair)
-            except ValueError:
-                pass
+            self._marks.discard(pair.nid)
 
     def clear(self) -> None:
         """Empties the correct and incorrect lists.
@@ -146,19 +276,19 @@ class Quiz:
         None
         """
 
-        self.correct.clear()
-        self.incorrect.clear()
+        self._track(self.noteutil.pairs)
 
-    def select_pairs(self, division: Union[None, str, Note]) -> None:
+    def select_pairs(self, division: Union[None, str, Note, Division]) -> None:
         """Changes the current division and pairs to match the pairs in the given Heading/Category.
 
         Parameters
         ----------
-        division : Note or str
+        division : Note or str or Division
             The Note or heading name or category name whose pairs should be used.
             If the division name is "correct" or "incorrect", the pairs in the corresponding list will be used.
             If the division name is "unmarked", the pairs that are not in the correct or incorrect list will be used.
             If left as None or "none", all pairs in NoteUtil will be used.
+            A Division combines any of these, like (Division("Chapter 3") & "Dates") - "correct".
 
         Returns
         -------
@@ -177,6 +307,11 @@ class Quiz:
             self.pairs = self.noteutil.pairs
             return
 
+        if isinstance(division, Division):
+            self.division = division
+            self.pairs = self._pairs_of(division.resolve(self._nid_set, self.noteutil.columns.nid_set(PAIR)))
+            return
+
         if isinstance(division, str):
             if division.lower() == "none":
                 self.division = "None"
@@ -192,34 +327,76 @@ class Quiz:
                 return
             elif division.lower() == "unmarked":
                 self.division = "Unmarked"
-                self.pairs = self.unmarked
+                self.pairs = sorted(self.unmarked)
                 return
             elif division in self.noteutil.category_names:
                 self.division = division
-                self.pairs = list(filter(lambda n: n.is_pair(), self.noteutil.categories[division]))
+                self.pairs = self._pairs_of(self._nid_set(division))
                 return
             elif division in self.noteutil.heading_names:
                 division = self.noteutil.get(heading_name=division)
         if isinstance(division, Note):
-            if not division.is_heading():
-                raise HeadingExpected(division)
+            nids = self._nid_set(division)
             self.division = division
-            self.pairs = list(filter(lambda n: n.is_pair(),
-                                     self.noteutil.notes[self.division.begin_nindex: self.division.end_nindex]))
+            self.pairs = self._pairs_of(nids)
         else:
             raise DivisionNotFound(division)
 
+    _MARKS = {"correct": _CORRECT, "incorrect": _INCORRECT}
+
+    def _nid_set(self, division: Union[None, str, Note]) -> int:
+        """Returns the bitset of the nids of the pairs in a single heading, category or mark.
+        The unmarked pairs are the pairs that are neither correct nor incorrect."""
+        columns = self.noteutil.columns
+        if division is None:
+            division = "none"
+        if isinstance(division, str):
+            if division.lower() == "none":
+                return columns.nid_set(PAIR)
+            elif division.lower() in self._MARKS:
+                return columns.nid_set(PAIR) & self._marks.keyset(self._MARKS[division.lower()])
+            elif division.lower() == "unmarked":
+                marked = self._marks.keyset(self._CORRECT) | self._marks.keyset(self._INCORRECT)
+                return columns.nid_set(PAIR) & ~marked
+            elif division in self.noteutil.category_names:
+                return columns.nid_set(PAIR, division)
+            elif division in self.noteutil.heading_names:
+                division = self.noteutil.get(heading_name=division)
+        if isinstance(division, Note):
+            if not division.is_heading():
+                raise HeadingExpected(division)
+            node = self.noteutil.heading_node(division)
+            if node is None:
+                raise DivisionNotFound(division.heading_name)
+            return node.nids & columns.nid_set(PAIR)
+        raise DivisionNotFound(division)
+
+    def _pairs_of(self, nids: int) -> List[Note]:
+        """Returns the Notes of the nids in the bitset in chronological order."""
+        notes = self.noteutil.notes
+        return [notes[row] for row in self.noteutil.columns.nid_rows(nids)]
+
     def save(self) -> None:
         """Writes correct and incorrect terms to a .qz file.
 
         Returns
         -------
         None
+
+        Raises
+        ------
+        ReadOnly
+            If the NoteUtil is read-only.
         """
 
+        if self.noteutil.read_only:
+            raise ReadOnly(self.qz_file)
         kwargs = dict()
         kwargs["correct"] = list(map(lambda p: p.rcontent, self.correct))
         kwargs["incorrect"] = list(map(lambda p: p.rcontent, self.incorrect))
+        kwargs["history"] = [[p.rcontent, right, wrong] for p, (right, wrong) in self.history.items()]
+        kwargs["seed"] = self.seed
+        kwargs["position"] = self.position
         with open(self.qz_file, mode="w", encoding="utf8") as f:
             f.write(json.dumps(kwargs))
 
@@ -233,22 +410,41 @@ class Quiz:
 
         self.reset()
         kwargs = dict()
-        with open(self.qz_file, mode="r", encoding="utf8") as f:
+        # A NoteUtil made by from_strings or from_iterable has no files, so nothing was ever saved for it.
+        if self.noteutil._config_text is None:
             try:
-                kwargs = json.loads(f.read())
-            except json.JSONDecodeError:
-                pass
+                with open(self.qz_file, mode="r", encoding="utf8") as f:
+                    try:
+                        kwargs = json.loads(f.read())
+                    except json.JSONDecodeError:
+                        pass
+            except FileNotFoundError:
+                # A read-only NoteUtil doesn't make the empty file, so there may be nothing saved to load.
+                if not self.noteutil.read_only:
+                    raise
+
+        notes = dict()
+        for note in self.noteutil.notes:
+            notes.setdefault(note.rcontent, note)
 
         for rcontent in kwargs.get("correct", []):
-            for note in self.noteutil.notes:
-                if rcontent == note.rcontent:
-                    self.append(note, correct=True)
+            if rcontent in notes:
+                self.append(notes[rcontent], correct=True)
 
         for rcontent in kwargs.get("incorrect", []):
-            for note in self.noteutil.notes:
-                if rcontent == note.rcontent:
-                    self.append(note, correct=False)
-                    
+            if rcontent in notes:
+                self.append(notes[rcontent], correct=False)
+
+        # Appending above counted as answers, so the saved history replaces it.
+        self._right = array("L")
+        self._wrong = array("L")
+        for rcontent, right, wrong in kwargs.get("history", []):
+            if rcontent in notes:
+                self._answer(notes[rcontent].nid, right, wrong)
+
+        self.seed = kwargs.get("seed", None)
+        self.position = kwargs.get("position", 0)
+
     def reset(self) -> None:
         """Resets the state of the Quiz to as if it had just been initialized.
         
@@ -257,7 +453,7 @@ class Quiz:
         None
         """
         
-        self.__init__(self.noteutil)
+        self.__init__(self.noteutil, self.rng)
 
     def refresh(self, noteutil: NoteUtil) -> None:
         """Resets the state of the Quiz to match a new NoteUtil.
@@ -269,23 +465,28 @@ class Quiz:
         None
         """
 
-        self.noteutil = noteutil
-
-        for old_note in self.correct.copy():
-            self.remove(old_note, correct=True)
-            for new_note in self.noteutil.pairs:
-                if old_note.rcontent == new_note.rcontent:
-                    self.append(new_note, correct=True)
-                    break
+        # Notes hash and compare by rcontent, so an old Note looks up the new Note with identical rcontent.
+        new_pairs = {pair: pair for pair in noteutil.pairs}
+        correct = [new_pairs[p] for p in self.correct if p in new_pairs]
+        incorrect = [new_pairs[p] for p in self.incorrect if p in new_pairs]
+        history = [(new_pairs[p], answers) for p, answers in self.history.items() if p in new_pairs]
 
-        for old_note in self.incorrect.copy():
-            self.remove(old_note, correct=False)
-            for new_note in self.noteutil.pairs:
-                if old_note.rcontent == new_note.rcontent:
-                    self.append(new_note, correct=False)
-                    break
+        # The new NoteUtil has its own nids, so all of the arrays are rebuilt.
+        self.noteutil._unwatch(self)
+        self.noteutil = noteutil
+        self._track(self.noteutil.pairs)
+        for pair in correct:
+            self._marks.add(pair.nid, self._CORRECT)
+        for pair in incorrect:
+            self._marks.add(pair.nid, self._INCORRECT)
+        self._right = array("L")
+        self._wrong = array("L")
+        for pair, (right, wrong) in history:
+            self._answer(pair.nid, right, wrong)
+        self._weights = None
+        self._slots = dict()
 
         self.last_nindex = 0
         self.pairs = self.noteutil.pairs
         self.division = None
-        self.qz_file = self.noteutil.note_file.split(".")[0] + ".qz"
+        self.qz_file = os.path.splitext(self.noteutil.note_file)[0] + ".qz"
@@ -0,0 +1,309 @@
+"""This module is for the data structures used by Quiz and Leitner to track Notes."""
+from array import array
+from typing import Callable, Dict, Iterable, Iterator
+
+
+def bitset(keys: Iterable[int]) -> int:
+    """Returns the bitset with the bit of every key set. A bitset is an int whose bit k is set if k is in it."""
+    bits = bytearray()
+    for key in keys:
+        byte = key >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (key & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitset_keys(bits: int) -> Iterator[int]:
+    """Yields the keys whose bits are set in the bitset, from lowest to highest."""
+    digits = format(bits, "b")[::-1]
+    key = digits.find("1")
+    while key != -1:
+        yield key
+        key = digits.find("1", key + 1)
+
+
+class Buckets:
+    """Buckets sorts integer keys into numbered buckets, keeping each bucket in the order its keys were added.
+    Each key is in at most one bucket. Moving a key, checking its bucket and counting a bucket are constant time.
+
+    Everything is kept in flat arrays indexed by key (an intrusive doubly linked list per bucket),
+    so the cost is a few bytes per key instead of one Python object per member.
+    Buckets must not be changed while one of them is being iterated over.
+    """
+
+    NONE = 0
+    _END = -1
+
+    def __init__(self):
+        self._buckets = array("H")
+        self._previous = array("l")
+        self._next = array("l")
+        self._heads = dict()
+        self._tails = dict()
+        self._sizes = dict()
+
+    def __len__(self):
+        return sum(self._sizes.values())
+
+    def _grow(self, key: int) -> None:
+        missing = key + 1 - len(self._buckets)
+        if missing > 0:
+            self._buckets.extend([self.NONE] * missing)
+            self._previous.extend([self._END] * missing)
+            self._next.extend([self._END] * missing)
+
+    def bucket(self, key: int) -> int:
+        """Returns the bucket number of the key, or Buckets.NONE if it isn't in a bucket."""
+        if 0 <= key < len(self._buckets):
+            return self._buckets[key]
+        return self.NONE
+
+    def size(self, bucket: int) -> int:
+        return self._sizes.get(bucket, 0)
+
+    def add(self, key: int, bucket: int) -> None:
+        """Moves the key to the end of the bucket, taking it out of the bucket it was in."""
+        self.discard(key)
+        self._grow(key)
+        tail = self._tails.get(bucket, self._END)
+        self._buckets[key] = bucket
+        self._previous[key] = tail
+        self._next[key] = self._END
+        if tail == self._END:
+            self._heads[bucket] = key
+        else:
+            self._next[tail] = key
+        self._tails[bucket] = key
+        self._sizes[bucket] = self._sizes.get(bucket, 0) + 1
+
+    def discard(self, key: int) -> None:
+        """Takes the key out of its bucket if it is in one."""
+        bucket = self.bucket(key)
+        if bucket == self.NONE:
+            return
+        previous, following = self._previous[key], self._next[key]
+        if previous == self._END:
+            self._heads[bucket] = following
+        else:
+            self._next[previous] = following
+        if following == self._END:
+            self._tails[bucket] = previous
+        else:
+            self._previous[following] = previous
+        self._buckets[key] = self.NONE
+        self._sizes[bucket] -= 1
+
+    def keyset(self, bucket: int) -> int:
+        """Returns the bitset of the keys in the bucket."""
+        return bitset(self.keys(bucket))
+
+    def keys(self, bucket: int) -> Iterator[int]:
+        """Yields the keys in the bucket in the order they were added."""
+        key = self._heads.get(bucket, self._END)
+        while key != self._END:
+            yield key
+            key = self._next[key]
+
+    def remap(self, keys: Dict[int, int]) -> None:
+        """Replaces every key with the key it maps to, in the same bucket and order. Keys that aren't mapped are
+        taken out of their buckets."""
+        members = [(bucket, list(self.keys(bucket))) for bucket in self._heads]
+        self.__init__()
+        for bucket, old_keys in members:
+            for key in old_keys:
+                if key in keys:
+                    self.add(keys[key], bucket)
+
+
+class BucketView:
+    """A live view of the Notes in one bucket of a Buckets whose keys are nids.
+
+    Parameters
+    ----------
+    buckets : Buckets
+    bucket : int
+        The bucket number to view.
+    noteutil : NoteUtil
+        The NoteUtil that the nids belong to.
+    """
+
+    def __init__(self, buckets: Buckets, bucket: int, noteutil):
+        self._buckets = buckets
+        self._bucket = bucket
+        self._noteutil = noteutil
+
+    def __iter__(self):
+        for nid in self._buckets.keys(self._bucket):
+            note = self._noteutil.note_by_nid(nid)
+            if note is None:
+                raise RuntimeError("nid {0} is in a bucket but no Note of the NoteUtil has it".format(nid))
+            yield note
+
+    def __len__(self):
+        return self._buckets.size(self._bucket)
+
+    def __bool__(self):
+        return self._buckets.size(self._bucket) != 0
+
+    def __contains__(self, note):
+        nid = getattr(note, "nid", None)
+        return (nid is not None and self._buckets.bucket(nid) == self._bucket
+                and self._noteutil.note_by_nid(nid) == note)
+
+    def __repr__(self):
+        return "BucketView({0})".format(list(self))
+
+
+class Division:
+    """Division is a boolean combination of headings, categories and quiz marks that selects pairs.
+    Divisions are combined with & (and), | (or), - (and not) and ~ (not), and str or Note operands are turned into
+    Divisions on their own, so (Division("Chapter 3") & "Dates") - "correct" is a Division.
+
+    Every heading, category and mark is resolved to a bitset over nids, so the combination is worked out with
+    bitwise operations on ints instead of by filtering lists of Notes.
+
+    Parameters
+    ----------
+    division : str or Note
+        A heading name, category name or heading Note, or one of "correct", "incorrect", "unmarked" or "none".
+        See Quiz.select_pairs.
+    """
+
+    _AND = "&"
+    _OR = "|"
+    _NOT = "~"
+
+    def __init__(self, division):
+        self._operator = None
+        self._operands = (division,)
+
+    @classmethod
+    def _combine(cls, operator: str, *operands) -> "Division":
+        division = cls.__new__(cls)
+        division._operator = operator
+        division._operands = tuple(o if isinstance(o, Division) else Division(o) for o in operands)
+        return division
+
+    def __and__(self, other) -> "Division":
+        return self._combine(self._AND, self, other)
+
+    def __rand__(self, other) -> "Division":
+        return self._combine(self._AND, other, self)
+
+    def __or__(self, other) -> "Division":
+        return self._combine(self._OR, self, other)
+
+    def __ror__(self, other) -> "Division":
+        return self._combine(self._OR, other, self)
+
+    def __sub__(self, other) -> "Division":
+        return self & ~(other if isinstance(other, Division) else Division(other))
+
+    def __rsub__(self, other) -> "Division":
+        return Division(other) & ~self
+
+    def __invert__(self) -> "Division":
+        return self._combine(self._NOT, self)
+
+    def __repr__(self):
+        if self._operator is None:
+            division = self._operands[0]
+            return repr(division if isinstance(division, str) else getattr(division, "heading_name", division))
+        if self._operator == self._NOT:
+            return "~{0!r}".format(self._operands[0])
+        return "({0!r} {1} {2!r})".format(self._operands[0], self._operator, self._operands[1])
+
+    def resolve(self, resolve: Callable[[object], int], everything: int) -> int:
+        """Works out the bitset of the Division.
+
+        Parameters
+        ----------
+        resolve : Callable[[str or Note], int]
+            Returns the bitset of a single heading, category or mark.
+        everything : int
+            The bitset that ~ is taken against, so the result never has bits outside of it.
+
+        Returns
+        -------
+        int
+        """
+
+        if self._operator is None:
+            return resolve(self._operands[0]) & everything
+        if self._operator == self._NOT:
+            return everything & ~self._operands[0].resolve(resolve, everything)
+        left, right = (operand.resolve(resolve, everything) for operand in self._operands)
+        return left & right if self._operator == self._AND else left | right
+
+
+class FenwickTree:
+    """A Fenwick (binary indexed) tree over non-negative weights that is used for weighted sampling.
+    Changing a weight and drawing an index are both O(log n).
+
+    Parameters
+    ----------
+    weights : Iterable[float]
+        The starting weight of each index.
+    """
+
+    def __init__(self, weights: Iterable[float] = ()):
+        self._weights = [float(weight) for weight in weights]
+        self._tree = [0.0] + self._weights
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __getitem__(self, index: int) -> float:
+        return self._weights[index]
+
+    def __setitem__(self, index: int, weight: float) -> None:
+        delta = weight - self._weights[index]
+        self._weights[index] = float(weight)
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, end: int) -> float:
+        """Returns the sum of the weights before the index end."""
+        total = 0.0
+        while end > 0:
+            total += self._tree[end]
+            end -= end & -end
+        return total
+
+    @property
+    def total(self) -> float:
+        return self.prefix(len(self._weights))
+
+    def find(self, value: float) -> int:
+        """Returns the first index whose running total of weights is greater than the value."""
+        index = 0
+        step = 1 << (len(self._weights).bit_length() - 1) if self._weights else 0
+        while step:
+            if index + step < len(self._tree) and self._tree[index + step] <= value:
+                index += step
+                value -= self._tree[index]
+            step >>= 1
+        # Rounding can push a value equal to the total past the last index.
+        return min(index, len(self._weights) - 1)
+
+    def sample(self, rng) -> int:
+        """Draws an index with a probability proportional to its weight.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random number generator to draw with.
+
+        Returns
+        -------
+        int
+        """
+
+        return self.find(rng.random() * self.total)
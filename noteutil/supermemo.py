@@ -0,0 +1,353 @@
+from .errors import *
+from .notes import Note
+from .noteutil import NoteUtil
+from array import array
+import heapq
+import random
+import time
+from typing import Callable, Dict, Generator, List
+import os
+import json
+
+
+class SuperMemo:
+    """SuperMemo schedules pairs with the SM-2 algorithm, where every card has its own interval and ease.
+
+    If we model a pair as a flashcard (term and definition), each review is graded with a quality from 0 to 5.
+    A quality of 3 or more grows the interval by the ease of the card, and anything lower starts the card over.
+    The ease itself rises with high qualities and falls with low ones, so difficult cards come back more often.
+
+    Parameters
+    ----------
+    noteutil : NoteUtil
+        The NoteUtil that has terms and definitions to be used in this SuperMemo.
+        If it is read-only, so is the SuperMemo: no .sm file is created and save raises ReadOnly.
+    clock : Callable[[], float], optional
+        Returns the current time in seconds. Defaults to time.time.
+
+    Attributes
+    ----------
+    noteutil : NoteUtil
+    clock : Callable[[], float]
+    last_nindex : int
+        The note index of the last Note generated.
+    sm_file : str
+        The name of the .sm file that will save SuperMemo's cards.
+    """
+
+    DAY = 86400
+    INITIAL_EASE = 2.5
+    MINIMUM_EASE = 1.3
+
+    def __init__(self, noteutil: NoteUtil, clock: Callable[[], float] = time.time):
+        self.noteutil = noteutil
+        self.clock = clock
+        self.last_nindex = 0
+
+        self._clear()
+        for pair in self.noteutil.pairs:
+            self._add(pair)
+
+        # Min-heap of (due time, nid); entries whose time no longer matches _due are stale and skipped.
+        self._queue = [(0.0, pair.nid) for pair in self.noteutil.pairs]
+        heapq.heapify(self._queue)
+        self.noteutil._watch(self)
+
+        # Saving
+        self.sm_file = os.path.splitext(self.noteutil.note_file)[0] + ".sm"
+        if not self.noteutil.read_only and not os.path.exists(self.sm_file):
+            open(self.sm_file, mode="w", encoding="utf8").close()
+
+    def _clear(self) -> None:
+        # Card state is kept in arrays indexed by nid and never on the Notes,
+        # so any number of SuperMemos can share one NoteUtil.
+        self._cards = bytearray()
+        self._intervals = array("d")
+        self._eases = array("d")
+        self._repetitions = array("H")
+        self._due = array("d")
+
+    def _add(self, pair: Note) -> None:
+        """Adds a new card for the pair that is due immediately."""
+        missing = pair.nid + 1 - len(self._cards)
+        if missing > 0:
+            self._cards.extend(bytes(missing))
+            self._intervals.extend([0.0] * missing)
+            self._eases.extend([self.INITIAL_EASE] * missing)
+            self._repetitions.extend([0] * missing)
+            self._due.extend([0.0] * missing)
+        self._cards[pair.nid] = 1
+
+    def _note_added(self, note: Note) -> None:
+        """Adds a card, due immediately, for a pair that was just added to the NoteUtil."""
+        if note.is_pair() and note.nid is not None and not self._contains(note):
+            self._add(note)
+            heapq.heappush(self._queue, (self._due[note.nid], note.nid))
+
+    def _note_removed(self, note: Note) -> None:
+        """Drops the card of a pair that was edited away or deleted from the NoteUtil."""
+        if note.nid is not None and note.nid < len(self._cards):
+            self._cards[note.nid] = 0
+
+    def _notes_reloaded(self, noteutil: NoteUtil, nids: Dict[int, int]) -> None:
+        """Moves every card over to the Note that its pair was made again as by load or refresh,
+        and adds a card, due immediately, for every new pair."""
+        cards = [(new, self._intervals[old], self._eases[old], self._repetitions[old], self._due[old])
+                 for old, new in nids.items() if old < len(self._cards) and self._cards[old]]
+        self._clear()
+        for nid, interval, ease, repetitions, due in cards:
+            self._add(self.noteutil.note_by_nid(nid))
+            self._intervals[nid] = interval
+            self._eases[nid] = ease
+            self._repetitions[nid] = repetitions
+            self._due[nid] = due
+        for pair in self.noteutil.pairs:
+            if not self._contains(pair):
+                self._add(pair)
+        self._requeue()
+
+    def _schedule(self, nid: int, due: float) -> None:
+        self._due[nid] = due
+        heapq.heappush(self._queue, (due, nid))
+        # Every review leaves a stale entry behind, so the queue is rebuilt once they outnumber the cards.
+        if len(self._queue) > 2 * len(self._cards) + 16:
+            self._requeue()
+
+    def _requeue(self) -> None:
+        self._queue = [(self._due[nid], nid) for nid, card in enumerate(self._cards) if card]
+        heapq.heapify(self._queue)
+
+    def _contains(self, pair: Note) -> bool:
+        return (pair.nid is not None and pair.nid < len(self._cards) and self._cards[pair.nid] == 1
+                and self.noteutil.note_by_nid(pair.nid) is pair)
+
+    def due(self, now: float = None) -> List[Note]:
+        """Returns the pairs that are due for review, the longest overdue first.
+        This costs O(k log n) for k due pairs out of n.
+
+        Parameters
+        ----------
+        now : float, optional
+            The time in seconds to check against. Defaults to the clock.
+
+        Returns
+        -------
+        List[Note]
+        """
+
+        now = self.clock() if now is None else now
+        entries = []
+        seen = set()
+        while self._queue and self._queue[0][0] <= now:
+            entry = heapq.heappop(self._queue)
+            if self._cards[entry[1]] and self._due[entry[1]] == entry[0] and entry[1] not in seen:
+                seen.add(entry[1])
+                entries.append(entry)
+        # Due pairs stay in the queue until they are reviewed.
+        for entry in entries:
+            heapq.heappush(self._queue, entry)
+        return [self.noteutil.note_by_nid(nid) for _, nid in entries]
+
+    def generate(self, *, randomize: bool, now: float = None) -> Generator[Note, None, None]:
+        """A generator that yields the pairs that are due for review.
+
+        Parameters
+        ----------
+        randomize : bool
+            Whether to shuffle the due pairs instead of yielding the longest overdue first.
+        now : float, optional
+            The time in seconds to check against. Defaults to the clock.
+
+        Yields
+        ------
+        Note
+            A pair that is due for review.
+        """
+
+        pairs = self.due(now)
+        if randomize:
+            random.shuffle(pairs)
+        for pair in pairs:
+            self.last_nindex = pair.nindex
+            yield pair
+
+    def review(self, pair: Note, quality: int, now: float = None) -> None:
+        """Grades a review of the pair and schedules its next review with SM-2.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair that was reviewed.
+        quality : int
+            How well the pair was recalled, from 0 (blackout) to 5 (perfect).
+        now : float, optional
+            The time in seconds of the review. Defaults to the clock.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        QualityError
+            If the quality is not between 0 and 5.
+        """
+
+        if not 0 <= quality <= 5:
+            raise QualityError(quality)
+        if not self._contains(pair):
+            return
+
+        nid = pair.nid
+        if quality < 3:
+            self._repetitions[nid] = 0
+            self._intervals[nid] = 1
+        else:
+            if self._repetitions[nid] == 0:
+                self._intervals[nid] = 1
+            elif self._repetitions[nid] == 1:
+                self._intervals[nid] = 6
+            else:
+                self._intervals[nid] = round(self._intervals[nid] * self._eases[nid])
+            self._repetitions[nid] += 1
+        ease = self._eases[nid] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        self._eases[nid] = max(self.MINIMUM_EASE, ease)
+
+        now = self.clock() if now is None else now
+        self._schedule(nid, now + self._intervals[nid] * self.DAY)
+
+    def correct(self, pair: Note) -> None:
+        """Handles the pair if it was answered correctly, as a review of quality 4.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair that was answered correctly.
+
+        Returns
+        -------
+        None
+        """
+
+        self.review(pair, 4)
+
+    def incorrect(self, pair: Note) -> None:
+        """Handles the pair if it was answered incorrectly, as a review of quality 1.
+
+        Parameters
+        ----------
+        pair : Note
+            The pair that was answered incorrectly.
+
+        Returns
+        -------
+        None
+        """
+
+        self.review(pair, 1)
+
+    def card(self, pair: Note) -> dict:
+        """Returns the scheduling state of the pair.
+
+        Parameters
+        ----------
+        pair : Note
+
+        Returns
+        -------
+        dict
+            The interval (days), ease, repetitions and due (seconds) of the pair, or an empty dict if it has no card.
+        """
+
+        if not self._contains(pair):
+            return {}
+        nid = pair.nid
+        return {"interval": self._intervals[nid], "ease": self._eases[nid],
+                "repetitions": self._repetitions[nid], "due": self._due[nid]}
+
+    def save(self) -> None:
+        """Writes SuperMemo state to a .sm file.
+        Only cards that have been reviewed are written, each as [rcontent, interval, ease, repetitions, due].
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ReadOnly
+            If the NoteUtil is read-only.
+        """
+
+        if self.noteutil.read_only:
+            raise ReadOnly(self.sm_file)
+        with open(self.sm_file, mode="w", encoding="utf8") as f:
+            f.write(json.dumps({"cards": self._reviewed()}, separators=(",", ":")))
+
+    def load(self) -> None:
+        """Loads a SuperMemo state from a .sm file.
+
+        Returns
+        -------
+        None
+        """
+
+        self.reset()
+        kwargs = dict()
+        # A NoteUtil made by from_strings or from_iterable has no files, so nothing was ever saved for it.
+        if self.noteutil._config_text is None:
+            try:
+                with open(self.sm_file, mode="r", encoding="utf8") as f:
+                    try:
+                        kwargs = json.loads(f.read())
+                    except json.JSONDecodeError:
+                        pass
+            except FileNotFoundError:
+                # A read-only NoteUtil doesn't make the empty file, so there may be nothing saved to load.
+                if not self.noteutil.read_only:
+                    raise
+
+        self._restore(kwargs.get("cards", []), {pair.rcontent: pair for pair in self.noteutil.pairs})
+
+    def _reviewed(self) -> list:
+        """Returns [rcontent, interval, ease, repetitions, due] for every card that has been reviewed."""
+        return [[self.noteutil.note_by_nid(nid).rcontent, self._intervals[nid], self._eases[nid],
+                 self._repetitions[nid], self._due[nid]]
+                for nid, card in enumerate(self._cards) if card and self._due[nid] != 0]
+
+    def _restore(self, cards: list, pairs: dict) -> None:
+        """Applies [rcontent, interval, ease, repetitions, due] cards to the pairs they match and rebuilds the queue."""
+        for rcontent, interval, ease, repetitions, due in cards:
+            pair = pairs.get(rcontent)
+            if pair is not None:
+                nid = pair.nid
+                self._intervals[nid] = interval
+                self._eases[nid] = ease
+                self._repetitions[nid] = repetitions
+                self._due[nid] = due
+        self._requeue()
+
+    def reset(self) -> None:
+        """Resets the state of the SuperMemo to as if it had just been initialized.
+
+        Returns
+        -------
+        None
+        """
+
+        self.__init__(self.noteutil, self.clock)
+
+    def refresh(self, noteutil: NoteUtil) -> None:
+        """Resets the state of the SuperMemo to match a new NoteUtil.
+        This is the same as saving the NoteUtil and then loading it with a different NoteUtil.
+        As such, only identical Notes from both NoteUtils are kept.
+
+        Returns
+        -------
+        None
+        """
+
+        cards = self._reviewed()
+        self.noteutil._unwatch(self)
+        self.__init__(noteutil, self.clock)
+        self._restore(cards, {pair.rcontent: pair for pair in self.noteutil.pairs})
@@ -1,4 +1,8 @@
 import noteutil as nu
+import json
+import os
+import shutil
+import tempfile
 
 
 # basic_noteutil = nu.NoteUtil("test_data/basic_config.txt", refresh=True)
@@ -6,6 +10,137 @@ import noteutil as nu
 # heading_noteutil = nu.NoteUtil("test_data/heading_config.txt", refresh=True)
 # extension_noteutil = nu.NoteUtil("test_data/extension_config.txt", refresh=True)
 # category_noteutil = nu.NoteUtil("test_data/category_config.txt", refresh=True)
-# all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
 # all2_noteutil = nu.NoteUtil("test_data/all2_config.txt", refresh=True)
-# all3_noteutil = nu.NoteUtil("test_data/all3_config.txt", refresh=True)
\ No newline at end of file
+# all3_noteutil = nu.NoteUtil("test_data/all3_config.txt", refresh=True)
+
+
+class TestLeitnerBoxes:
+    def test_correct(self):
+        leitner = nu.Leitner(all1_noteutil)
+        pair = all1_noteutil.pairs[0]
+        for _ in range(10):
+            leitner.correct(pair)
+        assert leitner.box_of(pair) == len(leitner.boxes)
+        assert list(leitner.boxes[len(leitner.boxes)]) == [pair]
+
+    def test_incorrect(self):
+        leitner = nu.Leitner(all1_noteutil)
+        first, second = all1_noteutil.pairs[:2]
+        leitner.correct(first)
+        leitner.incorrect(first)
+        assert leitner.box_of(first) == 1
+        assert list(leitner.boxes[1])[-1] == first
+        assert list(leitner.boxes[1])[0] == second
+
+    def test_edits(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        leitner = nu.Leitner(noteutil)
+        taxation = noteutil.get(term="Taxation")
+        leitner.correct(taxation)
+        new_term = noteutil.edit(noteutil.notes.index(taxation), "NewTerm ~ NewDef")
+        assert leitner.box_of(taxation) == 0 and leitner.box_of(new_term) == 1
+        assert list(leitner.boxes[2]) == []
+        assert list(leitner.boxes[1])[-1] is new_term
+
+    def test_pop_box(self):
+        leitner = nu.Leitner(all1_noteutil)
+        pair = all1_noteutil.pairs[0]
+        for _ in range(10):
+            leitner.correct(pair)
+        leitner.pop_box()
+        assert leitner.box_of(pair) == 6
+        assert pair in leitner.boxes[6]
+
+    def test_shared_noteutil(self):
+        first, second = nu.Leitner(all1_noteutil), nu.Leitner(all1_noteutil)
+        pair = all1_noteutil.pairs[0]
+        first.correct(pair)
+        assert first.box_of(pair) == 2
+        assert second.box_of(pair) == 1
+        assert not hasattr(pair, "box")
+
+
+class TestLeitnerSessions:
+    def test_generate(self):
+        leitner = nu.Leitner(all1_noteutil)
+        for index, pair in enumerate(all1_noteutil.pairs):
+            for _ in range(index % len(leitner.boxes)):
+                leitner.correct(pair)
+        for session in range(1, 60):
+            expected = [p for number, box in leitner.boxes.items() if session % leitner.times[number] == 0 for p in box]
+            assert list(leitner.generate(randomize=False)) == expected
+        assert leitner.session == 60
+
+    def test_unfinished_generate(self):
+        leitner = nu.Leitner(all1_noteutil)
+        next(leitner.generate(randomize=False))
+        assert len(list(leitner.generate(randomize=True))) == len(all1_noteutil.pairs)
+
+    def test_preview(self):
+        leitner = nu.Leitner(all1_noteutil)
+        leitner.correct(all1_noteutil.pairs[0])
+        preview = leitner.preview(sessions=10)
+        for session, count in preview.items():
+            leitner.session = session
+            assert count == len(list(leitner.generate(randomize=False)))
+
+
+class TestLeitnerSaving:
+    def test_load(self):
+        leitner = nu.Leitner(all1_noteutil)
+        pairs = all1_noteutil.pairs
+        leitner.correct(pairs[0])
+        leitner.correct(pairs[0])
+        leitner.correct(pairs[3])
+        leitner.save()
+        leitner.load()
+        assert list(leitner.boxes[3]) == [pairs[0]]
+        assert list(leitner.boxes[2]) == [pairs[3]]
+        assert len(leitner.boxes[1]) == len(pairs) - 2
+
+    def test_refresh(self):
+        leitner = nu.Leitner(all1_noteutil)
+        leitner.correct(all1_noteutil.pairs[1])
+        new_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+        leitner.refresh(new_noteutil)
+        assert next(iter(leitner.boxes[2])) is new_noteutil.pairs[1]
+        assert all(any(p is pair for pair in new_noteutil.pairs) for p in leitner.boxes[1])
+
+    def test_load_extra_boxes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            note_file = os.path.join(directory, "notes.txt")
+            shutil.copy("test_data/all1_notes.txt", note_file)
+            noteutil = nu.NoteUtil("test_data/all1_config.txt", note_file=note_file)
+            leitner = nu.Leitner(noteutil)
+            leitner.append_box(40)
+            lexington = noteutil.get(term="Lexington")
+            for _ in range(7):
+                leitner.correct(lexington)
+            leitner.save()
+            loaded = nu.Leitner(noteutil)
+            loaded.load()
+            assert list(loaded.boxes[8]) == [lexington] and loaded.times[8] == 40
+
+            with open(leitner.lt_file, mode="w", encoding="utf8") as f:
+                f.write(json.dumps({"boxes": {"9": [lexington.rcontent]}}))
+            loaded.load()
+            assert len(loaded.boxes) == 7 and list(loaded.boxes[7]) == [lexington]
+
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            note_file = os.path.join(directory, "notes.txt")
+            shutil.copy("test_data/all1_notes.txt", note_file)
+            noteutil = nu.NoteUtil("test_data/all1_config.txt", note_file=note_file)
+            leitner = nu.Leitner(noteutil)
+            leitner.correct(noteutil.get(term="Lexington"))
+            noteutil.delete(noteutil.notes.index(noteutil.get(term="Taxation")))
+            noteutil.save()
+            noteutil.load()
+            assert list(leitner.boxes[2]) == [noteutil.get(term="Lexington")]
+            assert next(iter(leitner.boxes[2])) is noteutil.get(term="Lexington")
+            assert list(leitner.boxes[1]) == [p for p in noteutil.pairs if p.term != "Lexington"]
+            leitner.save()
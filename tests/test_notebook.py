@@ -0,0 +1,67 @@
+import noteutil as nu
+import os
+import shutil
+import tempfile
+
+
+notebook = nu.Notebook("test_data/all1_config.txt", "test_data/notebook")
+
+
+class TestNotebook:
+    def test_lazy(self):
+        lazy = nu.Notebook("test_data/all1_config.txt", "test_data/notebook/*.txt")
+        assert lazy.note_files == ["test_data/notebook/part1.txt", "test_data/notebook/part2.txt"]
+        assert not lazy.noteutils
+        assert lazy.get(term="Taxation") is not None
+        assert list(lazy.noteutils) == ["test_data/notebook/part1.txt"]
+
+    def test_load(self):
+        notebook.load()
+        assert len(notebook.noteutils) == 2
+        assert len(notebook.notes) == 16
+        assert [note.rcontent for note in notebook.notes[:3]] == \
+               [note.rcontent for note in nu.NoteUtil("test_data/all1_config.txt").notes[:3]]
+
+    def test_index(self):
+        notebook.load()
+        assert [notebook.locate(pair) for pair in notebook.terms["Treaty of Paris"]] == \
+               [("test_data/notebook/part1.txt", 8), ("test_data/notebook/part2.txt", 5)]
+        assert notebook.headings["Framers"][0].pairs == notebook.pairs[-3:]
+
+    def test_index_updates(self):
+        indexed = nu.Notebook("test_data/all1_config.txt", "test_data/notebook", read_only=True)
+        part1, part2 = indexed.note_files
+        indexed.noteutil(part2)
+        assert [indexed.locate(pair) for pair in indexed.terms["Treaty of Paris"]] == [(part2, 5)]
+        indexed.load()
+        assert [indexed.locate(pair) for pair in indexed.terms["Treaty of Paris"]] == [(part1, 8), (part2, 5)]
+        edited = indexed.noteutil(part1).edit(8, "Treaty of Ghent ~ Ended the War of 1812.")
+        assert [indexed.locate(pair) for pair in indexed.terms["Treaty of Paris"]] == [(part2, 5)]
+        assert indexed.terms["Treaty of Ghent"] == [edited]
+
+    def test_index_reload(self):
+        indexed = nu.Notebook("test_data/all1_config.txt", "test_data/notebook", read_only=True)
+        indexed.load()
+        part1 = indexed.noteutil(indexed.note_files[0])
+        old_pairs = indexed.terms["Treaty of Paris"]
+        part1.load()
+        assert indexed.terms["Treaty of Paris"][0] is part1.get(term="Treaty of Paris")
+        assert indexed.terms["Treaty of Paris"][0] is not old_pairs[0]
+        part1.refresh()
+        assert indexed.headings["Causes"] == [part1.get(heading_name="Causes")]
+        assert indexed.headings["Causes"][0] is part1.get(heading_name="Causes")
+
+    def test_dotted_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = os.path.join(directory, "course.v2")
+            shutil.copytree("test_data/notebook", files, ignore=shutil.ignore_patterns("*.nu"))
+            nu.Notebook("test_data/all1_config.txt", files).load()
+            reused = nu.Notebook("test_data/all1_config.txt", files, refresh=False)
+            reused.load()
+            assert sorted(noteutil.nu_file for noteutil in reused.noteutils.values()) == \
+                   [os.path.join(files, "part1.nu"), os.path.join(files, "part2.nu")]
+            # Blocks don't survive save, so only the pairs of each file are compared.
+            for name in ["part1", "part2"]:
+                note_file = os.path.join("test_data/notebook", name + ".txt")
+                assert [pair.rcontent for pair in reused.noteutil(os.path.join(files, name + ".txt")).pairs] == \
+                       [pair.rcontent for pair in notebook.noteutil(note_file).pairs]
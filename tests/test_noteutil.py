@@ -1,5 +1,9 @@
 import noteutil as nu
+from noteutil.noteutil import iterlines
+from noteutil.parsing import CategoryTrie, ExtensionScanner, classify
+import io
 import os
+import threading
 
 
 basic_noteutil = nu.NoteUtil("test_data/basic_config.txt", refresh=True)
@@ -7,7 +11,7 @@ basic_noteutil = nu.NoteUtil("test_data/basic_config.txt", refresh=True)
 # heading_noteutil = nu.NoteUtil("test_data/heading_config.txt", refresh=True)
 # extension_noteutil = nu.NoteUtil("test_data/extension_config.txt", refresh=True)
 # category_noteutil = nu.NoteUtil("test_data/category_config.txt", refresh=True)
-# all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
 # all2_noteutil = nu.NoteUtil("test_data/all2_config.txt", refresh=True)
 # all3_noteutil = nu.NoteUtil("test_data/all3_config.txt", refresh=True)
 
@@ -38,8 +42,267 @@ class TestNoteUtilMethods:
     pass
 
 
+class TestNoteColumns:
+    def test_rows(self):
+        assert len(all1_noteutil.columns) == len(all1_noteutil.notes)
+        assert all1_noteutil.select(nu.columns.PAIR) == all1_noteutil.pairs
+        assert all1_noteutil.select(nu.columns.HEADING, level=2) == all1_noteutil.level_order["Section"]
+
+    def test_category(self):
+        assert all1_noteutil.select(nu.columns.PAIR, category="Dates") == all1_noteutil.categories["Dates"]
+
+    def test_content(self):
+        for note in all1_noteutil.notes:
+            assert all1_noteutil.columns.content(note.nindex) == note.content
+
+    def test_row_set(self):
+        columns = all1_noteutil.columns
+        for flags in range(8):
+            for level in (None, 1, 2):
+                rows = columns.rows(flags, level)
+                assert columns.row_set(flags, level) == sum(1 << row for row in rows)
+                assert rows == [note.nindex for note in all1_noteutil.notes
+                                if columns.flags[note.nindex] & flags == flags and
+                                (level is None or (note.level or 0) == level)]
+        try:
+            columns.row_set(category="Not a category")
+            assert False
+        except KeyError:
+            pass
+
+
 class TestNoteAttributes:
-    pass
+    def test_hash(self):
+        pairs = all1_noteutil.pairs
+        assert len(set(pairs)) == len(pairs)
+        for pair in pairs:
+            assert pair in set(pairs)
+            assert hash(pair) == hash(pair.rcontent)
+
+    def test_digest(self):
+        note = all1_noteutil.notes[0]
+        assert note.digest == nu.Note(None, note.content, 0, heading_char="#", heading="#").digest
+
+
+class TestNoteUtilConcurrency:
+    def test_consistent_reads(self):
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True, concurrent=True)
+        count = len(noteutil.notes)
+        torn = []
+
+        def read():
+            for _ in range(200):
+                with noteutil.reading():
+                    notes = list(noteutil.notes)
+                    if any(note.nindex != i for i, note in enumerate(notes)) or len(notes) not in (count, count + 1):
+                        torn.append(notes)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for _ in range(50):
+            noteutil.make_note("A threaded note", 1)
+            noteutil.delete(1)
+        for reader in readers:
+            reader.join()
+        assert not torn
+        assert len(noteutil.notes) == count
+
+    def test_load(self):
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True, concurrent=True)
+        lock = noteutil._lock
+        noteutil.load()
+        assert noteutil.concurrent and noteutil._lock is lock
+
+
+class TestNoteUtilParsing:
+    class SmallChunks(nu.NoteUtil):
+        PARSE_CHUNK_SIZE = 4
+
+    def test_processes(self):
+        parallel = self.SmallChunks("test_data/all1_config.txt", refresh=True, processes=2)
+        assert [(n.rcontent, n.nindex, n.nid, n.begin_nindex, n.end_nindex) for n in parallel.notes] == \
+               [(n.rcontent, n.nindex, n.nid, n.begin_nindex, n.end_nindex) for n in all1_noteutil.notes]
+
+    def test_extension_scanner(self):
+        names, bounds = ["Example", "Aside"], [("{", "}"), ("[", "]")]
+        scanning = all1_noteutil._syntax._replace(extension_names=names, extension_bounds=bounds,
+                                                  extension_scanner=ExtensionScanner(names, bounds))
+        one_by_one = scanning._replace(extension_scanner=None)
+        for content in ["[a] x {b}", "{a} x {b} [c]", "x {a}{b} y", "{a} [b]", "a { b [c] } d", "a {b", "a } {b}"]:
+            expected, actual = classify(one_by_one, content), classify(scanning, content)
+            assert (actual.content, str(actual.error)) == (expected.content, str(expected.error))
+            assert [(e.content, e.name) for e in actual.kwargs.get("extensions", [])] == \
+                   [(e.content, e.name) for e in expected.kwargs.get("extensions", [])]
+
+    def test_extension_scanner_shipped_bounds(self):
+        # The bounds of the example config in RULES.md, some of which are symmetric or hold each other
+        names = ["Additional Information", "Example", "LaTeX", "Simple Definition", "Image", "Image Explanation"]
+        bounds = [("&&", "&&"), ("%%", "%%"), ("\\[", "\\]"), ("<e>", "<z>"), ("![](", ")"), ("![", "]")]
+        scanner = ExtensionScanner(names, bounds)
+        scanning = all1_noteutil._syntax._replace(extension_names=names, extension_bounds=bounds,
+                                                  extension_scanner=scanner)
+        one_by_one = scanning._replace(extension_scanner=None)
+        for content in ["Eigenvalue ~ Av = kv && square matrices only && %% [[2, 0], [0, 3]] %%",
+                        "Inverse ~ \\[ A^{-1} \\] ![](inverse.png) ![The inverse undoes A]",
+                        "Span && a && b && c && d", "<e> ![x] && y && <z> rest", "&&&x&&"]:
+            assert scanner.scan(content, dict()) is not None
+            expected, actual = classify(one_by_one, content), classify(scanning, content)
+            assert (actual.content, str(actual.error)) == (expected.content, str(expected.error))
+            assert [(e.content, e.name) for e in actual.kwargs["extensions"]] == \
+                   [(e.content, e.name) for e in expected.kwargs["extensions"]]
+        assert scanner.scan("Span && a", dict()) is None
+
+    def test_category_trie(self):
+        trie = CategoryTrie(["Date", "Important", "Date again", "Long"], ["$", "!", "$", "!!"])
+        kwargs = dict()
+        assert trie.categorize("$ !$!! Treaty", kwargs) == "Treaty"
+        assert kwargs["category_names"] == ["Date", "Important", "Date again", "Long"]
+        assert trie.categorize("!$ Treaty", kwargs) == "Treaty"
+        assert kwargs["category_names"] == ["Important", "Date again"]
+
+    def test_iterlines(self):
+        for text in ["", "a", "a\n", "`block\nof code\n`\n\nb", "\n\n"]:
+            for size in [1, 2, 1024]:
+                assert list(iterlines(io.StringIO(text), size)) == text.split("\n")
+
+
+class TestNoteUtilValidate:
+    def test_valid(self):
+        assert nu.NoteUtil.validate("test_data/all1_config.txt") == []
+
+    def test_errors(self):
+        errors = nu.NoteUtil.validate("test_data/all1_config.txt", note_file="test_data/invalid_notes.txt")
+        assert [(number, type(error)) for number, error in errors] == \
+               [(3, nu.errors.HeadingJump), (6, nu.errors.DuplicateTerm), (7, nu.errors.ExtraSeparator),
+                (8, nu.errors.MissingBound)]
+        assert not os.path.exists("test_data/invalid_notes.nu")
+
+    def test_fail_fast(self):
+        errors = nu.NoteUtil.validate("test_data/all1_config.txt", True, "test_data/invalid_notes.txt")
+        assert [number for number, _ in errors] == [3]
+
+
+class TestNoteUtilReadOnly:
+    def test_no_writes(self):
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", note_file="test_data/readonly_notes.txt", read_only=True)
+        quiz, leitner = nu.Quiz(noteutil), nu.Leitner(noteutil)
+        quiz.load()
+        leitner.load()
+        noteutil.load()
+        for saving in (noteutil, quiz, leitner):
+            try:
+                saving.save()
+                assert False
+            except nu.ReadOnly:
+                pass
+        for extension in (".nu", ".qz", ".lt"):
+            assert not os.path.exists("test_data/readonly_notes" + extension)
+
+    def test_same_notes(self):
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", read_only=True)
+        assert [n.rcontent for n in noteutil.notes] == [n.rcontent for n in all1_noteutil.notes]
+
+
+class TestNoteUtilInMemory:
+    with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+        config = f.read()
+    with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+        notes = f.read()
+
+    def test_from_strings(self):
+        noteutil = nu.NoteUtil.from_strings(self.config, self.notes)
+        assert [n.rcontent for n in noteutil.notes] == [n.rcontent for n in all1_noteutil.notes]
+        assert noteutil.read_only
+
+    def test_from_iterable(self):
+        noteutil = nu.NoteUtil.from_iterable(self.config, iter(self.notes.splitlines()))
+        noteutil.delete(0)
+        noteutil.load()
+        assert [n.rcontent for n in noteutil.notes] == [n.rcontent for n in all1_noteutil.notes]
+
+
+class TestNoteUtilHeadingTree:
+    with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+        config = f.read()
+    with open("test_data/readonly_notes.txt", mode="r", encoding="utf8") as f:
+        notes = f.read()
+
+    def test_tree(self):
+        noteutil = nu.NoteUtil.from_strings(self.config, self.notes)
+        root = noteutil.heading_tree
+        assert (root.notes, root.pairs, root.extensions) == (7, 3, 2)
+        assert root.categories == {"Important": 2, "Dates": 2}
+        chapter, = root.children
+        section, = chapter.children
+        assert chapter.heading.heading_name == "Chapter 1 The Revolution" and section.parent is chapter
+        assert (chapter.notes, chapter.pairs, section.notes, section.pairs) == (6, 3, 4, 3)
+        assert noteutil.heading_node(section.heading) is section
+        assert [node.level for node in root.walk()] == [0, 1, 2]
+
+    def test_edits(self):
+        noteutil = nu.NoteUtil.from_strings(self.config, self.notes)
+        section = noteutil.heading_node(noteutil.get(heading_name="Causes"))
+        noteutil.make_note("$Yorktown ~ The last major battle, in 1781.", 7)
+        assert (section.notes, section.pairs, section.categories["Dates"]) == (5, 4, 3)
+        noteutil.edit(7, "Yorktown ended the war.")
+        assert (section.notes, section.pairs, section.categories["Dates"]) == (5, 3, 2)
+        noteutil.delete(3)
+        assert (section.notes, section.pairs, section.categories) == (4, 2, {"Important": 1, "Dates": 2})
+        assert noteutil.heading_tree.notes == len(noteutil.notes)
+
+        noteutil.edit(2, "## Consequences")
+        assert noteutil.heading_node(section.heading) is None
+        assert noteutil.heading_tree.children[0].children[0].heading.heading_name == "Consequences"
+
+    def test_failed_edit(self):
+        noteutil = nu.NoteUtil.from_strings(self.config, self.notes)
+        causes = noteutil.get(heading_name="Causes")
+        try:
+            noteutil.edit(noteutil.notes.index(causes), "#### Too deep")
+            assert False
+        except nu.HeadingJump:
+            pass
+        assert noteutil._heading_tree is not None
+        assert noteutil.heading_node(causes).notes == 4
+
+
+class TestNoteUtilStats:
+    def test_unwrapped(self):
+        plain = nu.NoteUtil("test_data/all1_config.txt")
+        assert not hasattr(plain.get, "__wrapped__") and plain.get(term="Madison") is not None
+        timed = nu.NoteUtil("test_data/all1_config.txt", stats=nu.Stats())
+        assert hasattr(timed.get, "__wrapped__")
+        concurrent = nu.NoteUtil("test_data/all1_config.txt", concurrent=True)
+        assert hasattr(concurrent.get, "__wrapped__")
+
+    def test_stats(self):
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True, stats=nu.Stats())
+        noteutil.get(term="Madison")
+        noteutil.select()
+        noteutil.select()
+        statistics = noteutil.statistics()
+        for phase in ["parse_config", "parse_notes", "read_notes", "make_notes", "save"]:
+            assert statistics["timers"][phase]["calls"] == 1
+        assert statistics["timers"]["classify.extensions"]["calls"] == len(noteutil.notes)
+        assert statistics["timers"]["get"]["calls"] == 1
+        assert statistics["counters"]["notes"] == len(noteutil.notes)
+        assert statistics["notes_per_second"] > 0
+        assert statistics["columns_hit_rate"] == 0.5
+
+    def test_streaming(self):
+        stats = nu.Stats()
+        noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True, stats=stats)
+        stats.clear()
+        classified = noteutil._classify_notes()
+        next(classified)
+        assert "read_notes" not in stats.as_dict()["timers"]
+        list(classified)
+        assert stats.as_dict()["timers"]["read_notes"]["calls"] == 1
+
+    def test_disabled(self):
+        all1_noteutil.get(term="Madison")
+        assert all1_noteutil.statistics()["timers"] == {}
 
 
 class TestExtensionAttributes:
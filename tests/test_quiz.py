@@ -1,4 +1,8 @@
 import noteutil as nu
+import random
+import os
+import shutil
+import tempfile
 
 
 # basic_noteutil = nu.NoteUtil("test_data/basic_config.txt", refresh=True)
@@ -6,6 +10,221 @@ import noteutil as nu
 # heading_noteutil = nu.NoteUtil("test_data/heading_config.txt", refresh=True)
 # extension_noteutil = nu.NoteUtil("test_data/extension_config.txt", refresh=True)
 # category_noteutil = nu.NoteUtil("test_data/category_config.txt", refresh=True)
-# all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
 # all2_noteutil = nu.NoteUtil("test_data/all2_config.txt", refresh=True)
-# all3_noteutil = nu.NoteUtil("test_data/all3_config.txt", refresh=True)
\ No newline at end of file
+# all3_noteutil = nu.NoteUtil("test_data/all3_config.txt", refresh=True)
+
+
+class TestQuizMarking:
+    def test_append(self):
+        quiz = nu.Quiz(all1_noteutil)
+        first, second = all1_noteutil.pairs[:2]
+        quiz.append(first, correct=True)
+        quiz.append(second, correct=False)
+        quiz.append(first, correct=False)
+        assert list(quiz.correct) == []
+        assert list(quiz.incorrect) == [second, first]
+        assert len(quiz.unmarked) == len(all1_noteutil.pairs) - 2
+
+    def test_remove(self):
+        quiz = nu.Quiz(all1_noteutil)
+        pair = all1_noteutil.pairs[0]
+        quiz.append(pair, correct=True)
+        quiz.remove(pair, correct=True)
+        assert pair not in quiz.correct
+        assert pair in quiz.unmarked
+        quiz.select_pairs("unmarked")
+        assert quiz.pairs == all1_noteutil.pairs
+
+    def test_edits(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        quiz = nu.Quiz(noteutil)
+        taxation = noteutil.get(term="Taxation")
+        quiz.append(noteutil.get(term="Lexington"), correct=True)
+        new_term = noteutil.edit(taxation.nindex, "NewTerm ~ NewDef")
+        inserted = noteutil.make_note("Inserted ~ A pair made after the Quiz.", 1)
+        assert taxation not in quiz.unmarked
+        assert new_term in quiz.unmarked and inserted in quiz.unmarked
+        noteutil.delete(noteutil.notes.index(noteutil.get(term="Lexington")))
+        assert list(quiz.correct) == []
+        assert sorted(quiz.unmarked) == noteutil.pairs
+        assert noteutil.note_by_nid(taxation.nid) is None
+        assert len(noteutil._nid_notes) == len(noteutil.notes)
+        quiz.append(taxation, correct=True)
+        assert list(quiz.correct) == []
+
+    def test_built_note(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        quiz = nu.Quiz(noteutil)
+        pair = nu.Note(noteutil, "Built ~ By hand", 0, term="Built", definition="By hand", separator="~")
+        noteutil.insert(pair, 0)
+        assert pair.nid is not None and noteutil.note_by_nid(pair.nid) is pair
+        quiz.append(pair, correct=True)
+        assert list(quiz.correct) == [pair]
+        leitner = nu.Leitner(noteutil)
+        leitner.correct(pair)
+        assert leitner.box_of(pair) == 2
+
+
+    def test_reinserted_note(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        quiz = nu.Quiz(noteutil)
+        taxation = noteutil.get(term="Taxation")
+        nindex = noteutil.notes.index(taxation)
+        noteutil.delete(nindex)
+        noteutil.insert(taxation, nindex)
+        assert noteutil.note_by_nid(taxation.nid) is taxation
+        assert taxation in quiz.unmarked
+
+
+class TestQuizGenerate:
+    def test_chronological(self):
+        quiz = nu.Quiz(all1_noteutil)
+        assert list(quiz.generate(randomize=False)) == all1_noteutil.pairs
+
+    def test_randomize(self):
+        quiz = nu.Quiz(all1_noteutil, random.Random(0))
+        order = list(quiz.generate(randomize=True))
+        assert sorted(order) == all1_noteutil.pairs
+        assert order == list(nu.Quiz(all1_noteutil, random.Random(0)).generate(randomize=True))
+
+    def test_resume(self):
+        quiz = nu.Quiz(all1_noteutil, random.Random(1))
+        generator = quiz.generate(randomize=True)
+        first = [next(generator) for _ in range(3)]
+        rest = list(generator)
+        quiz.position = 3
+        quiz.save()
+        quiz.load()
+        assert list(quiz.generate(randomize=True, resume=True)) == rest
+        assert len(first + rest) == len(all1_noteutil.pairs)
+
+
+class TestQuizAdaptive:
+    def test_weight(self):
+        quiz = nu.Quiz(all1_noteutil)
+        pair = all1_noteutil.pairs[0]
+        quiz.append(pair, correct=False)
+        quiz.append(pair, correct=False)
+        assert quiz.weight(pair) == 3
+        quiz.append(pair, correct=True)
+        assert quiz.weight(pair) == 1.5
+
+    def test_generate_adaptive(self):
+        quiz = nu.Quiz(all1_noteutil, random.Random(2))
+        hard = all1_noteutil.pairs[4]
+        drawn = []
+        for pair in quiz.generate_adaptive(count=500):
+            quiz.append(pair, correct=pair != hard)
+            drawn.append(pair)
+        assert len(drawn) == 500
+        assert drawn.count(hard) > max(drawn.count(p) for p in all1_noteutil.pairs if p != hard)
+
+
+class TestQuizSaving:
+    def test_load(self):
+        quiz = nu.Quiz(all1_noteutil)
+        pairs = all1_noteutil.pairs
+        quiz.append(pairs[0], correct=True)
+        quiz.append(pairs[2], correct=False)
+        quiz.save()
+        quiz.load()
+        assert list(quiz.correct) == [pairs[0]]
+        assert list(quiz.incorrect) == [pairs[2]]
+        assert len(quiz.unmarked) == len(pairs) - 2
+        assert quiz.history == {pairs[0]: [1, 0], pairs[2]: [0, 1]}
+
+    def test_load_in_memory(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        saved = nu.Quiz(all1_noteutil)
+        saved.append(all1_noteutil.pairs[0], correct=True)
+        saved.save()
+        for study in [nu.Quiz(noteutil), nu.Leitner(noteutil), nu.SuperMemo(noteutil)]:
+            study.load()
+        quiz = nu.Quiz(noteutil)
+        quiz.load()
+        assert list(quiz.correct) == [] and len(quiz.unmarked) == len(noteutil.pairs)
+
+    def test_refresh(self):
+        quiz = nu.Quiz(all1_noteutil)
+        quiz.append(all1_noteutil.pairs[1], correct=True)
+        new_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+        quiz.refresh(new_noteutil)
+        assert list(quiz.correct) == [new_noteutil.pairs[1]]
+        assert next(iter(quiz.correct)) is new_noteutil.pairs[1]
+
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            note_file = os.path.join(directory, "notes.txt")
+            shutil.copy("test_data/all1_notes.txt", note_file)
+            noteutil = nu.NoteUtil("test_data/all1_config.txt", note_file=note_file)
+            quiz = nu.Quiz(noteutil)
+            quiz.append(noteutil.get(term="Lexington"), correct=True)
+            quiz.append(noteutil.get(term="Madison"), correct=False)
+            noteutil.delete(noteutil.notes.index(noteutil.get(term="Taxation")))
+            noteutil.save()
+            noteutil.load()
+            assert list(quiz.correct) == [noteutil.get(term="Lexington")]
+            assert next(iter(quiz.correct)) is noteutil.get(term="Lexington")
+            assert list(quiz.incorrect) == [noteutil.get(term="Madison")]
+            assert sorted(quiz.unmarked) == [p for p in noteutil.pairs if p.term not in ("Lexington", "Madison")]
+            assert quiz.history == {noteutil.get(term="Lexington"): [1, 0], noteutil.get(term="Madison"): [0, 1]}
+            quiz.save()
+
+
+class TestQuizDivisions:
+    def test_combine(self):
+        quiz = nu.Quiz(all1_noteutil)
+        chapter1 = all1_noteutil.get(heading_name="Chapter 1 The Revolution")
+        chapter2 = all1_noteutil.get(heading_name="Chapter 2 The Constitution")
+        dates = [p for p in chapter1.pairs if "Dates" in p.category_names]
+        quiz.append(dates[0], correct=True)
+        quiz.select_pairs((nu.Division(chapter1) & "Dates") - "correct")
+        assert quiz.pairs == dates[1:]
+        quiz.select_pairs(nu.Division("Causes") | chapter2)
+        assert quiz.pairs == all1_noteutil.get(heading_name="Causes").pairs + chapter2.pairs
+        quiz.select_pairs(~nu.Division(chapter1))
+        assert quiz.pairs == chapter2.pairs
+
+    def test_single(self):
+        quiz = nu.Quiz(all1_noteutil)
+        quiz.select_pairs("Dates")
+        assert quiz.pairs == [p for p in all1_noteutil.pairs if "Dates" in p.category_names]
+        quiz.select_pairs("Causes")
+        assert quiz.pairs == all1_noteutil.get(heading_name="Causes").pairs
+
+    def test_marks(self):
+        with open("test_data/all1_config.txt", mode="r", encoding="utf8") as f:
+            config = f.read()
+        with open("test_data/all1_notes.txt", mode="r", encoding="utf8") as f:
+            noteutil = nu.NoteUtil.from_strings(config, f.read())
+        quiz = nu.Quiz(noteutil)
+        lexington = noteutil.get(term="Lexington")
+        quiz.append(lexington, correct=False)
+        quiz.append(noteutil.get(term="Taxation"), correct=True)
+        noteutil.edit(noteutil.get(term="Taxation").nindex, "NewTerm ~ NewDef")
+        noteutil.make_note("Inserted ~ A pair made after the Quiz.", 1)
+        quiz.select_pairs(nu.Division("unmarked"))
+        assert quiz.pairs == [p for p in noteutil.pairs if p is not lexington]
+        quiz.select_pairs(nu.Division("correct") | "incorrect")
+        assert quiz.pairs == [lexington]
+
+    def test_not_found(self):
+        quiz = nu.Quiz(all1_noteutil)
+        try:
+            quiz.select_pairs(nu.Division("Dates") & "Nowhere")
+            assert False
+        except nu.DivisionNotFound:
+            pass
@@ -0,0 +1,6 @@
+from benchmarks.regression import check_parity
+
+
+class TestReferenceParity:
+    def test_parity(self):
+        assert check_parity(seeds=4, notes=100, edits=20) == []
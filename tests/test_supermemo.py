@@ -0,0 +1,80 @@
+import noteutil as nu
+import os
+import shutil
+import tempfile
+
+
+all1_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+
+
+class Clock:
+    def __init__(self):
+        self.time = 1000.0
+
+    def __call__(self):
+        return self.time
+
+
+class TestSuperMemoReview:
+    def test_due(self):
+        supermemo = nu.SuperMemo(all1_noteutil, Clock())
+        assert sorted(supermemo.due()) == all1_noteutil.pairs
+
+    def test_review(self):
+        clock = Clock()
+        supermemo = nu.SuperMemo(all1_noteutil, clock)
+        pair = all1_noteutil.pairs[0]
+        supermemo.correct(pair)
+        assert pair not in supermemo.due()
+        assert supermemo.card(pair)["interval"] == 1
+        clock.time += nu.SuperMemo.DAY
+        assert pair in supermemo.due()
+        supermemo.correct(pair)
+        supermemo.correct(pair)
+        assert supermemo.card(pair)["interval"] == 15
+        supermemo.incorrect(pair)
+        assert supermemo.card(pair)["repetitions"] == 0
+        assert supermemo.card(pair)["ease"] < nu.SuperMemo.INITIAL_EASE
+
+    def test_quality(self):
+        supermemo = nu.SuperMemo(all1_noteutil, Clock())
+        try:
+            supermemo.review(all1_noteutil.pairs[0], 6)
+            assert False
+        except nu.QualityError:
+            pass
+
+
+class TestSuperMemoSaving:
+    def test_load(self):
+        supermemo = nu.SuperMemo(all1_noteutil, Clock())
+        pair = all1_noteutil.pairs[2]
+        supermemo.correct(pair)
+        card = supermemo.card(pair)
+        supermemo.save()
+        supermemo.load()
+        assert supermemo.card(pair) == card
+        assert len(supermemo.due()) == len(all1_noteutil.pairs) - 1
+
+    def test_refresh(self):
+        supermemo = nu.SuperMemo(all1_noteutil, Clock())
+        supermemo.correct(all1_noteutil.pairs[2])
+        new_noteutil = nu.NoteUtil("test_data/all1_config.txt", refresh=True)
+        supermemo.refresh(new_noteutil)
+        assert supermemo.card(new_noteutil.pairs[2])["repetitions"] == 1
+        assert new_noteutil.pairs[2] not in supermemo.due()
+
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            note_file = os.path.join(directory, "notes.txt")
+            shutil.copy("test_data/all1_notes.txt", note_file)
+            noteutil = nu.NoteUtil("test_data/all1_config.txt", note_file=note_file)
+            supermemo = nu.SuperMemo(noteutil, Clock())
+            supermemo.correct(noteutil.get(term="Lexington"))
+            card = supermemo.card(noteutil.get(term="Lexington"))
+            noteutil.delete(noteutil.notes.index(noteutil.get(term="Taxation")))
+            noteutil.save()
+            noteutil.load()
+            assert supermemo.card(noteutil.get(term="Lexington")) == card
+            assert sorted(supermemo.due()) == [p for p in noteutil.pairs if p.term != "Lexington"]
+            supermemo.save()